@@ -0,0 +1,99 @@
+import ast
+import os
+import logging
+import configparser
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Aree fisse multiple con nome (es. dialoghi, diario missioni, descrizione oggetti),
+# salvate nella sezione [Areas] di ocrqt.ini come "nome = [left, top, width, height]".
+
+AREAS_SECTION = 'Areas'
+
+def _parse_area(value: str) -> Optional[List[int]]:
+    try:
+        area = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return None
+    if (not isinstance(area, (list, tuple)) or len(area) != 4
+            or not all(isinstance(x, (int, float)) for x in area) or area[2] <= 0 or area[3] <= 0):
+        return None
+    return [int(x) for x in area]
+
+def load_areas(ini_file: str = 'ocrqt.ini') -> Dict[str, List[int]]:
+    """
+    Legge le aree con nome dalla sezione [Areas].
+    Returns:
+        Dict[str, List[int]]: Nome -> [left, top, width, height], nell'ordine del file.
+    """
+    areas = OrderedDict()
+    if not os.path.isfile(ini_file):
+        return areas
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    if AREAS_SECTION not in config:
+        return areas
+    for name, value in config[AREAS_SECTION].items():
+        area = _parse_area(value)
+        if area is None:
+            logging.error(f"Area non valida in [{AREAS_SECTION}]: {name} = {value}")
+            continue
+        areas[name] = area
+    return areas
+
+def save_area(name: str, area: List[int], ini_file: str = 'ocrqt.ini'):
+    """
+    Aggiunge o sostituisce un'area con nome nella sezione [Areas].
+    Args:
+        name: Nome dell'area (es. 'dialoghi').
+        area: Rettangolo [left, top, width, height].
+    """
+    config = configparser.ConfigParser()
+    if os.path.isfile(ini_file):
+        config.read(ini_file)
+    if AREAS_SECTION not in config:
+        config[AREAS_SECTION] = {}
+    config[AREAS_SECTION][name] = str([int(x) for x in area])
+    with open(ini_file, 'w') as f:
+        config.write(f)
+    logging.info(f"Area '{name}' salvata: {area}")
+
+def clear_areas(ini_file: str = 'ocrqt.ini'):
+    """Rimuove tutte le aree con nome."""
+    config = configparser.ConfigParser()
+    if not os.path.isfile(ini_file):
+        return
+    config.read(ini_file)
+    if config.remove_section(AREAS_SECTION):
+        with open(ini_file, 'w') as f:
+            config.write(f)
+        logging.info("Aree con nome rimosse")
+
+def bounding_rect(areas) -> List[int]:
+    """
+    Calcola il rettangolo che contiene tutte le aree.
+    Args:
+        areas: Iterabile di [left, top, width, height].
+    Returns:
+        List[int]: Rettangolo [left, top, width, height].
+    """
+    areas = list(areas)
+    left = min(a[0] for a in areas)
+    top = min(a[1] for a in areas)
+    right = max(a[0] + a[2] for a in areas)
+    bottom = max(a[1] + a[3] for a in areas)
+    return [left, top, right - left, bottom - top]
+
+def crop_area(frame, frame_rect: List[int], area: List[int]):
+    """
+    Ritaglia un'area da una cattura del rettangolo frame_rect.
+    Args:
+        frame: Immagine PIL del rettangolo frame_rect.
+        frame_rect: Rettangolo catturato [left, top, width, height].
+        area: Area da ritagliare, in coordinate dello schermo.
+    Returns:
+        Image: Ritaglio dell'area.
+    """
+    left = area[0] - frame_rect[0]
+    top = area[1] - frame_rect[1]
+    return frame.crop((left, top, left + area[2], top + area[3]))
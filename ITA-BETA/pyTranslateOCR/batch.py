@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterable, List, Set
+from startup import setup_logging
+
+# OCR e traduzione senza interfaccia di cartelle di immagini (screenshot, scansioni).
+# Ogni file è elaborato da un processo separato; i risultati vengono scritti una riga
+# JSON per file, subito dopo l'elaborazione, così un'esecuzione interrotta può riprendere
+# saltando i file già presenti nel file di output.
+#
+# Uso: python batch.py CARTELLA [CARTELLA...] -o risultati.jsonl [-w 4] [--no-translate]
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+BATCH_ENGINES = ('Tesseract', 'Umi-OCR_server')   # Umi-OCR cattura lo schermo da sé
+
+_worker_settings = None
+
+def find_images(inputs: Iterable[str], recursive: bool = False,
+                extensions: Iterable[str] = IMAGE_EXTENSIONS) -> List[str]:
+    """
+    Elenca le immagini da elaborare.
+    Args:
+        inputs: Cartelle o singoli file.
+        recursive: Se True, scende nelle sottocartelle.
+        extensions: Estensioni accettate (minuscole, con il punto).
+    Returns:
+        List[str]: Percorsi assoluti ordinati, senza duplicati.
+    """
+    extensions = tuple(ext.lower() for ext in extensions)
+    found = set()
+    for path in inputs:
+        if os.path.isfile(path):
+            found.add(os.path.abspath(path))
+        elif os.path.isdir(path):
+            if recursive:
+                for root, _, files in os.walk(path):
+                    found.update(os.path.abspath(os.path.join(root, name)) for name in files
+                                 if name.lower().endswith(extensions))
+            else:
+                found.update(os.path.abspath(os.path.join(path, name)) for name in os.listdir(path)
+                             if name.lower().endswith(extensions) and os.path.isfile(os.path.join(path, name)))
+        else:
+            logging.error(f"Percorso inesistente: {path}")
+    return sorted(found)
+
+def load_done(output_file: str) -> Set[str]:
+    """
+    Legge dal file di output i file già elaborati senza errori.
+    Le righe incomplete (es. esecuzione interrotta durante la scrittura) vengono ignorate.
+    """
+    done = set()
+    if not os.path.isfile(output_file):
+        return done
+    with open(output_file, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get('file') and not record.get('error'):
+                done.add(record['file'])
+    return done
+
+def _init_worker(settings: dict, debug: bool):
+    # Eseguita una volta per processo: le impostazioni restano in memoria per tutti i file
+    global _worker_settings
+    _worker_settings = settings
+    setup_logging(debug)
+    from translation.locally import shutdown_locally_workers
+    # atexit non viene eseguito nei processi del pool: chiudi i worker translateLocally
+    # quando il processo termina
+    multiprocessing.util.Finalize(None, shutdown_locally_workers, exitpriority=10)
+
+def process_file(path: str) -> dict:
+    """
+    Esegue OCR e traduzione di un'immagine (nel processo del pool).
+    Returns:
+        dict: Record JSON con testo, traduzione, tempi in millisecondi ed eventuale errore.
+    """
+    from PIL import Image
+    from ocr.ocr import perform_ocr
+    from translation.translate import translate_text
+
+    s = _worker_settings
+    record = {'file': path, 'ocr_text': '', 'translation': '', 'ocr_engine': s['ocr_engine'],
+              'translate_engine': s['translate_engine'] if s['translate'] else None,
+              'timings': {}, 'error': None}
+    timings = record['timings']
+    start = time.perf_counter()
+    try:
+        with Image.open(path) as img:
+            image = img.convert('RGB')
+        timings['load'] = round((time.perf_counter() - start) * 1000, 1)
+
+        lap = time.perf_counter()
+        area = [0, 0, image.width, image.height]
+        text = perform_ocr(s['ocr_engine'], s['umi_ocr_path'], s['tesseract_path'], area, s['ocr_lang'],
+                           s['enhance_image'], s['contrast'], s['sharpness'], s['invert'], image=image,
+                           raise_errors=True)
+        timings['ocr'] = round((time.perf_counter() - lap) * 1000, 1)
+        record['ocr_text'] = text
+
+        if s['translate'] and text.strip():
+            lap = time.perf_counter()
+            record['translation'] = translate_text(s['translate_engine'], text, s['source_lang'],
+                                                   s['target_lang'], s['unique_text'],
+                                                   s['translate_locally_path'])
+            timings['translate'] = round((time.perf_counter() - lap) * 1000, 1)
+    except Exception as e:
+        logging.error(f"Errore con {path}: {e}")
+        record['error'] = str(e)
+    timings['total'] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+def run_batch(files: List[str], output_file: str, settings: dict, workers: int, debug: bool = False) -> dict:
+    """
+    Elabora i file con un pool di processi e accoda i risultati al file JSONL.
+    Args:
+        files: Immagini da elaborare.
+        output_file: File JSONL di output (aperto in aggiunta).
+        settings: Impostazioni dei motori (vedi build_settings).
+        workers: Numero di processi.
+    Returns:
+        dict: Conteggi 'done', 'errors' e durata totale 'elapsed' in secondi.
+    """
+    summary = {'done': 0, 'errors': 0, 'elapsed': 0.0}
+    start = time.perf_counter()
+    pending_files = iter(files)
+    with open(output_file, 'a', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(settings, debug)) as pool:
+        # Al massimo due file in coda per processo: i risultati vengono scritti man mano
+        # e un'interruzione perde solo il lavoro in corso
+        in_flight = set()
+        while True:
+            while len(in_flight) < workers * 2:
+                path = next(pending_files, None)
+                if path is None:
+                    break
+                in_flight.add(pool.submit(process_file, path))
+            if not in_flight:
+                break
+            completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in completed:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+                summary['done'] += 1
+                if record['error']:
+                    summary['errors'] += 1
+                logging.info(f"[{summary['done']}/{len(files)}] {record['file']} "
+                             f"({record['timings']['total']:.0f} ms)")
+    summary['elapsed'] = time.perf_counter() - start
+    return summary
+
+def build_settings(args) -> dict:
+    """Unisce le impostazioni di ocrqt.ini con le opzioni della riga di comando."""
+    from ini_controll import load_engine_settings
+    from ocr.tesseract import map_to_tesseract_language
+
+    settings = load_engine_settings(args.ini)
+    for key, value in (('ocr_engine', args.ocr_engine), ('translate_engine', args.translate_engine),
+                       ('source_lang', args.source), ('target_lang', args.target)):
+        if value:
+            settings[key] = value
+    source = settings['source_lang']
+    settings['ocr_lang'] = map_to_tesseract_language(source) if settings['ocr_engine'] == 'Tesseract' else source
+    settings['enhance_image'] = args.enhance
+    settings['unique_text'] = args.unique_text
+    settings['translate'] = not args.no_translate
+    return settings
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR e traduzione di cartelle di immagini, senza interfaccia")
+    parser.add_argument('inputs', nargs='+', help='Cartelle o file immagine da elaborare')
+    parser.add_argument('-o', '--output', default='risultati.jsonl', help='File JSONL di output (default: risultati.jsonl)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help='Numero di processi (default: numero di CPU)')
+    parser.add_argument('--ini', default='ocrqt.ini', help='File delle impostazioni (default: ocrqt.ini)')
+    parser.add_argument('--ocr-engine', choices=BATCH_ENGINES, help='Motore OCR (default: quello di ocrqt.ini)')
+    parser.add_argument('--translate-engine', choices=('LibreTranslate', 'NLLB', 'Locally', 'Google'), help='Motore di traduzione')
+    parser.add_argument('--source', help='Lingua di origine (es. en)')
+    parser.add_argument('--target', help='Lingua di destinazione (es. it)')
+    parser.add_argument('--no-translate', action='store_true', help='Esegue solo l\'OCR')
+    parser.add_argument('--enhance', action='store_true', help='Applica la pre-elaborazione dell\'immagine')
+    parser.add_argument('--unique-text', action='store_true', help='Unisce il testo in una singola riga prima di tradurre')
+    parser.add_argument('--recursive', action='store_true', help='Elabora anche le sottocartelle')
+    parser.add_argument('--extensions', default=','.join(IMAGE_EXTENSIONS), help='Estensioni accettate, separate da virgola')
+    parser.add_argument('--no-resume', action='store_true', help='Rielabora anche i file già presenti nell\'output')
+    parser.add_argument('--debug', action='store_true', help='Abilita i messaggi di debug')
+    args = parser.parse_args()
+
+    setup_logging(debug=args.debug)
+    settings = build_settings(args)
+    if settings['ocr_engine'] not in BATCH_ENGINES:
+        logging.error(f"Motore OCR {settings['ocr_engine']} non utilizzabile in batch: usa {' o '.join(BATCH_ENGINES)}")
+        return 2
+
+    extensions = [ext.strip() if ext.strip().startswith('.') else '.' + ext.strip()
+                  for ext in args.extensions.split(',') if ext.strip()]
+    files = find_images(args.inputs, args.recursive, extensions)
+    if not args.no_resume:
+        done = load_done(args.output)
+        skipped = len(files)
+        files = [path for path in files if path not in done]
+        skipped -= len(files)
+        if skipped:
+            logging.info(f"{skipped} file già elaborati in {args.output}, saltati")
+    if not files:
+        print("Nessuna immagine da elaborare")
+        return 0
+
+    workers = max(1, min(args.workers, len(files)))
+    logging.info(f"Elaborazione di {len(files)} immagini con {workers} processi "
+                 f"(OCR: {settings['ocr_engine']}, traduzione: "
+                 f"{settings['translate_engine'] if settings['translate'] else 'no'})")
+    summary = run_batch(files, args.output, settings, workers, args.debug)
+    print(f"Elaborati {summary['done']} file ({summary['errors']} errori) in {summary['elapsed']:.1f} s "
+          f"-> {args.output}")
+    return 1 if summary['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# Benchmark delle fasi della pipeline (pre-elaborazione, OCR, traduzione) su immagini di
+# testo sintetiche e server locali fittizi. Uso: python -m bench.run --help
@@ -0,0 +1,101 @@
+import os
+import glob
+import logging
+from typing import Dict, Optional
+from PIL import Image, ImageDraw, ImageFont
+
+# Immagini di testo sintetiche per il benchmark: righe di testo nero su fondo chiaro (o
+# chiaro su fondo scuro, come i sottotitoli) in diversi sistemi di scrittura e dimensioni.
+
+# Sistema di scrittura -> lingua e testo di esempio
+SAMPLES = {
+    'latin': ('en', "The old lighthouse keeper opened the door.\n"
+                    "A cold wind carried the smell of salt and rain.\n"
+                    "\"We leave at dawn,\" she said, and closed the map."),
+    'cyrillic': ('ru', "Старый смотритель маяка открыл дверь.\n"
+                       "Холодный ветер принёс запах соли и дождя.\n"
+                       "«Мы уходим на рассвете», — сказала она."),
+    'cjk': ('ja', "年老いた灯台守が扉を開けた。\n"
+                  "冷たい風が塩と雨の匂いを運んできた。\n"
+                  "「夜明けに出発する」と彼女は言った。"),
+}
+DEFAULT_SIZES = (14, 24, 40)
+
+# Font candidati per sistema di scrittura (il primo trovato viene usato)
+FONT_CANDIDATES = {
+    'latin': ['DejaVuSans.ttf', 'LiberationSans-Regular.ttf', 'Arial.ttf', 'arial.ttf'],
+    'cyrillic': ['DejaVuSans.ttf', 'LiberationSans-Regular.ttf', 'Arial.ttf', 'arial.ttf'],
+    'cjk': ['NotoSansCJK-Regular.ttc', 'NotoSansCJKjp-Regular.otf', 'DroidSansFallbackFull.ttf',
+            'msgothic.ttc', 'YuGothM.ttc'],
+}
+FONT_DIRS = ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts'),
+             os.path.expanduser('~/.local/share/fonts'), 'C:\\Windows\\Fonts', '/Library/Fonts',
+             '/System/Library/Fonts']
+
+_font_paths: Dict[str, Optional[str]] = {}
+
+def find_font(script: str) -> Optional[str]:
+    """
+    Cerca un font installato adatto al sistema di scrittura.
+    Returns:
+        Optional[str]: Percorso del font o None se non trovato.
+    """
+    if script in _font_paths:
+        return _font_paths[script]
+    path = None
+    for name in FONT_CANDIDATES.get(script, []):
+        for font_dir in FONT_DIRS:
+            matches = glob.glob(os.path.join(font_dir, '**', name), recursive=True)
+            if matches:
+                path = matches[0]
+                break
+        if path:
+            break
+    if path is None:
+        logging.warning(f"Nessun font trovato per il sistema di scrittura '{script}'")
+    _font_paths[script] = path
+    return path
+
+def render_text_image(text: str, font_path: str, size: int, dark_background: bool = False,
+                      margin: int = 12) -> Image.Image:
+    """
+    Disegna il testo su un'immagine RGB delle dimensioni necessarie.
+    Args:
+        text: Testo, anche su più righe.
+        font_path: Font TrueType/OpenType da usare.
+        size: Dimensione del font in pixel.
+        dark_background: Testo chiaro su fondo scuro (stile sottotitoli/HUD).
+        margin: Margine attorno al testo in pixel.
+    Returns:
+        Image: Immagine generata.
+    """
+    font = ImageFont.truetype(font_path, size)
+    spacing = max(2, size // 3)
+    probe = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+    left, top, right, bottom = probe.multiline_textbbox((0, 0), text, font=font, spacing=spacing)
+    background, foreground = ((24, 24, 32), (235, 235, 235)) if dark_background else ((250, 250, 245), (20, 20, 20))
+    image = Image.new('RGB', (right - left + 2 * margin, bottom - top + 2 * margin), background)
+    ImageDraw.Draw(image).multiline_text((margin - left, margin - top), text, font=font,
+                                         fill=foreground, spacing=spacing)
+    return image
+
+def build_cases(scripts=None, sizes=DEFAULT_SIZES) -> list:
+    """
+    Genera i casi del benchmark: un'immagine per ogni sistema di scrittura e dimensione.
+    I sistemi di scrittura senza un font installato vengono saltati.
+    Returns:
+        list: Dizionari con name, script, lang, text, size e image.
+    """
+    cases = []
+    for script in scripts or SAMPLES:
+        if script not in SAMPLES:
+            logging.error(f"Sistema di scrittura sconosciuto: {script}")
+            continue
+        font_path = find_font(script)
+        if font_path is None:
+            continue
+        lang, text = SAMPLES[script]
+        for size in sizes:
+            cases.append({'name': f"{script}/{size}px", 'script': script, 'lang': lang, 'text': text,
+                          'size': size, 'image': render_text_image(text, font_path, size)})
+    return cases
@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import time
+import difflib
+import logging
+import argparse
+import platform
+import tempfile
+from typing import Callable, Dict, List, Sequence
+
+# Misura la latenza delle fasi della pipeline senza cattura dello schermo e senza servizi
+# esterni: le immagini sono generate con PIL (bench/images.py) e LibreTranslate, NLLB e
+# Umi-OCR server sono sostituiti da server locali fittizi (bench/stubs.py).
+# Per ogni fase e caso vengono riportati p50/p95/p99 in millisecondi; i risultati salvati
+# in JSON possono essere confrontati con un'esecuzione precedente.
+#
+# Uso (dalla cartella del programma):
+#   python -m bench.run -o prima.json
+#   python -m bench.run -o dopo.json
+#   python -m bench.run --compare prima.json dopo.json
+
+STAGES = ('normalize', 'preprocess', 'ocr_tesseract', 'ocr_umi_server',
+          'translate_libre', 'translate_nllb', 'translate_memory')
+DEFAULT_ITERATIONS = 30
+DEFAULT_WARMUP = 3
+REGRESSION_THRESHOLD = 0.10     # aumento relativo del p50 considerato una regressione
+NOISE_FLOOR_MS = 0.5            # differenze assolute sotto questa soglia sono rumore
+
+def percentile(sorted_samples: Sequence[float], pct: float) -> float:
+    """Percentile con interpolazione lineare su campioni già ordinati."""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+def summarize(samples: List[float]) -> dict:
+    """
+    Statistiche di una serie di durate.
+    Returns:
+        dict: n, mean, min, max, p50, p95 e p99 in millisecondi.
+    """
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        'min': round(ordered[0], 3) if ordered else 0.0,
+        'max': round(ordered[-1], 3) if ordered else 0.0,
+        'p50': round(percentile(ordered, 50), 3),
+        'p95': round(percentile(ordered, 95), 3),
+        'p99': round(percentile(ordered, 99), 3),
+    }
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int):
+    """
+    Esegue fn più volte e ne misura la durata.
+    Returns:
+        Tuple[List[float], object]: Durate in millisecondi e risultato dell'ultima esecuzione.
+    """
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, result
+
+def text_accuracy(expected: str, recognized: str) -> float:
+    """Somiglianza (0-1) tra testo atteso e riconosciuto, ignorando gli spazi."""
+    return round(difflib.SequenceMatcher(None, ''.join(expected.split()), ''.join(recognized.split())).ratio(), 4)
+
+def _tesseract_languages(tesseract_path: str) -> List[str]:
+    from language_utils import get_raw_tesseract_languages
+    return get_raw_tesseract_languages(tesseract_path) or []
+
+def run_benchmark(stages: Sequence[str], cases: list, iterations: int, warmup: int,
+                  tesseract_path: str = '', target_lang: str = 'it') -> Dict[str, Dict[str, dict]]:
+    """
+    Esegue le fasi richieste su tutti i casi.
+    Args:
+        stages: Fasi da misurare (vedi STAGES).
+        cases: Casi generati da bench.images.build_cases.
+        iterations: Misure per fase e caso.
+        warmup: Esecuzioni iniziali non misurate (cache, handle tesserocr, connessioni).
+        tesseract_path: Percorso di Tesseract (vuoto per cercarlo nel PATH).
+        target_lang: Lingua di destinazione delle traduzioni.
+    Returns:
+        Dict[str, Dict[str, dict]]: Fase -> caso -> statistiche.
+    """
+    from ocr.ocr import perform_ocr, preprocess_image
+    from ocr.normalize import normalize_image, is_available as normalize_available
+    from ocr.tesseract import map_to_tesseract_language
+    from translation.translate import translate_text
+
+    results: Dict[str, Dict[str, dict]] = {}
+
+    def record(stage, name, samples, **extra):
+        stats = summarize(samples)
+        stats.update(extra)
+        results.setdefault(stage, {})[name] = stats
+        print(f"{stage:<17} {name:<16} p50 {stats['p50']:9.2f}  p95 {stats['p95']:9.2f}  "
+              f"p99 {stats['p99']:9.2f} ms", flush=True)
+
+    installed = _tesseract_languages(tesseract_path) if 'ocr_tesseract' in stages else []
+    for case in cases:
+        image, name = case['image'], case['name']
+        area = [0, 0, image.width, image.height]
+        if 'normalize' in stages and normalize_available():
+            samples, _ = measure(lambda: normalize_image(image, 'Tesseract'), iterations, warmup)
+            record('normalize', name, samples)
+        if 'preprocess' in stages:
+            samples, _ = measure(lambda: preprocess_image(image, 1.5, 1.0, False), iterations, warmup)
+            record('preprocess', name, samples)
+        if 'ocr_tesseract' in stages:
+            tesseract_lang = map_to_tesseract_language(case['lang'])
+            if tesseract_lang not in installed:
+                logging.warning(f"Lingua Tesseract '{tesseract_lang}' non installata, salto {name}")
+            else:
+                samples, text = measure(lambda: perform_ocr('Tesseract', '', tesseract_path, area, tesseract_lang,
+                                                            False, 1.0, 1, False, image=image),
+                                        iterations, warmup)
+                record('ocr_tesseract', name, samples, accuracy=text_accuracy(case['text'], text))
+        if 'ocr_umi_server' in stages:
+            samples, _ = measure(lambda: perform_ocr('Umi-OCR_server', '', '', area, case['lang'],
+                                                     False, 1.0, 1, False, image=image),
+                                 iterations, warmup)
+            record('ocr_umi_server', name, samples)
+
+    # La traduzione dipende solo dal testo: un caso per sistema di scrittura
+    texts = {}
+    for case in cases:
+        texts.setdefault(case['script'], (case['lang'], case['text']))
+    engines = {'translate_libre': 'LibreTranslate', 'translate_nllb': 'NLLB'}
+    for script, (lang, text) in texts.items():
+        for stage, engine in engines.items():
+            if stage in stages:
+                samples, _ = measure(lambda: translate_text(engine, text, lang, target_lang, False, use_memory=False),
+                                     iterations, warmup)
+                record(stage, script, samples)
+        if 'translate_memory' in stages:
+            # Prima chiamata memorizza la traduzione, le successive la trovano in memoria
+            samples, _ = measure(lambda: translate_text('LibreTranslate', text, lang, target_lang, False),
+                                 iterations, max(1, warmup))
+            record('translate_memory', script, samples)
+    return results
+
+def environment_info() -> dict:
+    """Versioni e librerie opzionali, per sapere se due esecuzioni sono confrontabili."""
+    import PIL
+    info = {'python': platform.python_version(), 'platform': platform.platform(), 'machine': platform.machine(),
+            'cpus': os.cpu_count(), 'pillow': PIL.__version__}
+    for module in ('numpy', 'tesserocr', 'mss'):
+        try:
+            info[module] = getattr(__import__(module), '__version__', 'installato')
+        except ImportError:
+            info[module] = None
+    try:
+        import pytesseract
+        info['tesseract'] = str(pytesseract.get_tesseract_version())
+    except Exception:
+        info['tesseract'] = None
+    return info
+
+def compare_results(old: dict, new: dict, threshold: float = REGRESSION_THRESHOLD) -> int:
+    """
+    Stampa il confronto tra due esecuzioni salvate.
+    Returns:
+        int: Numero di regressioni (p50 aumentato oltre la soglia e oltre il rumore).
+    """
+    regressions = 0
+    print(f"{'fase':<17} {'caso':<16} {'p50 prima':>10} {'p50 dopo':>10} {'Δ p50':>8} "
+          f"{'p95 prima':>10} {'p95 dopo':>10} {'Δ p95':>8}")
+    for stage, cases in new['results'].items():
+        for name, after in cases.items():
+            before = old['results'].get(stage, {}).get(name)
+            if before is None:
+                continue
+            deltas = []
+            for key in ('p50', 'p95'):
+                deltas.append((after[key] - before[key]) / before[key] * 100 if before[key] else 0.0)
+            regressed = (after['p50'] > before['p50'] * (1 + threshold)
+                         and after['p50'] - before['p50'] > NOISE_FLOOR_MS)
+            regressions += regressed
+            print(f"{stage:<17} {name:<16} {before['p50']:10.2f} {after['p50']:10.2f} {deltas[0]:+7.1f}% "
+                  f"{before['p95']:10.2f} {after['p95']:10.2f} {deltas[1]:+7.1f}%"
+                  + ("  REGRESSIONE" if regressed else ""))
+    if old.get('environment') != new.get('environment'):
+        print("Attenzione: le due esecuzioni provengono da ambienti diversi")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark delle fasi di OCR e traduzione")
+    parser.add_argument('-n', '--iterations', type=int, default=DEFAULT_ITERATIONS, help='Misure per fase e caso')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='Esecuzioni iniziali non misurate')
+    parser.add_argument('--stages', default=','.join(STAGES), help='Fasi da misurare, separate da virgola')
+    parser.add_argument('--scripts', default='latin,cyrillic,cjk', help='Sistemi di scrittura (latin, cyrillic, cjk)')
+    parser.add_argument('--sizes', default='14,24,40', help='Dimensioni del testo in pixel')
+    parser.add_argument('--stub-latency', type=float, default=0.0, help='Latenza simulata dei server fittizi (ms)')
+    parser.add_argument('--tesseract-path', default='', help='Percorso di Tesseract (default: PATH)')
+    parser.add_argument('-o', '--output', help='Salva i risultati in questo file JSON')
+    parser.add_argument('--compare', nargs=2, metavar=('PRIMA', 'DOPO'), help='Confronta due file di risultati')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='Soglia di regressione del p50 (0.10 = 10%%)')
+    parser.add_argument('--debug', action='store_true', help='Abilita i messaggi di debug')
+    args = parser.parse_args()
+
+    # Senza --debug solo gli avvisi: i messaggi delle singole fasi (es. "Pre-elaborazione
+    # immagine") rallenterebbero le misure
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING,
+                        format='%(levelname)s:%(name)s:%(message)s')
+
+    if args.compare:
+        with open(args.compare[0], encoding='utf-8') as f:
+            old = json.load(f)
+        with open(args.compare[1], encoding='utf-8') as f:
+            new = json.load(f)
+        return 1 if compare_results(old, new, args.threshold) else 0
+
+    from bench.images import build_cases
+    from bench.stubs import StubServers
+    from translation import memory
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Fasi sconosciute: {', '.join(unknown)} (disponibili: {', '.join(STAGES)})")
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    cases = build_cases([script.strip() for script in args.scripts.split(',') if script.strip()], sizes)
+    if not cases:
+        logging.error("Nessun caso da misurare (font non trovati?)")
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp, StubServers(args.stub_latency):
+        # Memoria di traduzione temporanea: non tocca quella dell'utente
+        memory._memory = memory.TranslationMemory(os.path.join(tmp, 'bench_tm.sqlite'))
+        try:
+            results = run_benchmark(stages, cases, args.iterations, args.warmup, args.tesseract_path)
+        finally:
+            memory._memory.close()
+            memory._memory = None
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'options': {'iterations': args.iterations, 'warmup': args.warmup, 'stub_latency_ms': args.stub_latency,
+                    'sizes': sizes},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Risultati salvati in {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import json
+import time
+import base64
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Server fittizi che imitano le API di LibreTranslate, nllb-serve e Umi-OCR server, per
+# misurare il costo lato client (codifica, pool HTTP, parsing) senza i servizi reali.
+# Ogni risposta attende una latenza fissa configurabile che simula il tempo del modello.
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status: int = 200):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _path(self) -> str:
+        # nllb.py compone l'URL con una doppia barra ("http://host:porta//translate")
+        return '/' + self.path.strip('/')
+
+class LibreTranslateStub(_StubHandler):
+    def do_GET(self):
+        if self._path() == '/languages':
+            self._send_json([{'code': 'en', 'name': 'English'}, {'code': 'it', 'name': 'Italian'}])
+        else:
+            self._send_json({'error': 'Not found'}, 404)
+
+    def do_POST(self):
+        body = self._read_json()
+        time.sleep(self.latency)
+        q, target = body.get('q', ''), body.get('target', '')
+        if isinstance(q, list):
+            self._send_json({'translatedText': [f"[{target}] {text}" for text in q]})
+        else:
+            self._send_json({'translatedText': f"[{target}] {q}"})
+
+class NLLBStub(_StubHandler):
+    def do_GET(self):
+        self._send_json({'status': 'ok'})
+
+    def do_POST(self):
+        body = self._read_json()
+        time.sleep(self.latency)
+        source, target = body.get('source', ''), body.get('tgt_lang', '')
+        if isinstance(source, list):
+            self._send_json({'translation': [f"[{target}] {text}" for text in source]})
+        else:
+            self._send_json({'translation': f"[{target}] {source}"})
+
+class UmiOCRStub(_StubHandler):
+    def do_POST(self):
+        body = self._read_json()
+        time.sleep(self.latency)
+        # Decodifica l'immagine come farebbe il server reale, senza riconoscere il testo
+        size = len(base64.b64decode(body.get('base64', '')))
+        self._send_json({'code': 100, 'data': [{'text': f"stub {size} byte", 'score': 1.0}]})
+
+class StubServers:
+    """
+    Avvia i server fittizi su porte libere di localhost e vi reindirizza i moduli dei
+    motori (LIBRETRANSLATE_URL, NLLB_URL, UMI_SERVER_URL). Da usare come context manager.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self._servers = []
+        self._saved = []
+
+    def _start(self, handler_class):
+        handler = type(handler_class.__name__, (handler_class,), {'latency': self.latency})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def _redirect(self, module, attribute: str, url: str):
+        self._saved.append((module, attribute, getattr(module, attribute)))
+        setattr(module, attribute, url)
+
+    def __enter__(self):
+        from translation import libretranslate, nllb
+        from ocr import umi
+        self._redirect(libretranslate, 'LIBRETRANSLATE_URL', self._start(LibreTranslateStub))
+        self._redirect(nllb, 'NLLB_URL', self._start(NLLBStub))
+        self._redirect(umi, 'UMI_SERVER_URL', self._start(UmiOCRStub))
+        logging.debug("Server fittizi avviati: " + ", ".join(getattr(module, attribute)
+                                                             for module, attribute, _ in self._saved))
+        return self
+
+    def __exit__(self, *exc):
+        for module, attribute, value in reversed(self._saved):
+            setattr(module, attribute, value)
+        self._saved.clear()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers.clear()
+        return False
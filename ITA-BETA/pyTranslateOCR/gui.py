@@ -3,24 +3,28 @@ import sys
 import os
 import json
 import time
-import subprocess
 from PyQt5.QtCore import Qt, QRect, QTimer, QPoint, QSize, QMetaObject, Q_ARG
 from PyQt5.QtGui import QColor, QPen, QFont
-from PyQt5.QtWidgets import (QMainWindow, QPushButton, QTextEdit, QVBoxLayout, QWidget, QComboBox, QCheckBox, QLabel, QHBoxLayout, QDialog, QLineEdit, QDialogButtonBox, QSlider, QApplication)
+from PyQt5.QtWidgets import (QMainWindow, QPushButton, QTextEdit, QVBoxLayout, QWidget, QComboBox, QCheckBox, QLabel, QHBoxLayout, QDialog, QLineEdit, QDialogButtonBox, QSlider, QApplication, QInputDialog)
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import QShortcut
-from ocr.ocr import perform_ocr
-from translation.translate import translate_text
-from tts import tts_output, stop_tts
+from tts import stop_tts
+from pipeline import PipelineManager, PipelineJob, change_detector, save_last_capture
+from areas import load_areas, save_area, clear_areas
+from ocr.change_detect import load_watch_settings
 from keyboard_listener import KeyboardListener
-from ini_controll import save_preferences, load_preferences
-from settings import AdvancedSettingsDialog, TTSSettingsWindow
-from translation.locally import get_locally_languages
+from selection import SelectionView
+from ini_controll import save_preferences, load_preferences, load_window_settings
+from settings import AdvancedSettingsDialog, TTSSettingsWindow, DiagnosticsDialog
+from metrics import get_metrics
+from translation.locally import get_locally_languages, shutdown_locally_workers
 from ocr.umi import get_umi_languages
-from language_utils import get_tesseract_languages
+from language_utils import get_tesseract_languages, get_translation_languages
 from PyQt5.QtCore import QEventLoop
 import configparser
-from ocr.tesseract import map_to_tesseract_language
+from ocr.tesseract import map_to_tesseract_language, close_tesseract_apis
+from transport import close_transport
+from ocr.capture import close_capture
 from ini_controll import get_ocr_languages
 
 # logging.basicConfig(level=logging.DEBUG)
@@ -121,14 +125,30 @@ class OCRApp(QMainWindow):
         self.overlay_open = False
         self.config = configparser.ConfigParser()
         self.config.read('ocrqt.ini')
+        # Rettangolo dell'overlay associato a ogni area, aggiornato al momento della richiesta
+        self.overlay_rects = {}
+        # Aree con nome: ultimi risultati e sovrimpressioni (non bloccanti) per area
+        self.multi_results = {}
+        self.area_overlays = {}
+        self.pipeline = PipelineManager(self)
+        self.pipeline.signals.progress.connect(self.on_job_progress)
+        self.pipeline.signals.ocr_done.connect(self.on_ocr_done)
+        self.pipeline.signals.translation_done.connect(self.on_translation_done)
+        self.pipeline.signals.failed.connect(self.on_job_failed)
+        # Modalità "Osserva": cattura periodica dell'area fissa
+        self.watch_timer = QTimer(self)
+        self.watch_timer.timeout.connect(self.watch_tick)
         self.init_ui()
+        # Finestra di selezione pronta (nascosta) per mostrarla senza ritardi
+        self.selection_view = SelectionView()
         try:
             self.keyboard_listener = KeyboardListener(
                 self.shortcuts,
                 self.perform_ocr_temp,
                 self.perform_fixed_ocr,
                 self.set_fixed_area,
-                lambda: self.overlay_open
+                lambda: self.overlay_open,
+                ocr_multi_callback=self.perform_multi_ocr
             )
             self.keyboard_listener.start()
             logging.info(f"Keyboard listener avviato con scorciatoie: {self.shortcuts}")
@@ -161,6 +181,18 @@ class OCRApp(QMainWindow):
         due_layout.addWidget(self.overlay_checkbox)
         self.unique_text_checkbox = QCheckBox("Testo Unico")
         due_layout.addWidget(self.unique_text_checkbox)
+        self.reuse_area_checkbox = QCheckBox("Riusa ultima area")
+        self.reuse_area_checkbox.setToolTip("OCR Momentaneo: usa l'ultima area selezionata senza riselezionarla")
+        due_layout.addWidget(self.reuse_area_checkbox)
+        self.incremental_checkbox = QCheckBox("Incrementale")
+        self.incremental_checkbox.setToolTip("OCR Fisso: ritraduce solo le frasi cambiate rispetto alla cattura precedente")
+        self.incremental_checkbox.setChecked(load_window_settings()['incremental'])
+        due_layout.addWidget(self.incremental_checkbox)
+        self.watch_checkbox = QCheckBox("Osserva")
+        self.watch_checkbox.setToolTip("Cattura l'area fissa a intervalli e traduce solo quando cambia "
+                                       "(risultati nella finestra, senza sovrimpressione)")
+        self.watch_checkbox.stateChanged.connect(self.toggle_watch)
+        due_layout.addWidget(self.watch_checkbox)
         layout.addLayout(due_layout)
         tre_layout = QHBoxLayout()
         self.tts_checkbox = QCheckBox("TTS")
@@ -182,6 +214,10 @@ class OCRApp(QMainWindow):
         self.settings_button = QPushButton("Impostazioni")
         self.settings_button.clicked.connect(self.open_advanced_settings)
         layout.addWidget(self.settings_button)
+        self.diagnostics_button = QPushButton("Diagnostica")
+        self.diagnostics_button.setToolTip("Tempi delle fasi (cattura, OCR, traduzione, TTS, overlay)")
+        self.diagnostics_button.clicked.connect(self.show_diagnostics)
+        layout.addWidget(self.diagnostics_button)
         self.info_button = QPushButton("Info")
         self.info_button.clicked.connect(self.show_info)
         layout.addWidget(self.info_button)
@@ -201,6 +237,9 @@ class OCRApp(QMainWindow):
             # Set Fixed Area
             shortcut_set_fixed = QShortcut(QKeySequence(self.shortcuts.get('ocr_set_fixed', '<alt>+s')), self)
             shortcut_set_fixed.activated.connect(self.set_fixed_area)
+            # OCR Aree multiple
+            shortcut_multi = QShortcut(QKeySequence(self.shortcuts.get('ocr_multi', '<alt>+m')), self)
+            shortcut_multi.activated.connect(self.perform_multi_ocr)
             logging.info(f"Qt shortcuts configured: {self.shortcuts}")
         except Exception as e:
             logging.error(f"Error setting up Qt shortcuts: {e}")
@@ -210,7 +249,8 @@ class OCRApp(QMainWindow):
                 self.perform_ocr_temp,
                 self.perform_fixed_ocr,
                 self.set_fixed_area,
-                lambda: self.overlay_open
+                lambda: self.overlay_open,
+                ocr_multi_callback=self.perform_multi_ocr
             )
             self.keyboard_listener.start()
 
@@ -232,12 +272,9 @@ class OCRApp(QMainWindow):
                 except Exception as e:
                     logging.error(f"Errore nel recupero delle lingue di Locally: {e}")
                     translate_langs = ['en']
-            elif self.translate_engine == 'Google':
-                    translate_langs = get_google_languages()
-            elif self.translate_engine == 'LibreTranslate':
-                    translate_langs = get_libre_languages()
-            elif self.translate_engine == 'NLLB':
-                    translate_langs = get_nllb_languages()
+            elif self.translate_engine in ('Google', 'LibreTranslate', 'NLLB'):
+                # Liste statiche: non serve importare il modulo del motore
+                translate_langs = get_translation_languages(self.translate_engine)
             else:
                 translate_langs = ['en']
             self.config['Translate_Languages'][self.translate_engine] = ','.join(translate_langs)
@@ -282,21 +319,97 @@ class OCRApp(QMainWindow):
         self.set_fixed_button = QPushButton("Imposta Area Fissa")
         self.set_fixed_button.clicked.connect(self.set_fixed_area)
         layout.addWidget(self.set_fixed_button)
+        areas_layout = QHBoxLayout()
+        self.multi_ocr_button = QPushButton("OCR Aree")
+        self.multi_ocr_button.clicked.connect(self.perform_multi_ocr)
+        areas_layout.addWidget(self.multi_ocr_button)
+        self.add_area_button = QPushButton("Aggiungi Area")
+        self.add_area_button.clicked.connect(self.add_named_area)
+        areas_layout.addWidget(self.add_area_button)
+        self.clear_areas_button = QPushButton("Svuota Aree")
+        self.clear_areas_button.clicked.connect(self.clear_named_areas)
+        areas_layout.addWidget(self.clear_areas_button)
+        layout.addLayout(areas_layout)
 
     def ri_traduci(self):
         try:
             self.close_overlay()
             ocr_text = self.ocr_text_area.toPlainText()
-            translated_text = translate_text(self.translate_engine, ocr_text,
-                                            self.source_lang_combo.currentText(),
-                                            self.target_lang_combo.currentText(),
-                                            self.unique_text_checkbox.isChecked(),
-                                            self.translate_locally_path)
-            self.translated_text_area.setPlainText(translated_text)
-            logging.info("Ri-traduzione completata")
+            params = self._job_params(self.source_lang_combo.currentText())
+            params.update(use_memory=False, tts_enabled=False)
+            self.overlay_rects.pop('ri_traduci', None)
+            self.pipeline.submit(PipelineJob('ri_traduci', None, params, text=ocr_text))
+            logging.info("Ri-traduzione avviata")
         except Exception as e:
             logging.error(f"Errore in ri_traduci: {e}")
 
+    def _job_params(self, selected_lang, incremental=False):
+        """
+        Legge dai widget le impostazioni di un job (solo dal thread della GUI).
+        Args:
+            selected_lang: Lingua di origine selezionata (senza asterisco).
+            incremental: Usa la ritraduzione incrementale per l'area.
+        Returns:
+            dict: Parametri per PipelineJob.
+        """
+        selected_lang = selected_lang.lstrip('*')
+        ocr_lang = map_to_tesseract_language(selected_lang) if self.ocr_engine.lower() == 'tesseract' else selected_lang
+        return {
+            'ocr_engine': self.ocr_engine,
+            'umi_ocr_path': self.umi_ocr_path,
+            'tesseract_path': self.tesseract_path,
+            'ocr_lang': ocr_lang,
+            'enhance_image': self.enhance_img_checkbox.isChecked(),
+            'contrast': self.contrast,
+            'sharpness': self.sharpness,
+            'invert': self.invert,
+            'translate_engine': self.translate_engine,
+            'source_lang': selected_lang,
+            'target_lang': self.target_lang_combo.currentText(),
+            'unique_text': self.unique_text_checkbox.isChecked(),
+            'translate_locally_path': self.translate_locally_path,
+            'incremental': incremental,
+            'use_memory': True,
+            'tts_enabled': self.tts_enabled,
+            'tts_rate': self.tts_rate,
+            'tts_voice': self.tts_voice,
+        }
+
+    def on_job_progress(self, job_id, area_key, stage):
+        if self.pipeline.is_current(job_id, area_key):
+            self.statusBar().showMessage(f"{stage}...")
+
+    def on_ocr_done(self, job_id, area_key, ocr_text):
+        if not self.pipeline.is_current(job_id, area_key):
+            return
+        if area_key.startswith('area:'):
+            self.multi_results.setdefault(area_key, {})['ocr'] = ocr_text
+            self.ocr_text_area.setPlainText(self._join_multi_results('ocr'))
+        else:
+            self.ocr_text_area.setPlainText(ocr_text)
+
+    def on_translation_done(self, job_id, area_key, translated_text):
+        if not self.pipeline.is_current(job_id, area_key):
+            logging.debug(f"Risultato del job {job_id} ({area_key}) scartato: superato")
+            return
+        if area_key.startswith('area:'):
+            self.multi_results.setdefault(area_key, {})['translation'] = translated_text
+            self.translated_text_area.setPlainText(self._join_multi_results('translation'))
+            overlay_rect = self.overlay_rects.pop(area_key, None)
+            if overlay_rect is not None:
+                self.show_area_overlay(area_key, overlay_rect, translated_text)
+            return
+        self.translated_text_area.setPlainText(translated_text)
+        self.statusBar().showMessage("Traduzione completata", 3000)
+        overlay_rect = self.overlay_rects.pop(area_key, None)
+        if overlay_rect is not None:
+            self.display_overlay_window(overlay_rect, translated_text)
+
+    def on_job_failed(self, job_id, area_key, error):
+        # job_id 0: errore della cattura comune alle aree multiple
+        if job_id == 0 or self.pipeline.is_current(job_id, area_key):
+            self.statusBar().showMessage(f"Errore: {error}", 5000)
+
     def open_img_settings(self):
         try:
             self.close_overlay()
@@ -314,7 +427,8 @@ class OCRApp(QMainWindow):
                     self.umi_ocr_path, self.tesseract_path, self.source_lang_combo.currentText(),
                     self.target_lang_combo.currentText(), self.ocr_engine, self.translate_engine,
                     self.translate_locally_path, self.shortcuts, self.fixed_area, self.area_temp,
-                    self.tts_voice, self.tts_rate, self.contrast, self.sharpness, self.invert
+                    self.tts_voice, self.tts_rate, self.contrast, self.sharpness, self.invert,
+                    incremental=self.incremental_checkbox.isChecked()
                 )
                 logging.info("Impostazioni immagine salvate")
         except Exception as e:
@@ -323,103 +437,208 @@ class OCRApp(QMainWindow):
     def perform_ocr_temp(self):
         try:
             logging.info("Avvio OCR temporaneo")
-            self.set_area_temp()
+            # Riusa l'ultima area selezionata senza mostrare la finestra di selezione
+            if not (self.reuse_area_checkbox.isChecked() and self.area_temp != [0, 0, 0, 0]):
+                self.set_area_temp()
             if self.area_temp != [0, 0, 0, 0]:
-                selected_lang = self.source_lang_combo.currentText().lstrip('*')
-                ocr_lang = map_to_tesseract_language(selected_lang) if self.ocr_engine.lower() == 'tesseract' else selected_lang
-                ocr_text = perform_ocr(self.ocr_engine, self.umi_ocr_path, self.tesseract_path,
-                                       self.area_temp, ocr_lang,
-                                       self.enhance_img_checkbox.isChecked(),
-                                       self.contrast, self.sharpness, self.invert)
-                if not ocr_text:
-                    logging.warning("Nessun testo estratto dall'OCR")
-                QMetaObject.invokeMethod(self.ocr_text_area, "setPlainText",
-                                        Qt.QueuedConnection, Q_ARG(str, ocr_text))
-                translated_text = translate_text(self.translate_engine, ocr_text,
-                                                selected_lang, self.target_lang_combo.currentText(),
-                                                self.unique_text_checkbox.isChecked(),
-                                                self.translate_locally_path)
-                QMetaObject.invokeMethod(self.translated_text_area, "setPlainText",
-                                        Qt.QueuedConnection, Q_ARG(str, translated_text))
-                if self.tts_enabled and translated_text.strip():
-                    tts_output(translated_text, self.tts_rate, self.tts_voice)
-                if self.overlay_checkbox.isChecked():
-                    self.display_overlay_window(QRect(*self.area_temp), translated_text)
+                params = self._job_params(self.source_lang_combo.currentText())
+                self._set_overlay_rect('area_temp', self.area_temp)
+                self.pipeline.submit(PipelineJob('area_temp', self.area_temp, params))
         except Exception as e:
             logging.error(f"Errore nell'OCR temporaneo: {e}", exc_info=True)
 
     def set_area_temp(self):
+        area = self.select_area('area_temp')
+        if area is not None:
+            self.area_temp = area
+            logging.info(f"Area temporanea selezionata: {self.area_temp}")
+            self.save_current_preferences()
+
+    def select_area(self, section):
+        """
+        Mostra la finestra di selezione (creata all'avvio e riutilizzata) e attende l'area.
+        Args:
+            section: 'area_temp' o 'fixed_area'.
+        Returns:
+            list: Area [left, top, width, height] oppure None se la selezione è annullata.
+        """
+        if self.overlay_open:
+            logging.warning("Overlay già aperto, ignorata richiesta")
+            return None
+        result = {}
+        loop = QEventLoop()
+
+        def on_selected(selected_section, area):
+            result['area'] = area
+            loop.quit()
+
+        self.overlay_open = True
+        self.setDisabled(True)
+        self.selection_view.area_selected.connect(on_selected)
+        self.selection_view.selection_cancelled.connect(loop.quit)
         try:
-            if not self.overlay_open:
-                self.overlay_open = True
-                logging.info("Avvio overlay per OCR temporaneo")
-                self.setDisabled(True)
-                ini_file = "ocrqt.ini"
-                cmd = [sys.executable, "selection.py", "--ini", ini_file, "--section", "area_temp"]
-                logging.debug(f"Esecuzione comando: {cmd}")
-                process = subprocess.Popen(cmd)
-                timeout = 30
-                start_time = time.time()
-                initial_mtime = os.path.getmtime(ini_file) if os.path.exists(ini_file) else 0
-                while time.time() - start_time < timeout:
-                    if os.path.exists(ini_file):
-                        current_mtime = os.path.getmtime(ini_file)
-                        if current_mtime > initial_mtime:
-                            break
-                    time.sleep(0.1)
-                    QApplication.processEvents()
-                if process.poll() is None:
-                    process.terminate()
-                    try:
-                        process.wait(timeout=1.0)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                        logging.warning("Processo di selezione terminato forzatamente")
-                preferences = load_preferences(QApplication.instance())
-                if preferences:
-                    self.umi_ocr_path, self.tesseract_path, self.source_lang, self.target_lang, \
-                    self.ocr_engine, self.translate_engine, self.translate_locally_path, \
-                    self.shortcuts, self.fixed_area, self.area_temp, self.tts_voice, \
-                    self.tts_rate, self.contrast, self.sharpness, self.invert = preferences
-                    logging.info(f"Area temporanea letta: {self.area_temp}")
-                else:
-                    logging.error("Impossibile ricaricare le preferenze, area non aggiornata")
-                    self.area_temp = [0, 0, 0, 0]
-            else:
-                logging.warning("Overlay già aperto, ignorata richiesta")
+            logging.info(f"Avvio selezione area: {section}")
+            self.selection_view.start(section)
+            loop.exec_()
         except Exception as e:
-            logging.error(f"Errore nell'apertura dell'overlay per OCR temporaneo: {e}", exc_info=True)
+            logging.error(f"Errore nella selezione dell'area {section}: {e}", exc_info=True)
         finally:
+            self.selection_view.area_selected.disconnect(on_selected)
+            self.selection_view.selection_cancelled.disconnect(loop.quit)
             self.overlay_open = False
             self.setEnabled(True)
-            logging.debug("overlay_open resettato in set_area_temp")
+            logging.debug(f"overlay_open resettato dopo la selezione di {section}")
+        return result.get('area')
+
+    def save_current_preferences(self):
+        save_preferences(
+            self.umi_ocr_path, self.tesseract_path, self.source_lang_combo.currentText(),
+            self.target_lang_combo.currentText(), self.ocr_engine, self.translate_engine,
+            self.translate_locally_path, self.shortcuts, self.fixed_area, self.area_temp,
+            self.tts_voice, self.tts_rate, self.contrast, self.sharpness, self.invert,
+            incremental=self.incremental_checkbox.isChecked()
+        )
 
     def perform_fixed_ocr(self):
         try:
             if self.fixed_area == [0, 0, 0, 0]:
                 self.set_fixed_area()
             if self.fixed_area != [0, 0, 0, 0]:
-                selected_lang = self.source_lang_combo.currentText().lstrip('*')
-                ocr_lang = map_to_tesseract_language(selected_lang) if self.ocr_engine.lower() == 'tesseract' else selected_lang
-                ocr_text = perform_ocr(self.ocr_engine, self.umi_ocr_path, self.tesseract_path,
-                                       self.fixed_area, ocr_lang,
-                                       self.enhance_img_checkbox.isChecked(),
-                                       self.contrast, self.sharpness, self.invert)
-                QMetaObject.invokeMethod(self.ocr_text_area, "setPlainText",
-                                        Qt.QueuedConnection, Q_ARG(str, ocr_text))
-                translated_text = translate_text(self.translate_engine, ocr_text,
-                                                selected_lang, self.target_lang_combo.currentText(),
-                                                self.unique_text_checkbox.isChecked(),
-                                                self.translate_locally_path)
-                QMetaObject.invokeMethod(self.translated_text_area, "setPlainText",
-                                        Qt.QueuedConnection, Q_ARG(str, translated_text))
-                if self.tts_enabled and translated_text.strip():
-                    tts_output(translated_text, self.tts_rate, self.tts_voice)
-                if self.overlay_checkbox.isChecked():
-                    self.display_overlay_window(QRect(*self.fixed_area), translated_text)
+                params = self._job_params(self.source_lang_combo.currentText(),
+                                          incremental=self.incremental_checkbox.isChecked())
+                self._set_overlay_rect('fixed_area', self.fixed_area)
+                self.pipeline.submit(PipelineJob('fixed_area', self.fixed_area, params))
         except Exception as e:
             logging.error(f"Errore nell'OCR fisso: {e}")
 
+    def perform_multi_ocr(self):
+        """
+        OCR e traduzione di tutte le aree con nome: una sola cattura, un job per area.
+        """
+        try:
+            areas = load_areas()
+            if not areas:
+                self.statusBar().showMessage("Nessuna area definita: usa \"Aggiungi Area\"", 5000)
+                logging.warning("Nessuna area con nome in [Areas]")
+                return
+            params = self._job_params(self.source_lang_combo.currentText(),
+                                      incremental=self.incremental_checkbox.isChecked())
+            self.multi_results = {f"area:{name}": {} for name in areas}
+            for name, area in areas.items():
+                self._set_overlay_rect(f"area:{name}", area)
+            self.pipeline.submit_multi(areas, params)
+            logging.info(f"OCR di {len(areas)} aree avviato: {', '.join(areas)}")
+        except Exception as e:
+            logging.error(f"Errore nell'OCR delle aree multiple: {e}", exc_info=True)
+
+    def _join_multi_results(self, field):
+        parts = []
+        for area_key, result in self.multi_results.items():
+            if result.get(field):
+                parts.append(f"[{area_key[len('area:'):]}]\n{result[field]}")
+        return '\n\n'.join(parts)
+
+    def add_named_area(self):
+        try:
+            name, ok = QInputDialog.getText(self, "Aggiungi Area", "Nome dell'area (es. dialoghi):")
+            name = name.strip().lower()
+            if not ok or not name:
+                return
+            area = self.select_area(f"area:{name}")
+            if area is not None:
+                save_area(name, area)
+                self.statusBar().showMessage(f"Area '{name}' salvata", 3000)
+        except Exception as e:
+            logging.error(f"Errore nell'aggiunta dell'area: {e}", exc_info=True)
+
+    def clear_named_areas(self):
+        clear_areas()
+        self.close_area_overlays()
+        self.multi_results = {}
+        self.statusBar().showMessage("Aree rimosse", 3000)
+
+    def show_area_overlay(self, area_key, selected_area, translated_text):
+        """
+        Mostra (o aggiorna) la sovrimpressione di un'area con nome senza bloccare la finestra,
+        così che più aree possano essere visibili contemporaneamente.
+        """
+        try:
+            start = time.perf_counter()
+            overlay = self.area_overlays.get(area_key)
+            width = int(selected_area.width())
+            height = int(selected_area.height())
+            if overlay is None:
+                overlay = QWidget()
+                overlay.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+                overlay.background = QWidget(overlay)
+                overlay.background.setStyleSheet("background-color: #333333;")
+                overlay.text_edit = QTextEdit(overlay)
+                overlay.text_edit.setStyleSheet("color: white; background: transparent; border: none;")
+                overlay.text_edit.setReadOnly(True)
+                font = QFont()
+                font.setPointSize(12)
+                overlay.text_edit.setFont(font)
+                overlay.close_button = QPushButton("Chiudi", overlay)
+                overlay.close_button.setStyleSheet("background-color: rgba(255, 0, 0, 200); color: white;")
+                overlay.close_button.clicked.connect(overlay.close)
+                self.area_overlays[area_key] = overlay
+            overlay.setGeometry(int(selected_area.left()), int(selected_area.top()), width, height)
+            overlay.background.setGeometry(0, 0, width, height)
+            overlay.text_edit.setGeometry(10, 10, width - 20, height - 50)
+            overlay.close_button.move(width - 80, height - 30)
+            overlay.text_edit.setText(translated_text)
+            overlay.show()
+            overlay.raise_()
+            get_metrics().observe('overlay', (time.perf_counter() - start) * 1000, chars=len(translated_text))
+        except Exception as e:
+            logging.error(f"Errore nella sovrimpressione dell'area {area_key}: {e}", exc_info=True)
+
+    def close_area_overlays(self):
+        for overlay in self.area_overlays.values():
+            overlay.close()
+            overlay.deleteLater()
+        self.area_overlays = {}
+
+    def toggle_watch(self, state):
+        if state == Qt.Checked:
+            if self.fixed_area == [0, 0, 0, 0]:
+                self.set_fixed_area()
+            if self.fixed_area == [0, 0, 0, 0]:
+                logging.warning("Area fissa non impostata, modalità Osserva non avviata")
+                self.watch_checkbox.setChecked(False)
+                return
+            interval = load_watch_settings()['interval_ms']
+            change_detector.reset('fixed_area')
+            self.watch_timer.start(interval)
+            logging.info(f"Modalità Osserva avviata (intervallo {interval} ms)")
+        else:
+            self.watch_timer.stop()
+            self.statusBar().clearMessage()
+            logging.info("Modalità Osserva fermata")
+
+    def watch_tick(self):
+        # Salta il giro se la cattura precedente è ancora in elaborazione, se si sta selezionando
+        # un'area o se la sovrimpressione copre l'area (verrebbe catturata la traduzione stessa)
+        if (self.fixed_area == [0, 0, 0, 0] or self.pipeline.is_busy('fixed_area')
+                or not self.isEnabled() or self.overlay_open):
+            return
+        try:
+            params = self._job_params(self.source_lang_combo.currentText(),
+                                      incremental=self.incremental_checkbox.isChecked())
+            # La sovrimpressione coprirebbe l'area osservata e fermerebbe le catture:
+            # "Osserva" aggiorna solo i riquadri di testo della finestra
+            self.overlay_rects.pop('fixed_area', None)
+            self.pipeline.submit(PipelineJob('fixed_area', self.fixed_area, params, watch=True))
+        except Exception as e:
+            logging.error(f"Errore nella modalità Osserva: {e}")
+
+    def _set_overlay_rect(self, area_key, area):
+        # L'overlay viene mostrato a traduzione completata, solo se richiesto al momento della cattura
+        if self.overlay_checkbox.isChecked():
+            self.overlay_rects[area_key] = QRect(*area)
+        else:
+            self.overlay_rects.pop(area_key, None)
+
     def toggle_tts(self, state):
         self.tts_enabled = state == Qt.Checked
         logging.debug(f"TTS {'abilitato' if self.tts_enabled else 'disabilitato'}")
@@ -429,6 +648,7 @@ class OCRApp(QMainWindow):
             logging.debug("Overlay non aperto: checkbox disattivata o overlay già aperto")
             return
         try:
+            start = time.perf_counter()
             self.overlay_window = QWidget()
             self.overlay_window.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
             left = int(selected_area.left())
@@ -455,6 +675,7 @@ class OCRApp(QMainWindow):
             close_button.clicked.connect(self.overlay_window.close)
             self.overlay_window.show()
             self.overlay_window.raise_()
+            get_metrics().observe('overlay', (time.perf_counter() - start) * 1000, chars=len(translated_text))
             self.overlay_open = True
             logging.info("Overlay finestra aperto")
             self.overlay_timer = QTimer(self)
@@ -515,13 +736,21 @@ class OCRApp(QMainWindow):
                         self.perform_ocr_temp,
                         self.perform_fixed_ocr,
                         self.set_fixed_area,
-                        lambda: self.overlay_open
+                        lambda: self.overlay_open,
+                        ocr_multi_callback=self.perform_multi_ocr
                     )
                     self.keyboard_listener.start()
                     logging.info(f"Impostazioni avanzate applicate: ocr_engine={self.ocr_engine}, translate_engine={self.translate_engine}, shortcuts={self.shortcuts}")
         except Exception as e:
             logging.error(f"Errore nell'apertura delle impostazioni avanzate: {e}")
 
+    def show_diagnostics(self):
+        try:
+            dialog = DiagnosticsDialog(self)
+            dialog.exec_()
+        except Exception as e:
+            logging.error(f"Errore nell'apertura della diagnostica: {e}", exc_info=True)
+
     def show_info(self):
         try:
             info_dialog = InfoDialog()
@@ -540,56 +769,18 @@ class OCRApp(QMainWindow):
                     self.umi_ocr_path, self.tesseract_path, self.source_lang_combo.currentText(),
                     self.target_lang_combo.currentText(), self.ocr_engine, self.translate_engine,
                     self.translate_locally_path, self.shortcuts, self.fixed_area, self.area_temp,
-                    self.tts_voice, self.tts_rate, self.contrast, self.sharpness, self.invert
+                    self.tts_voice, self.tts_rate, self.contrast, self.sharpness, self.invert,
+                    incremental=self.incremental_checkbox.isChecked()
                 )
         except Exception as e:
             logging.error(f"Errore nell'apertura delle impostazioni TTS: {e}", exc_info=True)
 
     def set_fixed_area(self):
-        try:
-            if not self.overlay_open:
-                self.overlay_open = True
-                logging.info("Avvio overlay per area fissa")
-                self.setDisabled(True)
-                ini_file = "ocrqt.ini"
-                cmd = [sys.executable, "selection.py", "--ini", ini_file, "--section", "fixed_area"]
-                logging.debug(f"Esecuzione comando: {cmd}")
-                process = subprocess.Popen(cmd)
-                timeout = 30
-                start_time = time.time()
-                initial_mtime = os.path.getmtime(ini_file) if os.path.exists(ini_file) else 0
-                while time.time() - start_time < timeout:
-                    if os.path.exists(ini_file):
-                        current_mtime = os.path.getmtime(ini_file)
-                        if current_mtime > initial_mtime:
-                            break
-                    time.sleep(0.1)
-                    QApplication.processEvents()
-                if process.poll() is None:
-                    process.terminate()
-                    try:
-                        process.wait(timeout=1.0)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                        logging.warning("Processo di selezione terminato forzatamente")
-                preferences = load_preferences(QApplication.instance())
-                if preferences:
-                    self.umi_ocr_path, self.tesseract_path, self.source_lang, self.target_lang, \
-                    self.ocr_engine, self.translate_engine, self.translate_locally_path, \
-                    self.shortcuts, self.fixed_area, self.area_temp, self.tts_voice, \
-                    self.tts_rate, self.contrast, self.sharpness, self.invert = preferences
-                    logging.info(f"Area fissa letta: {self.fixed_area}")
-                else:
-                    logging.error("Impossibile ricaricare le preferenze, area non aggiornata")
-                    self.fixed_area = [0, 0, 0, 0]
-            else:
-                logging.warning("Overlay già aperto, ignorata richiesta")
-        except Exception as e:
-            logging.error(f"Errore nell'apertura dell'overlay per area fissa: {e}", exc_info=True)
-        finally:
-            self.overlay_open = False
-            self.setEnabled(True)
-            logging.debug("overlay_open resettato in set_fixed_area")
+        area = self.select_area('fixed_area')
+        if area is not None:
+            self.fixed_area = area
+            logging.info(f"Area fissa selezionata: {self.fixed_area}")
+            self.save_current_preferences()
 
     def closeEvent(self, event):
         import time
@@ -608,18 +799,28 @@ class OCRApp(QMainWindow):
                     logging.warning("KeyboardListener non terminato completamente")
                 else:
                     logging.debug(f"KeyboardListener terminato: {time.time() - start_time:.2f}s")
+            self.watch_timer.stop()
+            self.pipeline.shutdown()
+            save_last_capture()
+            logging.debug(f"Pipeline fermata: {time.time() - start_time:.2f}s")
             stop_tts()
             logging.debug(f"Motore TTS fermato: {time.time() - start_time:.2f}s")
+            close_tesseract_apis()
+            close_transport()
+            close_capture()
             save_preferences(
                 self.umi_ocr_path, self.tesseract_path, self.source_lang_combo.currentText(),
                 self.target_lang_combo.currentText(), self.ocr_engine, self.translate_engine,
                 self.translate_locally_path, self.shortcuts, self.fixed_area, self.area_temp,
-                self.tts_voice, self.tts_rate, self.contrast, self.sharpness, self.invert
+                self.tts_voice, self.tts_rate, self.contrast, self.sharpness, self.invert,
+                incremental=self.incremental_checkbox.isChecked()
             )
             logging.debug(f"Preferenze salvate: {time.time() - start_time:.2f}s")
+            self.selection_view.close()
+            self.selection_view.deleteLater()
+            self.close_area_overlays()
             logging.debug("Inizio terminazione processi")
-            subprocess.run(["pkill", "-9", "-f", "selection.py"], check=False)
-            subprocess.run(["pkill", "-9", "-f", "translateLocally"], check=False)
+            shutdown_locally_workers()
             logging.debug(f"Fine terminazione processi: {time.time() - start_time:.2f}s")
             QApplication.processEvents()
             logging.debug(f"ProcessEvents completato: {time.time() - start_time:.2f}s")
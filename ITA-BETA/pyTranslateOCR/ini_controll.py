@@ -1,9 +1,8 @@
 import configparser
-import subprocess
 import logging
 import os
 from typing import List
-from language_utils import get_ocr_languages as get_langs
+from language_utils import get_raw_tesseract_languages
 from PyQt5.QtWidgets import QApplication
 
 def get_default_preferences():
@@ -18,7 +17,8 @@ def get_default_preferences():
         'shortcuts': {
             'ocr_temp': '<alt>+c',
             'ocr_fixed': '<alt>+f',
-            'ocr_set_fixed': '<alt>+s'
+            'ocr_set_fixed': '<alt>+s',
+            'ocr_multi': '<alt>+m'
         },
         'fixed_area': [0, 0, 0, 0],
         'area_temp': [0, 0, 0, 0],
@@ -26,7 +26,8 @@ def get_default_preferences():
         'tts_rate': 150,
         'contrast': 1.0,
         'sharpness': 1,
-        'invert': False
+        'invert': False,
+        'incremental': False
     }
 
 def load_preferences(app: QApplication):
@@ -53,7 +54,8 @@ def load_preferences(app: QApplication):
         shortcuts = {
             'ocr_temp': config['Settings'].get('ocr_shortcut_temp', defaults['shortcuts']['ocr_temp']).replace('alt+', '<alt>+'),
             'ocr_fixed': config['Settings'].get('ocr_shortcut_fixed', defaults['shortcuts']['ocr_fixed']).replace('alt+', '<alt>+'),
-            'ocr_set_fixed': config['Settings'].get('ocr_set_fixed', defaults['shortcuts']['ocr_set_fixed']).replace('alt+', '<alt>+')
+            'ocr_set_fixed': config['Settings'].get('ocr_set_fixed', defaults['shortcuts']['ocr_set_fixed']).replace('alt+', '<alt>+'),
+            'ocr_multi': config['Settings'].get('ocr_shortcut_multi', defaults['shortcuts']['ocr_multi']).replace('alt+', '<alt>+')
         }
         try:
             fixed_area = eval(config['Settings'].get('fixed_area', str(defaults['fixed_area'])))
@@ -102,6 +104,54 @@ def load_preferences(app: QApplication):
         logging.info("ocrqt.ini non trovato, creando preferenze predefinite")
         return create_default_preferences(app)
 
+def load_engine_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge da ocrqt.ini le sole impostazioni dei motori OCR e di traduzione, senza Qt.
+    Usata dagli strumenti senza interfaccia (es. batch.py).
+    Returns:
+        dict: umi_ocr_path, tesseract_path, source_lang, target_lang, ocr_engine,
+              translate_engine, translate_locally_path, contrast, sharpness e invert.
+    """
+    defaults = get_default_preferences()
+    settings = {key: defaults[key] for key in ('umi_ocr_path', 'tesseract_path', 'source_lang', 'target_lang',
+                                               'ocr_engine', 'translate_engine', 'translate_locally_path',
+                                               'contrast', 'sharpness', 'invert')}
+    config = configparser.ConfigParser()
+    if not os.path.isfile(ini_file):
+        return settings
+    config.read(ini_file)
+    if 'Settings' not in config:
+        return settings
+    for key in ('umi_ocr_path', 'tesseract_path', 'source_lang', 'target_lang', 'ocr_engine',
+                'translate_engine', 'translate_locally_path'):
+        settings[key] = config['Settings'].get(key, settings[key])
+    try:
+        settings['contrast'] = config.getfloat('Settings', 'imgMod_con', fallback=defaults['contrast'])
+        settings['sharpness'] = config.getint('Settings', 'imgMod_nit', fallback=defaults['sharpness'])
+        settings['invert'] = config.getboolean('Settings', 'imgMod_in', fallback=defaults['invert'])
+    except ValueError as e:
+        logging.error(f"Errore nelle impostazioni immagine: {e}, usando valori predefiniti")
+    return settings
+
+def load_window_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge da ocrqt.ini lo stato delle caselle della finestra principale non comprese nelle
+    preferenze (es. "Incrementale").
+    Returns:
+        dict: incremental.
+    """
+    defaults = get_default_preferences()
+    settings = {'incremental': defaults['incremental']}
+    config = configparser.ConfigParser()
+    if not os.path.isfile(ini_file):
+        return settings
+    config.read(ini_file)
+    try:
+        settings['incremental'] = config.getboolean('Settings', 'ocr_incremental', fallback=defaults['incremental'])
+    except ValueError as e:
+        logging.error(f"Errore in ocr_incremental: {e}, usando valore predefinito")
+    return settings
+
 def create_default_preferences(app: QApplication):
     """
     Crea preferenze predefinite e salva in ocrqt.ini.
@@ -119,6 +169,7 @@ def create_default_preferences(app: QApplication):
     config['Settings']['ocr_shortcut_temp'] = defaults['shortcuts']['ocr_temp']
     config['Settings']['ocr_shortcut_fixed'] = defaults['shortcuts']['ocr_fixed']
     config['Settings']['ocr_set_fixed'] = defaults['shortcuts']['ocr_set_fixed']
+    config['Settings']['ocr_shortcut_multi'] = defaults['shortcuts']['ocr_multi']
     config['Settings']['fixed_area'] = str(defaults['fixed_area'])
     config['Settings']['area_temp'] = str(defaults['area_temp'])
     config['Settings']['tts_voice'] = defaults['tts_voice']
@@ -126,6 +177,7 @@ def create_default_preferences(app: QApplication):
     config['Settings']['imgMod_con'] = str(defaults['contrast'])
     config['Settings']['imgMod_nit'] = str(defaults['sharpness'])
     config['Settings']['imgMod_in'] = str(defaults['invert'])
+    config['Settings']['ocr_incremental'] = str(defaults['incremental'])
     
     # Aggiungi sezioni per le lingue
     config['OCR_Languages'] = {}
@@ -161,17 +213,10 @@ def get_langs(ocr_engine: str, tesseract_path: str = '') -> List[str]:
     """
     langs = []
     if ocr_engine.lower() == 'tesseract':
-        try:
-            tesseract_cmd = tesseract_path if tesseract_path and os.path.exists(tesseract_path) else 'tesseract'
-            # Use stdout and stderr instead of capture_output for Python 3.6 compatibility
-            result = subprocess.run([tesseract_cmd, '--list-langs'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            if result.returncode == 0:
-                langs = [lang.strip() for lang in result.stdout.splitlines()[1:] if lang.strip()]
-            else:
-                logging.error(f"Errore nell'esecuzione di Tesseract: {result.stderr}")
-                langs = ['eng']  # Fallback
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            logging.error(f"Errore nel recupero delle lingue di Tesseract: {e}")
+        tesseract_cmd = tesseract_path if tesseract_path and os.path.exists(tesseract_path) else 'tesseract'
+        # Letto dalla cache delle lingue: tesseract --list-langs viene eseguito solo se tessdata cambia
+        langs = get_raw_tesseract_languages(tesseract_cmd)
+        if langs is None:
             langs = ['eng']  # Fallback
     elif ocr_engine.lower() in ['umi-ocr', 'umi-ocr_server']:
         langs = ['jpn', 'eng', 'zho']  # Adatta in base a Umi-OCR
@@ -207,7 +252,8 @@ def save_preferences(
     tts_rate: int,
     contrast: float,
     sharpness: int,
-    invert: bool
+    invert: bool,
+    incremental: bool = False
 ):
     """
     Salva le preferenze in ocrqt.ini.
@@ -227,6 +273,7 @@ def save_preferences(
     config['Settings']['ocr_shortcut_temp'] = shortcuts.get('ocr_temp', '<alt>+c')
     config['Settings']['ocr_shortcut_fixed'] = shortcuts.get('ocr_fixed', '<alt>+f')
     config['Settings']['ocr_set_fixed'] = shortcuts.get('ocr_set_fixed', '<alt>+s')
+    config['Settings']['ocr_shortcut_multi'] = shortcuts.get('ocr_multi', '<alt>+m')
     config['Settings']['fixed_area'] = str(fixed_area)
     config['Settings']['area_temp'] = str(area_temp)
     config['Settings']['tts_voice'] = tts_voice
@@ -234,16 +281,17 @@ def save_preferences(
     config['Settings']['imgMod_con'] = str(contrast)
     config['Settings']['imgMod_nit'] = str(int(sharpness))
     config['Settings']['imgMod_in'] = str(invert)
+    config['Settings']['ocr_incremental'] = str(incremental)
     # Preserva o aggiorna [OCR_Languages]
     if 'OCR_Languages' not in config:
         config['OCR_Languages'] = {}
-    langs = get_langs(ocr_engine.lower())
+    langs = get_langs(ocr_engine.lower(), tesseract_path)
     config['OCR_Languages'][ocr_engine.lower()] = ','.join(langs)
     # Preserva o aggiorna [Translate_Languages]
     if 'Translate_Languages' not in config:
         config['Translate_Languages'] = {}
     from language_utils import get_translation_languages
-    langs = get_translation_languages(translate_engine.lower())
+    langs = get_translation_languages(translate_engine.lower(), translate_locally_path)
     config['Translate_Languages'][translate_engine] = ','.join([lang.lstrip('*') for lang in langs])
     # Salva il file
     with open('ocrqt.ini', 'w') as configfile:
@@ -18,9 +18,11 @@ class SignalEmitter(QObject):
     ocr_temp_signal = pyqtSignal()
     ocr_fixed_signal = pyqtSignal()
     set_fixed_signal = pyqtSignal()
+    ocr_multi_signal = pyqtSignal()
 
 class KeyboardListener(Thread):
-    def __init__(self, shortcuts, ocr_temp_callback, ocr_fixed_callback, set_fixed_callback, overlay_open_flag):
+    def __init__(self, shortcuts, ocr_temp_callback, ocr_fixed_callback, set_fixed_callback, overlay_open_flag,
+                 ocr_multi_callback=None):
         super().__init__()
         self.shortcuts = shortcuts
         self.overlay_open_flag = overlay_open_flag
@@ -34,6 +36,9 @@ class KeyboardListener(Thread):
         self.signal_emitter.ocr_temp_signal.connect(ocr_temp_callback)
         self.signal_emitter.ocr_fixed_signal.connect(ocr_fixed_callback)
         self.signal_emitter.set_fixed_signal.connect(set_fixed_callback)
+        self.has_multi = ocr_multi_callback is not None
+        if self.has_multi:
+            self.signal_emitter.ocr_multi_signal.connect(ocr_multi_callback)
         
         logging.debug(f"KeyboardListener inizializzato con scorciatoie: {self.shortcuts}")
 
@@ -50,6 +55,9 @@ class KeyboardListener(Thread):
                 self.shortcuts['ocr_fixed'].replace('<alt>+', 'alt+'): lambda: self.signal_emitter.ocr_fixed_signal.emit(),
                 self.shortcuts['ocr_set_fixed'].replace('<alt>+', 'alt+'): lambda: self.signal_emitter.set_fixed_signal.emit()
             }
+            if self.has_multi:
+                hotkeys[self.shortcuts.get('ocr_multi', '<alt>+m').replace('<alt>+', 'alt+')] = \
+                    lambda: self.signal_emitter.ocr_multi_signal.emit()
             for key, func in hotkeys.items():
                 keyboard.add_hotkey(key, func)
             keyboard.wait()
@@ -84,6 +92,9 @@ class KeyboardListener(Thread):
                         elif shortcut == self.shortcuts.get('ocr_set_fixed', '<alt>+s'):
                             logging.info("Esecuzione callback impostazione area fissa")
                             self.signal_emitter.set_fixed_signal.emit()
+                        elif self.has_multi and shortcut == self.shortcuts.get('ocr_multi', '<alt>+m'):
+                            logging.info("Esecuzione callback OCR aree multiple")
+                            self.signal_emitter.ocr_multi_signal.emit()
                 except Exception as e:
                     logging.error(f"Errore nella gestione della scorciatoia: {e}")
 
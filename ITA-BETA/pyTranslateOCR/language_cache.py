@@ -0,0 +1,193 @@
+import os
+import sys
+import glob
+import json
+import shutil
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+
+# Cache delle lingue installate (e dell'inventario dei modelli di translateLocally) per i
+# motori OCR/traduzione, in memoria e su disco.
+# Ogni voce è legata al percorso dell'eseguibile e viene invalidata solo quando cambia
+# l'mtime dell'eseguibile o delle cartelle dei dati (tessdata, modelli translateLocally).
+
+LANGUAGE_CACHE_FILE = 'ocrqt_langs.json'
+
+_cache = {}
+_cache_loaded = False
+_cache_lock = threading.Lock()
+# Un lock per voce: chi chiede una voce già in calcolo (es. dalla scoperta in background
+# all'avvio) attende quel risultato invece di interrogare di nuovo il motore
+_loader_locks = {}
+# Cartelle dati già individuate per ogni eseguibile (evita glob ripetuti)
+_watch_dirs = {}
+
+def resolve_binary(binary_path: str, default_name: str) -> str:
+    """
+    Restituisce il percorso assoluto dell'eseguibile, cercandolo nel PATH se necessario.
+    Args:
+        binary_path: Percorso configurato (può essere vuoto).
+        default_name: Nome dell'eseguibile da cercare nel PATH (es. 'tesseract').
+    Returns:
+        str: Percorso risolto o il valore originale se non trovato.
+    """
+    candidate = binary_path or default_name
+    if os.path.isfile(candidate):
+        return os.path.abspath(candidate)
+    return shutil.which(candidate) or candidate
+
+def get_tessdata_dirs(tesseract_bin: str) -> List[str]:
+    """
+    Restituisce le cartelle tessdata esistenti da sorvegliare.
+    Args:
+        tesseract_bin: Percorso risolto dell'eseguibile Tesseract.
+    Returns:
+        List[str]: Cartelle tessdata trovate.
+    """
+    key = ('tesseract', tesseract_bin)
+    if key in _watch_dirs:
+        return _watch_dirs[key]
+    candidates = []
+    prefix = os.environ.get('TESSDATA_PREFIX')
+    if prefix:
+        candidates += [prefix, os.path.join(prefix, 'tessdata')]
+    if tesseract_bin and os.path.isabs(tesseract_bin):
+        bin_dir = os.path.dirname(os.path.realpath(tesseract_bin))
+        candidates += [os.path.join(bin_dir, 'tessdata'),
+                       os.path.join(os.path.dirname(bin_dir), 'share', 'tessdata')]
+    candidates += glob.glob('/usr/share/tesseract-ocr/*/tessdata')
+    candidates += ['/usr/share/tessdata', '/usr/local/share/tessdata', '/opt/homebrew/share/tessdata']
+    dirs = []
+    for path in candidates:
+        if os.path.isdir(path) and os.path.realpath(path) not in dirs:
+            dirs.append(os.path.realpath(path))
+    _watch_dirs[key] = dirs
+    return dirs
+
+def get_locally_model_dirs() -> List[str]:
+    """
+    Restituisce le cartelle dei modelli di translateLocally esistenti da sorvegliare.
+    Returns:
+        List[str]: Cartelle dei modelli trovate.
+    """
+    key = ('locally', '')
+    if key in _watch_dirs:
+        return _watch_dirs[key]
+    if sys.platform == 'win32':
+        base = os.path.join(os.environ.get('LOCALAPPDATA', ''), 'translateLocally')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support/translateLocally')
+    else:
+        base = os.path.join(os.environ.get('XDG_DATA_HOME', os.path.expanduser('~/.local/share')),
+                            'translateLocally')
+    dirs = [path for path in (base, os.path.join(base, 'translateLocally')) if os.path.isdir(path)]
+    _watch_dirs[key] = dirs
+    return dirs
+
+def _fingerprint(paths: List[str]) -> List[list]:
+    fingerprint = []
+    for path in paths:
+        try:
+            fingerprint.append([path, os.path.getmtime(path)])
+        except OSError:
+            fingerprint.append([path, None])
+    return fingerprint
+
+def _load_cache_file():
+    global _cache_loaded
+    if _cache_loaded:
+        return
+    _cache_loaded = True
+    if not os.path.isfile(LANGUAGE_CACHE_FILE):
+        return
+    try:
+        with open(LANGUAGE_CACHE_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            _cache.update(data)
+            logging.debug(f"Cache lingue caricata da {LANGUAGE_CACHE_FILE}: {list(data)}")
+    except (OSError, ValueError) as e:
+        logging.warning(f"Cache lingue non leggibile, verrà ricreata: {e}")
+
+def _save_cache_file():
+    tmp_file = f"{LANGUAGE_CACHE_FILE}.tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(_cache, f, indent=1)
+        os.replace(tmp_file, LANGUAGE_CACHE_FILE)
+    except OSError as e:
+        logging.warning(f"Impossibile salvare la cache lingue: {e}")
+
+def get_cached_value(engine: str, binary_path: str, watch_paths: List[str],
+                     loader: Callable[[], Any], field: str = 'languages') -> Any:
+    """
+    Restituisce un dato di un motore (lingue, inventario dei modelli) dalla cache o lo
+    ricalcola con `loader` se la voce è assente o scaduta.
+    Args:
+        engine: Nome del motore (es. 'tesseract', 'locally').
+        binary_path: Percorso risolto dell'eseguibile del motore.
+        watch_paths: Cartelle dati il cui mtime invalida la voce.
+        loader: Funzione che interroga il motore; restituisce None in caso di errore
+                (il risultato non viene memorizzato). Il valore deve essere serializzabile in JSON.
+        field: Nome del dato nella voce della cache.
+    Returns:
+        Any: Valore (condiviso con la cache, da non modificare) o None se il loader fallisce.
+    """
+    key = f"{engine}|{binary_path}"
+    fingerprint = _fingerprint([binary_path] + list(watch_paths))
+    cached = _lookup(key, fingerprint, field)
+    if cached is not None:
+        return cached
+    with _cache_lock:
+        loader_lock = _loader_locks.setdefault(key, threading.Lock())
+    with loader_lock:
+        cached = _lookup(key, fingerprint, field)
+        if cached is not None:
+            return cached
+        logging.debug(f"Cache lingue non valida per {key} ({field}), interrogazione del motore")
+        value = loader()
+        if value is None:
+            return None
+        with _cache_lock:
+            _cache[key] = {'fingerprint': fingerprint, field: value}
+            _save_cache_file()
+    return value
+
+def _lookup(key: str, fingerprint: List[list], field: str) -> Any:
+    with _cache_lock:
+        _load_cache_file()
+        entry = _cache.get(key)
+        if entry and entry.get('fingerprint') == fingerprint:
+            return entry.get(field)
+    return None
+
+def get_cached_languages(engine: str, binary_path: str, watch_paths: List[str],
+                         loader: Callable[[], Optional[List[str]]]) -> Optional[List[str]]:
+    """
+    Restituisce le lingue dalla cache o le ricalcola con `loader` se la voce è assente o scaduta.
+    Args:
+        engine: Nome del motore (es. 'tesseract').
+        binary_path: Percorso risolto dell'eseguibile del motore.
+        watch_paths: Cartelle dati il cui mtime invalida la voce.
+        loader: Funzione che interroga il motore; restituisce None in caso di errore
+                (il risultato non viene memorizzato).
+    Returns:
+        Optional[List[str]]: Lista delle lingue o None se il loader fallisce.
+    """
+    languages = get_cached_value(engine, binary_path, watch_paths, loader)
+    return list(languages) if languages is not None else None
+
+def invalidate_language_cache(engine: Optional[str] = None):
+    """
+    Invalida la cache delle lingue (di un solo motore o di tutti).
+    Args:
+        engine: Nome del motore da invalidare; None per svuotare tutta la cache.
+    """
+    with _cache_lock:
+        _load_cache_file()
+        for key in list(_cache):
+            if engine is None or key.startswith(f"{engine}|"):
+                del _cache[key]
+        _watch_dirs.clear()
+        _save_cache_file()
@@ -1,7 +1,8 @@
-from typing import List
+from typing import List, Optional
 import subprocess
 import logging
 import platform
+from language_cache import get_cached_languages, resolve_binary, get_tessdata_dirs
 
 # Mappatura completa dei codici Tesseract a due lettere
 TESSERACT_LANGUAGE_MAP = {
@@ -39,6 +40,41 @@ NLLB_LANGUAGES = [
 ]
 LOCALLY_LANGUAGES = ['en', 'it']
 
+def _query_tesseract_languages(tesseract_cmd: str) -> Optional[List[str]]:
+    """
+    Esegue `tesseract --list-langs` e restituisce i codici Tesseract grezzi (es. 'eng').
+    Returns:
+        Optional[List[str]]: Codici trovati o None in caso di errore.
+    """
+    try:
+        result = subprocess.run([tesseract_cmd, '--list-langs'], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            logging.error(f"Errore nell'esecuzione di tesseract --list-langs: {result.stderr}")
+            return None
+        langs = [lang.strip() for lang in result.stdout.strip().split('\n') if lang.strip()]
+        if langs and langs[0].startswith('List of available languages'):
+            langs = langs[1:]
+        return langs
+    except FileNotFoundError:
+        logging.error(f"Tesseract non trovato al percorso: {tesseract_cmd}")
+        return None
+    except Exception as e:
+        logging.error(f"Errore nel recupero delle lingue di Tesseract: {e}")
+        return None
+
+def get_raw_tesseract_languages(tesseract_path: str = '') -> Optional[List[str]]:
+    """
+    Restituisce i codici Tesseract installati (es. ['eng', 'ita']), usando la cache delle lingue.
+    Args:
+        tesseract_path: Percorso dell'eseguibile Tesseract (opzionale su Ubuntu).
+    Returns:
+        Optional[List[str]]: Codici installati o None se Tesseract non risponde.
+    """
+    tesseract_bin = resolve_binary(tesseract_path, 'tesseract')
+    return get_cached_languages('tesseract', tesseract_bin, get_tessdata_dirs(tesseract_bin),
+                                lambda: _query_tesseract_languages(tesseract_bin))
+
 def get_normalized_tesseract_languages(tesseract_path: str = '') -> List[str]:
     """
     Restituisce le lingue installate per Tesseract, normalizzate ai codici a due lettere.
@@ -54,35 +90,19 @@ def get_normalized_tesseract_languages(tesseract_path: str = '') -> List[str]:
         'hin': 'hi', 'heb': 'he', 'ell': 'el', 'pol': 'pl', 'swe': 'sv',
         'ron': 'ro',     # Aggiungi altre lingue se necessario
     }
-    try:
-        cmd = [tesseract_path or 'tesseract', '--list-langs']
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        if result.returncode == 0:
-            langs = [lang.strip() for lang in result.stdout.strip().split('\n') if lang.strip()]
-            if langs and langs[0].startswith('List of available languages'):
-                langs = langs[1:]
-            normalized_langs = []
-            for lang in langs:
-                normalized_lang = tesseract_lang_map.get(lang.lower(), lang.lower())
-                if normalized_lang not in normalized_langs:
-                    normalized_langs.append(normalized_lang)
-            if not normalized_langs:
-                logging.warning("Nessuna lingua Tesseract trovata, ritorno fallback")
-                return ['en']
-            logging.debug(f"Lingue Tesseract installate: {normalized_langs}")
-            return sorted(normalized_langs)
-        else:
-            logging.error(f"Errore nell'esecuzione di tesseract --list-langs: {result.stderr}")
-            return ['en']
-    except FileNotFoundError:
-        logging.error(f"Tesseract non trovato al percorso: {tesseract_path or 'PATH'}")
+    langs = get_raw_tesseract_languages(tesseract_path)
+    if langs is None:
         return ['en']
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Errore nell'esecuzione di tesseract --list-langs: {e.stderr}")
-        return ['en']
-    except Exception as e:
-        logging.error(f"Errore nel recupero delle lingue di Tesseract: {e}")
+    normalized_langs = []
+    for lang in langs:
+        normalized_lang = tesseract_lang_map.get(lang.lower(), lang.lower())
+        if normalized_lang not in normalized_langs:
+            normalized_langs.append(normalized_lang)
+    if not normalized_langs:
+        logging.warning("Nessuna lingua Tesseract trovata, ritorno fallback")
         return ['en']
+    logging.debug(f"Lingue Tesseract installate: {normalized_langs}")
+    return sorted(normalized_langs)
 
 def get_tesseract_languages(tesseract_path: str = '') -> List[str]:
     """
@@ -113,9 +133,12 @@ def get_ocr_languages(ocr_engine: str, tesseract_path: str = '') -> List[str]:
     logging.warning(f"Motore OCR non riconosciuto: {ocr_engine}, ritorno lingue predefinite")
     return ['en']
 
-def get_translation_languages(translate_engine: str) -> List[str]:
+def get_translation_languages(translate_engine: str, translate_locally_path: str = '') -> List[str]:
     """
     Restituisce le lingue supportate dal motore di traduzione specificato.
+    Args:
+        translate_engine: Nome del motore di traduzione.
+        translate_locally_path: Percorso di translateLocally (usato solo per 'locally').
     """
     if translate_engine.lower() == 'libretranslate':
         return LIBRETRANSLATE_LANGUAGES
@@ -125,6 +148,6 @@ def get_translation_languages(translate_engine: str) -> List[str]:
         return NLLB_LANGUAGES
     elif translate_engine.lower() == 'locally':
         from translation.locally import get_locally_languages
-        return get_locally_languages()  # Dynamic retrieval
+        return get_locally_languages(translate_locally_path)  # Dynamic retrieval (con cache)
     logging.warning(f"Motore di traduzione non riconosciuto: {translate_engine}, ritorno lingue predefinite")
     return ['en', 'it']
\ No newline at end of file
@@ -2,10 +2,7 @@ import sys
 import logging
 import argparse
 import platform
-from PyQt5.QtWidgets import QApplication, QMessageBox
-from gui import OCRApp
-from ini_controll import load_preferences, create_default_preferences
-from translation.locally import check_translate_locally_availability
+from startup import StartupReport, InventoryDiscovery, setup_logging
 
 ## V 0.5.8 by MoonDragon  - https://github.com/MoonDragon-MD/pyTranslateOCR
 
@@ -13,28 +10,102 @@ from translation.locally import check_translate_locally_availability
 # Gnu/Linux - Debian/Ubuntu
 # sudo apt-get install tesseract-ocr tesseract-ocr-eng tesseract-ocr-*LANG [espeak]  (*LANG sostituire con le lingue che volete, espeak dovrebbe già essere integrato in Ubuntu)
 # pip3 install PyQt5 pyttsx3 pytesseract pillow requests pynput python-xlib googletrans==3.1.0a0 httpx httpcore
+# Opzionale: pip3 install tesserocr  (OCR Tesseract in-process, evita un processo per ogni cattura)
 # Windows
 # pip install PyQt5 pyttsx3 pytesseract pillow requests keyboard pynput googletrans==3.1.0a0 httpx httpcore
 
 
-def setup_logging(debug: bool):
-    log_level = logging.DEBUG if debug else logging.INFO
-    logging.basicConfig(
-        level=log_level,
-        format='%(levelname)s:%(name)s:%(message)s'
-    )
-    if not debug:
-        for logger_name in ['hpack', 'httpx', 'httpcore']:
-            logging.getLogger(logger_name).setLevel(logging.WARNING)
+def run_bench(iterations: int) -> int:
+    """
+    Ripete OCR e traduzione dell'ultima cattura salvata alla chiusura, senza interfaccia,
+    e stampa i tempi delle fasi.
+    Args:
+        iterations: Numero di ripetizioni.
+    Returns:
+        int: Codice di uscita.
+    """
+    import time
+    from pipeline import load_last_capture, LAST_CAPTURE_FILE
+    from ocr.ocr import perform_ocr
+    from translation.translate import translate_text
+    from metrics import get_metrics
+
+    last = load_last_capture()
+    if last is None:
+        print(f"Nessuna cattura salvata ({LAST_CAPTURE_FILE}): avvia l'interfaccia con --keep-capture "
+              f"ed esegui un OCR")
+        return 1
+    image, area, p = last
+    if p['ocr_engine'] == 'Umi-OCR':
+        print("Umi-OCR cattura lo schermo da sé: --bench richiede Tesseract o Umi-OCR_server")
+        return 1
+    print(f"Cattura {image.size[0]}x{image.size[1]} dell'area {area}, OCR {p['ocr_engine']} ({p['ocr_lang']}), "
+          f"traduzione {p['translate_engine']} ({p['source_lang']}>{p['target_lang']}), {iterations} ripetizioni")
+    metrics = get_metrics()
+    metrics.enabled = True
+    metrics.reset()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        text = perform_ocr(p['ocr_engine'], p['umi_ocr_path'], p['tesseract_path'], area, p['ocr_lang'],
+                           p['enhance_image'], p['contrast'], p['sharpness'], p['invert'], image=image)
+        try:
+            # Senza memoria di traduzione, per misurare il motore
+            translate_text(p['translate_engine'], text, p['source_lang'], p['target_lang'],
+                           p['unique_text'], p['translate_locally_path'], use_memory=False)
+        except ValueError as e:
+            print(f"Traduzione fallita: {e}")
+        metrics.observe('totale', (time.perf_counter() - start) * 1000, p['ocr_engine'])
+    print(f"{'fase':<18}{'motore':<16}{'n':>5}{'media':>10}{'p50':>10}{'p95':>10}{'max':>10}  (ms)")
+    for row in metrics.summary():
+        print(f"{row['stage']:<18}{row['engine']:<16}{row['count']:>5}{row['mean']:>10.1f}"
+              f"{row['p50']:>10.1f}{row['p95']:>10.1f}{row['max']:>10.1f}")
+    return 0
+
+def print_startup_report(report: StartupReport):
+    """Chiude la misura dell'avvio alla prima iterazione del ciclo degli eventi e stampa il report."""
+    report.mark("primo ciclo degli eventi")
+    report.stop()
+    print(report.format())
 
 def main():
     print(f"Starting OCR Application on {platform.system()}")
     parser = argparse.ArgumentParser(description="OCR Application")
     parser.add_argument('--debug', action='store_true', help='Abilita i messaggi di debug')
+    parser.add_argument('--profile', metavar='DIR', help='Profila ogni OCR/traduzione con cProfile, un file .prof per job in DIR')
+    parser.add_argument('--bench', type=int, metavar='N', help="Ripete N volte OCR e traduzione dell'ultima cattura, senza interfaccia")
+    parser.add_argument('--keep-capture', action='store_true', help="Salva l'ultima cattura alla chiusura, per --bench")
+    parser.add_argument('--startup-report', action='store_true', help="Stampa i tempi di avvio e delle importazioni quando la finestra è pronta")
     args = parser.parse_args()
     
     setup_logging(debug=args.debug)
-    
+
+    if args.bench is not None:
+        if args.bench < 1:
+            parser.error("--bench richiede un numero di ripetizioni positivo")
+        sys.exit(run_bench(args.bench))
+    # Le importazioni di Qt, interfaccia e motori avvengono da qui in poi, così da poterle misurare
+    report = StartupReport() if args.startup_report else None
+    if args.profile:
+        from pipeline import enable_profiling
+        enable_profiling(args.profile)
+    if args.keep_capture or args.profile:
+        from pipeline import enable_last_capture
+        enable_last_capture()
+
+    # Lingue dei motori e modulo di traduzione scoperti in background mentre si crea la finestra
+    from ini_controll import load_engine_settings, load_preferences, create_default_preferences
+    discovery = InventoryDiscovery(load_engine_settings())
+    discovery.start()
+    if report:
+        report.discovery = discovery
+        report.mark("scoperta dei motori avviata")
+
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    from gui import OCRApp
+    if report:
+        report.mark("interfaccia importata")
+
     app = QApplication(sys.argv)
     preferences = load_preferences(app)
     if preferences is None or len(preferences) != 15:
@@ -49,6 +120,9 @@ def main():
     translate_engine = preferences[5]  # translate_engine
     translate_locally_path = preferences[6]  # translate_locally_path
     if translate_engine == 'Locally':
+        # La verifica è già in corso nella scoperta in background: ne attende il risultato
+        discovery.wait()
+        from translation.locally import check_translate_locally_availability
         if not check_translate_locally_availability(translate_locally_path):
             logging.warning("translateLocally non disponibile, passaggio a LibreTranslate")
             QMessageBox.warning(
@@ -64,6 +138,9 @@ def main():
     try:
         window = OCRApp(*preferences)
         window.show()
+        if report:
+            report.mark("finestra mostrata")
+            QTimer.singleShot(0, lambda: print_startup_report(report))
         sys.exit(app.exec_())
     except TypeError as e:
         logging.error(f"Errore nella creazione di OCRApp: {e}")
@@ -0,0 +1,239 @@
+import os
+import json
+import math
+import time
+import bisect
+import logging
+import threading
+import configparser
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Misure dei tempi delle fasi della pipeline (cattura, pre-elaborazione, OCR, verifica dei
+# motori, traduzione, TTS, overlay). Ogni misura ("span") porta fase, motore, coppia di
+# lingue e numero di caratteri; le durate vengono aggregate in istogrammi in memoria e gli
+# ultimi span conservati per l'esportazione come trace di Chrome (chrome://tracing, Perfetto).
+# Esportabili anche nel formato testuale di Prometheus.
+
+# Limiti superiori (ms) dei bucket degli istogrammi
+HISTOGRAM_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RESERVOIR_SIZE = 512        # ultime durate conservate per fase per i percentili
+TRACE_MAX_EVENTS = 5000     # span conservati per la trace di Chrome
+
+def load_metrics_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge le impostazioni delle misure dalla sezione [Metrics].
+    Returns:
+        dict: enabled, trace_events e keep_last_capture.
+    """
+    settings = {'enabled': True, 'trace_events': TRACE_MAX_EVENTS, 'keep_last_capture': False}
+    if not os.path.isfile(ini_file):
+        return settings
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    if 'Metrics' not in config:
+        return settings
+    try:
+        settings['enabled'] = config.getboolean('Metrics', 'enabled', fallback=True)
+        settings['trace_events'] = max(0, config.getint('Metrics', 'trace_events', fallback=TRACE_MAX_EVENTS))
+        settings['keep_last_capture'] = config.getboolean('Metrics', 'keep_last_capture', fallback=False)
+    except ValueError as e:
+        logging.error(f"Errore nella sezione [Metrics]: {e}, usando valori predefiniti")
+    return settings
+
+class Histogram:
+    """
+    Istogramma cumulativo delle durate (ms) di una fase, con le ultime RESERVOIR_SIZE
+    durate per calcolare i percentili.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)  # l'ultimo è +Inf
+        self.count = 0
+        self.total = 0.0
+        self.chars = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, ms: float, chars: int = 0):
+        self.buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.chars += chars
+        self.max = max(self.max, ms)
+        self.recent.append(ms)
+
+    def percentile(self, pct: float) -> float:
+        """Percentile delle durate recenti (nearest rank)."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+        return ordered[index]
+
+class Span:
+    """Misura in corso; gli attributi (es. chars) possono essere aggiunti prima della chiusura."""
+    __slots__ = ('name', 'attrs', 'start')
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+LabelKey = Tuple[str, str, str]     # (fase, motore, lingue)
+
+class MetricsRegistry:
+    """Raccoglie gli span in istogrammi per (fase, motore, lingue) e in un buffer di eventi."""
+
+    def __init__(self, enabled: bool = True, trace_events: int = TRACE_MAX_EVENTS):
+        self.enabled = enabled
+        self._histograms: Dict[LabelKey, Histogram] = {}
+        self._events = deque(maxlen=trace_events) if trace_events else None
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, engine: str = '', langs: str = '', chars: int = 0, **attrs):
+        """
+        Misura il blocco di codice come fase `name`.
+        Args:
+            name: Fase (es. 'ocr', 'translate').
+            engine: Motore usato (es. 'Tesseract', 'LibreTranslate').
+            langs: Coppia di lingue (es. 'en>it') o lingua OCR.
+            chars: Caratteri elaborati (aggiornabile con span.set(chars=...)).
+        """
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+        span = Span(name, dict(attrs, engine=engine, langs=langs, chars=chars))
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs['error'] = type(e).__name__
+            raise
+        finally:
+            self._finish(span, time.perf_counter())
+
+    def observe(self, name: str, ms: float, engine: str = '', langs: str = '', chars: int = 0):
+        """Registra una durata misurata altrove (ms)."""
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        span = Span(name, {'engine': engine, 'langs': langs, 'chars': chars})
+        span.start = end - ms / 1000.0
+        self._finish(span, end)
+
+    def _finish(self, span: Span, end: float):
+        ms = (end - span.start) * 1000
+        attrs = span.attrs
+        key = (span.name, str(attrs.get('engine') or ''), str(attrs.get('langs') or ''))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(ms, int(attrs.get('chars') or 0))
+            if self._events is not None:
+                self._events.append((span.name, (span.start - self._origin) * 1e6, ms * 1000,
+                                     threading.get_ident(), threading.current_thread().name, dict(attrs)))
+
+    def reset(self):
+        """Azzera istogrammi ed eventi."""
+        with self._lock:
+            self._histograms.clear()
+            if self._events is not None:
+                self._events.clear()
+
+    def summary(self) -> List[dict]:
+        """
+        Riepilogo per fase, motore e lingue, ordinato per fase.
+        Returns:
+            List[dict]: stage, engine, langs, count, mean, p50, p95, max (ms) e chars.
+        """
+        with self._lock:
+            items = [(key, h.count, h.total, h.chars, h.max, h.percentile(50), h.percentile(95))
+                     for key, h in self._histograms.items()]
+        rows = []
+        for (stage, engine, langs), count, total, chars, maximum, p50, p95 in sorted(items):
+            rows.append({'stage': stage, 'engine': engine, 'langs': langs, 'count': count,
+                         'mean': total / count if count else 0.0, 'p50': p50, 'p95': p95,
+                         'max': maximum, 'chars': chars})
+        return rows
+
+    def to_prometheus(self) -> str:
+        """Istogrammi nel formato testuale di Prometheus (durate in secondi)."""
+        lines = ['# HELP pytranslateocr_stage_seconds Durata delle fasi della pipeline.',
+                 '# TYPE pytranslateocr_stage_seconds histogram']
+        chars = ['# HELP pytranslateocr_stage_chars_total Caratteri elaborati per fase.',
+                 '# TYPE pytranslateocr_stage_chars_total counter']
+        with self._lock:
+            items = sorted((key, list(h.buckets), h.count, h.total, h.chars) for key, h in self._histograms.items())
+        for (stage, engine, langs), buckets, count, total, char_count in items:
+            labels = f'stage="{_escape(stage)}",engine="{_escape(engine)}",langs="{_escape(langs)}"'
+            cumulative = 0
+            for bound, bucket in zip(HISTOGRAM_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'pytranslateocr_stage_seconds_bucket{{{labels},le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'pytranslateocr_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'pytranslateocr_stage_seconds_sum{{{labels}}} {total / 1000:.6f}')
+            lines.append(f'pytranslateocr_stage_seconds_count{{{labels}}} {count}')
+            chars.append(f'pytranslateocr_stage_chars_total{{{labels}}} {char_count}')
+        return '\n'.join(lines + chars) + '\n'
+
+    def to_chrome_trace(self) -> dict:
+        """Span recenti nel formato Trace Event di Chrome (eventi completi 'X', tempi in µs)."""
+        with self._lock:
+            events = list(self._events or ())
+        pid = os.getpid()
+        trace = []
+        threads = {}
+        for name, ts, dur, tid, thread_name, attrs in events:
+            threads[tid] = thread_name
+            trace.append({'name': name, 'cat': attrs.get('engine') or 'pipeline', 'ph': 'X',
+                          'ts': round(ts, 1), 'dur': round(dur, 1), 'pid': pid, 'tid': tid, 'args': attrs})
+        for tid, thread_name in threads.items():
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def export_prometheus(self, path: str):
+        """Scrive gli istogrammi in formato Prometheus nel file indicato."""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        logging.info(f"Metriche esportate in {path}")
+
+    def export_chrome_trace(self, path: str):
+        """Scrive la trace di Chrome nel file indicato."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        logging.info(f"Trace esportata in {path}")
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """Restituisce il registro delle misure condiviso, creandolo al primo utilizzo."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                settings = load_metrics_settings()
+                _registry = MetricsRegistry(settings['enabled'], settings['trace_events'])
+    return _registry
+
+def span(name: str, engine: str = '', langs: str = '', chars: int = 0, **attrs):
+    """Scorciatoia per get_metrics().span(...)."""
+    return get_metrics().span(name, engine, langs, chars, **attrs)
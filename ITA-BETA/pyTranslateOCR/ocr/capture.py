@@ -0,0 +1,451 @@
+import os
+import abc
+import sys
+import time
+import ctypes
+import ctypes.util
+import logging
+import threading
+import configparser
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from PIL import Image, ImageGrab
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import mss
+except ImportError:
+    mss = None
+
+# Backend di cattura dello schermo, provati in ordine:
+#  - xshm: X11 con estensione MIT-SHM via ctypes; cattura solo il rettangolo richiesto in un
+#          buffer di memoria condivisa riutilizzato tra le catture (nessuna dipendenza esterna)
+#  - mss: libreria mss, se installata (X11, Windows, macOS)
+#  - imagegrab: PIL.ImageGrab, sempre disponibile come ripiego
+# La scelta si può forzare con [Capture] backend = auto | xshm | mss | imagegrab.
+
+CAPTURE_BACKENDS = ('xshm', 'mss', 'imagegrab')
+
+class CaptureError(RuntimeError):
+    """Il backend non è riuscito a catturare l'area richiesta."""
+
+class CaptureBackend(abc.ABC):
+    name = ''
+
+    @abc.abstractmethod
+    def grab(self, left: int, top: int, width: int, height: int) -> Image.Image:
+        """Cattura l'area come immagine PIL RGB."""
+
+    def grab_array(self, left: int, top: int, width: int, height: int):
+        """Cattura l'area come array NumPy RGB (height, width, 3)."""
+        return np.asarray(self.grab(left, top, width, height).convert('RGB'))
+
+    def close(self):
+        pass
+
+class ImageGrabBackend(CaptureBackend):
+    name = 'imagegrab'
+
+    def grab(self, left, top, width, height):
+        return ImageGrab.grab(bbox=(left, top, left + width, top + height))
+
+class MssBackend(CaptureBackend):
+    name = 'mss'
+
+    def __init__(self):
+        if mss is None:
+            raise CaptureError("mss non installato")
+        # Le istanze mss non sono thread-safe: una per thread
+        self._local = threading.local()
+        self._instances = []
+        self._lock = threading.Lock()
+
+    def _sct(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._instances.append(sct)
+        return sct
+
+    def grab(self, left, top, width, height):
+        shot = self._sct().grab({'left': left, 'top': top, 'width': width, 'height': height})
+        return Image.frombytes('RGB', shot.size, shot.bgra, 'raw', 'BGRX')
+
+    def grab_array(self, left, top, width, height):
+        shot = self._sct().grab({'left': left, 'top': top, 'width': width, 'height': height})
+        return np.asarray(shot)[:, :, 2::-1]
+
+    def close(self):
+        with self._lock:
+            for sct in self._instances:
+                try:
+                    sct.close()
+                except Exception:
+                    pass
+            self._instances.clear()
+        self._local = threading.local()
+
+# --- Strutture Xlib / MIT-SHM per ctypes ---
+
+class _XImageFuncs(ctypes.Structure):
+    _fields_ = [('create_image', ctypes.c_void_p), ('destroy_image', ctypes.c_void_p),
+                ('get_pixel', ctypes.c_void_p), ('put_pixel', ctypes.c_void_p),
+                ('sub_image', ctypes.c_void_p), ('add_pixel', ctypes.c_void_p)]
+
+class _XImage(ctypes.Structure):
+    _fields_ = [('width', ctypes.c_int), ('height', ctypes.c_int), ('xoffset', ctypes.c_int),
+                ('format', ctypes.c_int), ('data', ctypes.c_void_p), ('byte_order', ctypes.c_int),
+                ('bitmap_unit', ctypes.c_int), ('bitmap_bit_order', ctypes.c_int),
+                ('bitmap_pad', ctypes.c_int), ('depth', ctypes.c_int),
+                ('bytes_per_line', ctypes.c_int), ('bits_per_pixel', ctypes.c_int),
+                ('red_mask', ctypes.c_ulong), ('green_mask', ctypes.c_ulong),
+                ('blue_mask', ctypes.c_ulong), ('obdata', ctypes.c_void_p), ('f', _XImageFuncs)]
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [('shmseg', ctypes.c_ulong), ('shmid', ctypes.c_int),
+                ('shmaddr', ctypes.c_void_p), ('readOnly', ctypes.c_int)]
+
+class _XErrorEvent(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_int), ('display', ctypes.c_void_p), ('resourceid', ctypes.c_ulong),
+                ('serial', ctypes.c_ulong), ('error_code', ctypes.c_ubyte),
+                ('request_code', ctypes.c_ubyte), ('minor_code', ctypes.c_ubyte)]
+
+_XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(_XErrorEvent))
+_DestroyImage = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(_XImage))
+
+_ZPIXMAP = 2
+_ALL_PLANES = ctypes.c_ulong(-1).value
+_IPC_PRIVATE = 0
+_IPC_CREAT = 0o1000
+_IPC_RMID = 0
+
+class XShmBackend(CaptureBackend):
+    """
+    Cattura X11 tramite MIT-SHM: il server scrive i pixel direttamente in un segmento di
+    memoria condivisa, riutilizzato finché la dimensione dell'area non cambia.
+    """
+    name = 'xshm'
+
+    def __init__(self):
+        if not sys.platform.startswith('linux') or not os.environ.get('DISPLAY'):
+            raise CaptureError("Display X11 non disponibile")
+        xlib_path = ctypes.util.find_library('X11')
+        xext_path = ctypes.util.find_library('Xext')
+        libc_path = ctypes.util.find_library('c')
+        if not xlib_path or not xext_path:
+            raise CaptureError("libX11/libXext non trovate")
+        self._x11 = ctypes.CDLL(xlib_path)
+        self._xext = ctypes.CDLL(xext_path)
+        self._libc = ctypes.CDLL(libc_path, use_errno=True)
+        self._declare()
+        self._lock = threading.Lock()
+        self._x_error = None
+        self._error_handler = _XErrorHandler(self._on_x_error)
+        self._display = self._x11.XOpenDisplay(None)
+        if not self._display:
+            raise CaptureError("XOpenDisplay fallita")
+        with self._trap_x_errors():
+            supported = self._xext.XShmQueryExtension(self._display)
+        if not supported:
+            self._x11.XCloseDisplay(self._display)
+            raise CaptureError("Estensione MIT-SHM non disponibile")
+        screen = self._x11.XDefaultScreen(self._display)
+        self._root = self._x11.XDefaultRootWindow(self._display)
+        self._visual = self._x11.XDefaultVisual(self._display, screen)
+        self._depth = self._x11.XDefaultDepth(self._display, screen)
+        self._screen_size = (self._x11.XDisplayWidth(self._display, screen),
+                             self._x11.XDisplayHeight(self._display, screen))
+        self._image = None
+        self._shminfo = None
+        self._size = None
+
+    def _declare(self):
+        x11, xext, libc = self._x11, self._xext, self._libc
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultVisual.restype = ctypes.c_void_p
+        x11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XSetErrorHandler.argtypes = [ctypes.c_void_p]
+        x11.XSetErrorHandler.restype = ctypes.c_void_p
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                         ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo),
+                                         ctypes.c_uint, ctypes.c_uint]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+                                      ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    def _on_x_error(self, display, event):
+        self._x_error = event.contents.error_code
+        return 0
+
+    @contextmanager
+    def _trap_x_errors(self):
+        # Senza un gestore, un errore X (es. area fuori schermo) terminerebbe il processo.
+        # XSetErrorHandler vale per tutto il processo (anche per Qt): il gestore è attivo solo
+        # durante le chiamate MIT-SHM e quello precedente viene poi ripristinato
+        previous = self._x11.XSetErrorHandler(ctypes.cast(self._error_handler, ctypes.c_void_p))
+        try:
+            yield
+        finally:
+            # Gli errori asincroni delle richieste appena inviate arrivano entro XSync
+            self._x11.XSync(self._display, 0)
+            self._x11.XSetErrorHandler(previous)
+
+    def _release_image(self):
+        if self._image is None:
+            return
+        self._xext.XShmDetach(self._display, ctypes.byref(self._shminfo))
+        self._x11.XSync(self._display, 0)
+        # destroy_image delle immagini MIT-SHM libera solo la struttura, non il segmento
+        _DestroyImage(self._image.contents.f.destroy_image)(self._image)
+        self._libc.shmdt(ctypes.c_void_p(self._shminfo.shmaddr))
+        self._image = None
+        self._shminfo = None
+        self._size = None
+
+    def _ensure_image(self, width: int, height: int):
+        if self._size == (width, height):
+            return
+        self._release_image()
+        shminfo = _XShmSegmentInfo()
+        image = self._xext.XShmCreateImage(self._display, self._visual, self._depth, _ZPIXMAP, None,
+                                           ctypes.byref(shminfo), width, height)
+        if not image:
+            raise CaptureError("XShmCreateImage fallita")
+        if image.contents.bits_per_pixel != 32:
+            _DestroyImage(image.contents.f.destroy_image)(image)
+            raise CaptureError(f"Formato non supportato: {image.contents.bits_per_pixel} bpp")
+        size = image.contents.bytes_per_line * height
+        shminfo.shmid = self._libc.shmget(_IPC_PRIVATE, size, _IPC_CREAT | 0o600)
+        if shminfo.shmid < 0:
+            _DestroyImage(image.contents.f.destroy_image)(image)
+            raise CaptureError(f"shmget fallita (errno {ctypes.get_errno()})")
+        address = self._libc.shmat(shminfo.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            self._libc.shmctl(shminfo.shmid, _IPC_RMID, None)
+            _DestroyImage(image.contents.f.destroy_image)(image)
+            raise CaptureError(f"shmat fallita (errno {ctypes.get_errno()})")
+        shminfo.shmaddr = address
+        shminfo.readOnly = 0
+        image.contents.data = address
+        self._x_error = None
+        attached = self._xext.XShmAttach(self._display, ctypes.byref(shminfo))
+        self._x11.XSync(self._display, 0)
+        # Il segmento viene rimosso automaticamente quando entrambi i processi si staccano
+        self._libc.shmctl(shminfo.shmid, _IPC_RMID, None)
+        if not attached or self._x_error is not None:
+            self._libc.shmdt(ctypes.c_void_p(address))
+            _DestroyImage(image.contents.f.destroy_image)(image)
+            raise CaptureError("XShmAttach fallita (display remoto?)")
+        self._image, self._shminfo, self._size = image, shminfo, (width, height)
+        logging.debug(f"Buffer MIT-SHM allocato: {width}x{height} ({size} byte)")
+
+    def _grab_locked(self, left, top, width, height):
+        screen_width, screen_height = self._screen_size
+        if left < 0 or top < 0 or left + width > screen_width or top + height > screen_height:
+            raise CaptureError(f"Area fuori dallo schermo {screen_width}x{screen_height}")
+        self._ensure_image(width, height)
+        self._x_error = None
+        ok = self._xext.XShmGetImage(self._display, self._root, self._image, left, top, _ALL_PLANES)
+        if not ok or self._x_error is not None:
+            raise CaptureError(f"XShmGetImage fallita (errore X {self._x_error})")
+        return self._image.contents.bytes_per_line
+
+    def grab(self, left, top, width, height):
+        with self._lock, self._trap_x_errors():
+            stride = self._grab_locked(left, top, width, height)
+            data = ctypes.string_at(self._shminfo.shmaddr, stride * height)
+        return Image.frombytes('RGB', (width, height), data, 'raw', 'BGRX', stride)
+
+    def grab_array(self, left, top, width, height):
+        """
+        Cattura l'area come array NumPy RGB (height, width, 3).
+        I pixel vengono copiati dal buffer condiviso prima di rilasciare il lock, così una
+        cattura concorrente non può sovrascriverli.
+        """
+        with self._lock, self._trap_x_errors():
+            stride = self._grab_locked(left, top, width, height)
+            buffer = (ctypes.c_uint8 * (stride * height)).from_address(self._shminfo.shmaddr)
+            bgra = np.frombuffer(buffer, dtype=np.uint8).reshape(height, stride)[:, :width * 4] \
+                     .reshape(height, width, 4)
+            return np.ascontiguousarray(bgra[:, :, 2::-1])
+
+    def close(self):
+        with self._lock:
+            if self._display:
+                with self._trap_x_errors():
+                    self._release_image()
+                self._x11.XCloseDisplay(self._display)
+                self._display = None
+
+_BACKEND_CLASSES = {'xshm': XShmBackend, 'mss': MssBackend, 'imagegrab': ImageGrabBackend}
+
+def load_capture_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge il backend di cattura dalla sezione [Capture].
+    Returns:
+        dict: backend ('auto' o uno di CAPTURE_BACKENDS).
+    """
+    settings = {'backend': 'auto'}
+    if not os.path.isfile(ini_file):
+        return settings
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    backend = config.get('Capture', 'backend', fallback='auto').strip().lower()
+    if backend != 'auto' and backend not in CAPTURE_BACKENDS:
+        logging.error(f"Backend di cattura sconosciuto: {backend}, uso 'auto'")
+        backend = 'auto'
+    settings['backend'] = backend
+    return settings
+
+class ScreenCapture:
+    """
+    Sceglie il primo backend disponibile e ripiega sul successivo se una cattura fallisce.
+    Registra la latenza di ogni cattura per backend.
+    """
+
+    def __init__(self, preferred: str = 'auto'):
+        if preferred == 'auto':
+            self.order: List[str] = list(CAPTURE_BACKENDS)
+        else:
+            self.order = [preferred] + [name for name in CAPTURE_BACKENDS if name != preferred]
+        self._backends: Dict[str, CaptureBackend] = {}
+        self._disabled = set()
+        self._stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _get_backend(self, name: str) -> Optional[CaptureBackend]:
+        with self._lock:
+            if name in self._disabled:
+                return None
+            backend = self._backends.get(name)
+            if backend is None:
+                try:
+                    backend = _BACKEND_CLASSES[name]()
+                except Exception as e:
+                    logging.debug(f"Backend di cattura {name} non disponibile: {e}")
+                    self._disabled.add(name)
+                    return None
+                self._backends[name] = backend
+                logging.info(f"Backend di cattura attivo: {name}")
+            return backend
+
+    def _disable(self, name: str, error: Exception):
+        logging.warning(f"Cattura con {name} fallita, uso il backend successivo: {error}")
+        with self._lock:
+            self._disabled.add(name)
+            backend = self._backends.pop(name, None)
+        if backend is not None:
+            backend.close()
+
+    def _record(self, name: str, elapsed_ms: float):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'count': 0, 'total_ms': 0.0, 'min_ms': None,
+                                                  'max_ms': 0.0, 'last_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['min_ms'] = elapsed_ms if stats['min_ms'] is None else min(stats['min_ms'], elapsed_ms)
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['last_ms'] = elapsed_ms
+
+    def _capture(self, area, method: str):
+        left, top, width, height = (int(v) for v in area)
+        last_error = None
+        for name in self.order:
+            backend = self._get_backend(name)
+            if backend is None:
+                continue
+            start = time.perf_counter()
+            try:
+                result = getattr(backend, method)(left, top, width, height)
+            except CaptureError as e:
+                # Area non catturabile da questo backend (es. fuori schermo): prova il successivo
+                logging.debug(f"Cattura con {name} non possibile: {e}")
+                last_error = e
+                continue
+            except Exception as e:
+                self._disable(name, e)
+                last_error = e
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record(name, elapsed_ms)
+            logging.debug(f"Cattura {width}x{height} con {name}: {elapsed_ms:.1f} ms")
+            return result
+        raise CaptureError(f"Nessun backend di cattura disponibile: {last_error}")
+
+    def grab(self, area) -> Image.Image:
+        """Cattura l'area [left, top, width, height] come immagine PIL."""
+        return self._capture(area, 'grab')
+
+    def grab_array(self, area):
+        """
+        Cattura l'area come array NumPy RGB (height, width, 3), con qualunque backend.
+        """
+        if np is None:
+            raise CaptureError("NumPy non installato")
+        return self._capture(area, 'grab_array')
+
+    def stats(self) -> Dict[str, dict]:
+        """Latenza delle catture per backend: count, mean_ms, min_ms, max_ms, last_ms."""
+        with self._lock:
+            return {name: {'count': s['count'], 'mean_ms': s['total_ms'] / s['count'],
+                           'min_ms': s['min_ms'], 'max_ms': s['max_ms'], 'last_ms': s['last_ms']}
+                    for name, s in self._stats.items() if s['count']}
+
+    def close(self):
+        with self._lock:
+            backends = list(self._backends.values())
+            self._backends.clear()
+            self._disabled.clear()
+        for backend in backends:
+            try:
+                backend.close()
+            except Exception as e:
+                logging.error(f"Errore nella chiusura del backend {backend.name}: {e}")
+
+_capture: Optional[ScreenCapture] = None
+_capture_lock = threading.Lock()
+
+def get_screen_capture() -> ScreenCapture:
+    """Restituisce il gestore di cattura condiviso, creandolo al primo utilizzo."""
+    global _capture
+    if _capture is None:
+        with _capture_lock:
+            if _capture is None:
+                _capture = ScreenCapture(load_capture_settings()['backend'])
+    return _capture
+
+def get_capture_stats() -> Dict[str, dict]:
+    """Latenza delle catture per backend (vedi ScreenCapture.stats)."""
+    return get_screen_capture().stats() if _capture is not None else {}
+
+def close_capture():
+    """Chiude i backend di cattura (display X11 e memoria condivisa)."""
+    if _capture is not None:
+        stats = _capture.stats()
+        for name, s in stats.items():
+            logging.info(f"Cattura {name}: {s['count']} catture, media {s['mean_ms']:.1f} ms, "
+                         f"max {s['max_ms']:.1f} ms")
+        _capture.close()
@@ -0,0 +1,138 @@
+import os
+import logging
+import threading
+import configparser
+from typing import Dict, Optional, Tuple
+from PIL import Image, ImageChops, ImageStat
+
+# Rilevamento dei cambiamenti per la modalità "Osserva": ogni fotogramma viene ridotto
+# a una miniatura in scala di grigi da cui si calcolano un hash percettivo (dHash)
+# e la differenza media rispetto al fotogramma precedente della stessa area.
+
+WATCH_INTERVAL_MS = 1000
+WATCH_HASH_SIZE = 16           # dHash da 16x16 bit: rileva anche il cambio di una riga di testo
+WATCH_HASH_THRESHOLD = 6       # bit diversi oltre i quali l'immagine è considerata cambiata
+WATCH_DIFF_THRESHOLD = 3.0     # differenza media dei pixel della miniatura (0-255)
+THUMBNAIL_WIDTH = 64
+WATCH_TILE_SIZE = 32           # lato delle tile per l'OCR delle sole regioni cambiate
+
+def _thumbnail(image: Image.Image) -> Image.Image:
+    width, height = image.size
+    thumb_height = max(1, round(height * THUMBNAIL_WIDTH / max(width, 1)))
+    return image.convert('L').resize((THUMBNAIL_WIDTH, thumb_height), Image.BILINEAR)
+
+def dhash(image: Image.Image, hash_size: int = WATCH_HASH_SIZE) -> int:
+    """
+    Calcola l'hash percettivo per differenza (dHash) dell'immagine.
+    Args:
+        image: Immagine PIL.
+        hash_size: Lato della griglia di confronto (hash di hash_size^2 bit).
+    Returns:
+        int: Hash come intero.
+    """
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+def hamming(a: int, b: int) -> int:
+    """Numero di bit diversi tra due hash."""
+    return bin(a ^ b).count('1')
+
+class ChangeDetector:
+    """
+    Confronta ogni cattura con la precedente della stessa area e segnala solo i cambiamenti
+    significativi (testo nuovo), ignorando rumore e piccole variazioni di compressione.
+    """
+
+    def __init__(self, hash_threshold: int = WATCH_HASH_THRESHOLD,
+                 diff_threshold: float = WATCH_DIFF_THRESHOLD):
+        self.hash_threshold = hash_threshold
+        self.diff_threshold = diff_threshold
+        self._frames: Dict[str, Tuple[tuple, int, Image.Image]] = {}
+        self._pending: Dict[str, Tuple[tuple, int, Image.Image]] = {}  # in attesa di commit()
+        self._lock = threading.Lock()
+
+    def has_changed(self, area_key: str, image: Image.Image, area=None, commit: bool = True) -> bool:
+        """
+        Verifica se la cattura differisce dalla precedente e la memorizza come riferimento.
+        Args:
+            area_key: Identificativo dell'area (es. 'fixed_area').
+            image: Immagine PIL catturata.
+            area: Rettangolo catturato; se cambia la cattura è sempre considerata nuova.
+            commit: Se False una cattura cambiata diventa riferimento solo con commit(), da
+                    chiamare quando la sua elaborazione è riuscita; altrimenti al giro
+                    successivo risulta ancora cambiata e viene rielaborata.
+        Returns:
+            bool: True se l'immagine è cambiata (o è la prima dell'area).
+        """
+        geometry = tuple(area) if area is not None else image.size
+        thumb = _thumbnail(image)
+        frame_hash = dhash(thumb)
+        frame = (geometry, frame_hash, thumb)
+        with self._lock:
+            previous = self._frames.get(area_key)
+            if previous is None or previous[0] != geometry or previous[2].size != thumb.size:
+                self._store(area_key, frame, commit)
+                return True
+            distance = hamming(previous[1], frame_hash)
+            diff = ImageStat.Stat(ImageChops.difference(previous[2], thumb)).mean[0]
+            changed = distance > self.hash_threshold or diff > self.diff_threshold
+            if changed:
+                self._store(area_key, frame, commit)
+        logging.debug(f"Cambiamento [{area_key}]: dHash {distance} bit, differenza media {diff:.2f}"
+                      f" -> {'cambiata' if changed else 'invariata'}")
+        return changed
+
+    def _store(self, area_key: str, frame: tuple, commit: bool):
+        if commit:
+            self._frames[area_key] = frame
+            self._pending.pop(area_key, None)
+        else:
+            self._pending[area_key] = frame
+
+    def commit(self, area_key: str):
+        """Rende riferimento l'ultima cattura cambiata dell'area, dopo un'elaborazione riuscita."""
+        with self._lock:
+            frame = self._pending.pop(area_key, None)
+            if frame is not None:
+                self._frames[area_key] = frame
+
+    def reset(self, area_key: Optional[str] = None):
+        """Dimentica l'ultimo fotogramma (di un'area o di tutte)."""
+        with self._lock:
+            if area_key is None:
+                self._frames.clear()
+                self._pending.clear()
+            else:
+                self._frames.pop(area_key, None)
+                self._pending.pop(area_key, None)
+
+def load_watch_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge le impostazioni della modalità "Osserva" dalla sezione [Watch].
+    Returns:
+        dict: interval_ms, hash_threshold, diff_threshold, dirty_regions e tile_size.
+    """
+    settings = {'interval_ms': WATCH_INTERVAL_MS, 'hash_threshold': WATCH_HASH_THRESHOLD,
+                'diff_threshold': WATCH_DIFF_THRESHOLD, 'dirty_regions': True,
+                'tile_size': WATCH_TILE_SIZE}
+    if not os.path.isfile(ini_file):
+        return settings
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    if 'Watch' not in config:
+        return settings
+    try:
+        settings['interval_ms'] = max(100, config.getint('Watch', 'interval_ms', fallback=WATCH_INTERVAL_MS))
+        settings['hash_threshold'] = config.getint('Watch', 'hash_threshold', fallback=WATCH_HASH_THRESHOLD)
+        settings['diff_threshold'] = config.getfloat('Watch', 'diff_threshold', fallback=WATCH_DIFF_THRESHOLD)
+        settings['dirty_regions'] = config.getboolean('Watch', 'dirty_regions', fallback=True)
+        settings['tile_size'] = max(8, config.getint('Watch', 'tile_size', fallback=WATCH_TILE_SIZE))
+    except ValueError as e:
+        logging.error(f"Errore nella sezione [Watch]: {e}, usando valori predefiniti")
+    return settings
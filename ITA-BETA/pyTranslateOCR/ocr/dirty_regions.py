@@ -0,0 +1,188 @@
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# OCR delle sole regioni cambiate: la nuova cattura viene confrontata con la precedente
+# a blocchi (tile); le righe di tile cambiate diventano bande orizzontali allineate agli
+# spazi tra le righe di testo e solo queste bande vengono passate all'OCR. Il testo delle
+# righe riconosciute sostituisce quello delle stesse righe nel risultato precedente.
+
+DIRTY_TILE_SIZE = 32
+DIRTY_TILE_THRESHOLD = 6.0      # differenza media (0-255) oltre cui una tile è cambiata
+DIRTY_MAX_FRACTION = 0.6        # oltre questa frazione di altezza cambiata conviene l'OCR completo
+_BLANK_ROW_STD = 4.0            # riga di pixel "vuota" (spazio tra righe di testo)
+_MAX_SNAP = 48                  # pixel massimi di estensione di una banda per trovare uno spazio
+
+Line = Tuple[int, int, str]     # (top, bottom, testo)
+
+def is_available() -> bool:
+    """True se NumPy è installato e il rilevamento delle regioni cambiate è utilizzabile."""
+    return np is not None
+
+def to_gray_array(image):
+    """Converte un'immagine PIL in un array NumPy in scala di grigi (int16, per le differenze)."""
+    return np.asarray(image.convert('L'), dtype=np.int16)
+
+def dirty_tile_rows(previous, current, tile_size: int = DIRTY_TILE_SIZE,
+                    threshold: float = DIRTY_TILE_THRESHOLD):
+    """
+    Confronta due catture a blocchi e indica quali righe di tile contengono cambiamenti.
+    Args:
+        previous: Array in scala di grigi della cattura precedente.
+        current: Array in scala di grigi della nuova cattura (stessa forma).
+        tile_size: Lato delle tile in pixel.
+        threshold: Differenza media oltre cui una tile è considerata cambiata.
+    Returns:
+        ndarray: Vettore booleano, un elemento per riga di tile.
+    """
+    height, width = current.shape
+    rows = -(-height // tile_size)
+    cols = -(-width // tile_size)
+    diff = np.abs(current - previous).astype(np.float32)
+    # Porta le dimensioni a un multiplo della tile replicando i bordi
+    diff = np.pad(diff, ((0, rows * tile_size - height), (0, cols * tile_size - width)), mode='edge')
+    tiles = diff.reshape(rows, tile_size, cols, tile_size).mean(axis=(1, 3))
+    return (tiles > threshold).any(axis=1)
+
+def _snap(start: int, end: int, blank_rows, height: int) -> Tuple[int, int]:
+    # Allarga la banda fino alla prima riga vuota sopra e sotto, per non tagliare il testo
+    limit = max(0, start - _MAX_SNAP)
+    while start > limit and not blank_rows[start]:
+        start -= 1
+    limit = min(height, end + _MAX_SNAP)
+    while end < limit and not blank_rows[end - 1]:
+        end += 1
+    return start, end
+
+def find_dirty_bands(previous, current, tile_size: int = DIRTY_TILE_SIZE,
+                     threshold: float = DIRTY_TILE_THRESHOLD) -> List[Tuple[int, int]]:
+    """
+    Individua le bande orizzontali cambiate tra due catture.
+    Le righe di tile cambiate consecutive vengono unite e i bordi spostati sugli spazi
+    tra le righe di testo della nuova cattura.
+    Args:
+        previous: Array in scala di grigi della cattura precedente.
+        current: Array in scala di grigi della nuova cattura.
+    Returns:
+        List[Tuple[int, int]]: Bande (y iniziale, y finale) ordinate e senza sovrapposizioni.
+    """
+    height = current.shape[0]
+    dirty = dirty_tile_rows(previous, current, tile_size, threshold)
+    blank_rows = current.std(axis=1) < _BLANK_ROW_STD
+    bands = []
+    row = 0
+    while row < len(dirty):
+        if not dirty[row]:
+            row += 1
+            continue
+        first = row
+        while row < len(dirty) and dirty[row]:
+            row += 1
+        start, end = _snap(first * tile_size, min(row * tile_size, height), blank_rows, height)
+        if bands and start <= bands[-1][1]:
+            bands[-1] = (bands[-1][0], max(end, bands[-1][1]))
+        else:
+            bands.append((start, end))
+    return bands
+
+def join_lines(lines: List[Line]) -> str:
+    """
+    Ricompone il testo dalle righe, separando i paragrafi quando lo spazio verticale
+    tra due righe è ampio rispetto all'altezza del testo.
+    """
+    parts = []
+    previous = None
+    for top, bottom, text in lines:
+        if previous is not None:
+            line_height = max(previous[1] - previous[0], 1)
+            parts.append('\n\n' if top - previous[1] > line_height else '\n')
+        parts.append(text)
+        previous = (top, bottom)
+    return ''.join(parts)
+
+class DirtyRegionOCR:
+    """
+    Mantiene per ogni area l'ultima cattura e le righe riconosciute, rieseguendo l'OCR
+    solo sulle bande cambiate. Aree diverse vengono elaborate in parallelo; le catture
+    della stessa area una alla volta.
+    """
+
+    def __init__(self, tile_size: int = DIRTY_TILE_SIZE, threshold: float = DIRTY_TILE_THRESHOLD,
+                 max_fraction: float = DIRTY_MAX_FRACTION):
+        self.tile_size = tile_size
+        self.threshold = threshold
+        self.max_fraction = max_fraction
+        self._areas: Dict[str, dict] = {}
+        self._area_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()   # protegge solo i dizionari, non l'OCR
+
+    def reset(self, area_key: Optional[str] = None):
+        """Dimentica cattura e righe memorizzate (di un'area o di tutte)."""
+        with self._lock:
+            if area_key is None:
+                self._areas.clear()
+            else:
+                self._areas.pop(area_key, None)
+
+    def ocr(self, area_key: str, image, ocr_text: Callable[[object], str],
+            ocr_lines: Callable[[object], List[Line]], params: tuple = ()) -> str:
+        """
+        Esegue l'OCR dell'immagine riutilizzando le righe invariate della cattura precedente.
+        Le letture complete usano `ocr_text`, come l'OCR normale; la lettura per righe serve
+        solo dalla prima cattura ripetuta cambiata in poi, per poter rileggere le sole bande.
+        Args:
+            area_key: Identificativo dell'area (es. 'fixed_area').
+            image: Cattura PIL grezza, usata per il confronto.
+            ocr_text: Funzione che riconosce il testo di un'immagine (vedi tesseract_ocr).
+            ocr_lines: Funzione che riconosce le righe di un'immagine (vedi tesseract_ocr_lines),
+                       con coordinate riferite all'immagine ricevuta.
+            params: Impostazioni OCR; se cambiano l'area viene riletta per intero.
+        Returns:
+            str: Testo dell'intera area.
+        """
+        current = to_gray_array(image)
+        with self._lock:
+            area_lock = self._area_locks.setdefault(area_key, threading.Lock())
+        with area_lock:
+            with self._lock:
+                state = self._areas.get(area_key)
+            lines = None
+            if state is None or state['params'] != params or state['frame'].shape != current.shape:
+                text = ocr_text(image)
+                logging.debug(f"Regioni cambiate [{area_key}]: OCR completo")
+            else:
+                bands = find_dirty_bands(state['frame'], current, self.tile_size, self.threshold)
+                changed = sum(end - start for start, end in bands)
+                if not bands:
+                    logging.debug(f"Regioni cambiate [{area_key}]: nessuna, riuso il testo precedente")
+                    return state['text']
+                if changed > self.max_fraction * current.shape[0]:
+                    text = ocr_text(image)
+                    logging.debug(f"Regioni cambiate [{area_key}]: {changed}px su {current.shape[0]}, "
+                                  f"OCR completo")
+                elif state['lines'] is None:
+                    # Prima cattura ripetuta cambiata: servono le posizioni delle righe
+                    lines = ocr_lines(image)
+                    logging.debug(f"Regioni cambiate [{area_key}]: lettura per righe, {len(lines)} righe")
+                else:
+                    lines = list(state['lines'])
+                    width = current.shape[1]
+                    for start, end in bands:
+                        # Le righe che cadono nella banda vengono sostituite da quelle rilette
+                        lines = [line for line in lines if (line[0] + line[1]) / 2 < start
+                                 or (line[0] + line[1]) / 2 >= end]
+                        band_lines = ocr_lines(image.crop((0, start, width, end)))
+                        lines.extend((top + start, bottom + start, text) for top, bottom, text in band_lines)
+                    lines.sort()
+                    logging.debug(f"Regioni cambiate [{area_key}]: OCR di {len(bands)} bande "
+                                  f"({changed}px su {current.shape[0]})")
+                if lines is not None:
+                    text = join_lines(lines)
+            with self._lock:
+                self._areas[area_key] = {'params': params, 'frame': current, 'text': text, 'lines': lines}
+            return text
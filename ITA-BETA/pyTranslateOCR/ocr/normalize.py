@@ -0,0 +1,108 @@
+import logging
+from typing import List, Tuple
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Normalizzazione della risoluzione prima dell'OCR: si stima l'altezza x (x-height) del
+# testo dominante dal profilo di proiezione orizzontale e si ridimensiona l'immagine
+# perché il testo cada nella fascia di altezza in cui il motore è più rapido e preciso.
+# Il testo minuto dei HUD viene ingrandito, le catture grandi (4K/HiDPI) rimpicciolite.
+
+# Altezza x obiettivo in pixel per motore: Tesseract (LSTM) rende al meglio con lettere
+# maiuscole di circa 30 px; Umi-OCR (PaddleOCR) riduce comunque il lato lungo a 960 px.
+TARGET_X_HEIGHT = {'Tesseract': 20, 'Umi-OCR_server': 16}
+ENGINE_MAX_SIDE = {'Umi-OCR_server': 960}
+MIN_SCALE = 0.35
+MAX_SCALE = 4.0
+SCALE_TOLERANCE = 0.15   # nessun ridimensionamento se il fattore è entro ±15%
+_MIN_LINE_HEIGHT = 4
+
+def is_available() -> bool:
+    """True se NumPy è installato e la normalizzazione è utilizzabile."""
+    return np is not None
+
+def _ink_mask(gray):
+    # Il testo è la classe minoritaria: funziona sia con testo scuro su chiaro che viceversa
+    threshold = gray.mean()
+    dark = gray < threshold
+    return dark if dark.mean() < 0.5 else ~dark
+
+def estimate_x_height(image: Image.Image) -> float:
+    """
+    Stima l'altezza x del testo dominante.
+    Le righe di testo sono le sequenze di righe di pixel con inchiostro; in ogni riga di
+    testo il "corpo" (le righe con almeno metà dell'inchiostro massimo, escluse ascendenti
+    e discendenti) approssima l'altezza x. Si usa la mediana sulle righe di testo.
+    Args:
+        image: Immagine PIL.
+    Returns:
+        float: Altezza x in pixel (0 se non è stato trovato testo).
+    """
+    gray = np.asarray(image.convert('L'), dtype=np.float32)
+    if gray.size == 0 or gray.std() < 8:
+        return 0.0
+    profile = _ink_mask(gray).sum(axis=1)
+    has_ink = profile > max(1, 0.01 * gray.shape[1])
+    # Limiti delle sequenze di righe con inchiostro
+    edges = np.diff(np.concatenate(([0], has_ink.astype(np.int8), [0])))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
+    heights = []
+    for start, end in zip(starts, ends):
+        if end - start < _MIN_LINE_HEIGHT:
+            continue
+        line = profile[start:end]
+        heights.append(int(np.count_nonzero(line >= line.max() / 2)))
+    if not heights:
+        return 0.0
+    return float(np.median(heights))
+
+def compute_scale(image: Image.Image, ocr_engine: str) -> float:
+    """
+    Calcola il fattore di scala per portare il testo all'altezza ottimale del motore.
+    Returns:
+        float: Fattore di scala (1.0 se non serve ridimensionare).
+    """
+    target = TARGET_X_HEIGHT.get(ocr_engine)
+    if target is None:
+        return 1.0
+    x_height = estimate_x_height(image)
+    scale = target / x_height if x_height > 0 else 1.0
+    max_side = ENGINE_MAX_SIDE.get(ocr_engine)
+    if max_side:
+        # Oltre il limite il motore ridimensiona da sé: meglio farlo una volta sola qui
+        scale = min(scale, max_side / max(image.size))
+    scale = min(max(scale, MIN_SCALE), MAX_SCALE)
+    if abs(scale - 1.0) <= SCALE_TOLERANCE:
+        scale = 1.0
+    logging.debug(f"Normalizzazione [{ocr_engine}]: altezza x {x_height:.1f}px, scala {scale:.2f}")
+    return scale
+
+def normalize_image(image: Image.Image, ocr_engine: str) -> Tuple[Image.Image, float]:
+    """
+    Ridimensiona l'immagine in base all'altezza del testo stimata.
+    Args:
+        image: Immagine PIL catturata.
+        ocr_engine: Motore OCR che riceverà l'immagine.
+    Returns:
+        Tuple[Image, float]: Immagine normalizzata e fattore di scala applicato.
+    """
+    if np is None:
+        return image, 1.0
+    scale = compute_scale(image, ocr_engine)
+    if scale == 1.0:
+        return image, 1.0
+    width, height = image.size
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    resample = Image.LANCZOS if scale > 1 else Image.BOX
+    return image.resize(size, resample), scale
+
+def map_lines_back(lines: List[Tuple[int, int, str]], scale: float) -> List[Tuple[int, int, str]]:
+    """Riporta le coordinate verticali delle righe riconosciute all'immagine originale."""
+    if scale == 1.0:
+        return lines
+    return [(int(top / scale), int(round(bottom / scale)), text) for top, bottom, text in lines]
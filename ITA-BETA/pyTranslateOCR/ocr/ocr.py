@@ -1,10 +1,14 @@
-from .tesseract import tesseract_ocr
+from .tesseract import tesseract_ocr, tesseract_ocr_lines
+from .dirty_regions import DirtyRegionOCR, is_available as dirty_regions_available
+from .change_detect import load_watch_settings
+from .preprocess import run_filter_chain, get_preprocess_settings, is_available as preprocess_available
+from .normalize import normalize_image, map_lines_back
 from language_utils import get_tesseract_languages
 from .umi import umi_ocr, umi_ocr_server, get_umi_languages
-from PIL import ImageGrab
-import os
+from .capture import get_screen_capture
 import sys
 import logging
+from metrics import span, get_metrics
 from language_utils import get_ocr_languages
 
 # logging.basicConfig(level=logging.DEBUG)
@@ -19,6 +23,13 @@ LANGUAGE_AFFINITY = {
     # Aggiungi altre mappature se necessario
 }
 
+# Motori OCR supportati da perform_ocr
+OCR_ENGINES = ('Tesseract', 'Umi-OCR_server', 'Umi-OCR')
+
+# OCR delle sole bande cambiate per le aree catturate ripetutamente (solo Tesseract)
+_watch_settings = load_watch_settings()
+_dirty_ocr = DirtyRegionOCR(tile_size=_watch_settings['tile_size'])
+
 def get_affine_language(lang: str, supported_langs: list) -> str:
     """
     Restituisce una lingua supportata affine a quella richiesta.
@@ -37,36 +48,75 @@ def get_affine_language(lang: str, supported_langs: list) -> str:
     logging.warning(f"Nessuna lingua affine trovata per {lang}, usato fallback 'en'")
     return 'en' if 'en' in supported_langs else supported_langs[0]
 
-def capture_screenshot(area, output_path="ocrqt.png"):
-    left, top, width, height = area
-    right = left + width
-    bottom = top + height
-    screenshot = ImageGrab.grab(bbox=(left, top, right, bottom))
-    screenshot.save(output_path)
-    logging.debug(f"Screenshot salvato in: {output_path}")
-    return output_path
+def capture_screenshot(area):
+    """
+    Cattura l'area dello schermo indicata e la restituisce in memoria.
+    Args:
+        area: Lista [left, top, width, height].
+    Returns:
+        Image: Immagine PIL catturata.
+    """
+    with span('capture'):
+        screenshot = get_screen_capture().grab(area)
+    logging.debug(f"Screenshot catturato: {screenshot.size}")
+    return screenshot
 
-def preprocess_image(input_path, output_path, contrast, sharpness, invert):
-    from PIL import Image, ImageEnhance, ImageFilter
+def preprocess_image(img, contrast, sharpness, invert):
+    """
+    Pre-elabora l'immagine in memoria per migliorare l'OCR.
+    Con NumPy usa la catena di filtri di ocr/preprocess.py (opzioni in [Preprocess]),
+    altrimenti i filtri di PIL.
+    Args:
+        img: Immagine PIL da elaborare.
+        contrast: Fattore di contrasto.
+        sharpness: Intensità della maschera di contrasto (0 disabilita il filtro).
+        invert: Se True, inverte i colori.
+    Returns:
+        Image: Immagine PIL elaborata.
+    """
     logging.info(f"Pre-elaborazione immagine: contrasto={contrast}, nitidezza={sharpness}, inverti={invert}")
-    with Image.open(input_path) as img:
-        img = img.convert('L')
-        enhancer = ImageEnhance.Contrast(img)
-        img = enhancer.enhance(contrast)
-        if sharpness > 0:
-            img = img.filter(ImageFilter.SHARPEN)
-        if invert:
-            img = Image.eval(img, lambda x: 255 - x)
-        img.save(output_path)
-        logging.info(f"Immagine salvata in {output_path}")
+    if preprocess_available():
+        img, timings = run_filter_chain(img, contrast, sharpness, invert)
+        # Una misura per fase (es. preprocess:otsu), visibile in Diagnostica e nelle esportazioni
+        metrics = get_metrics()
+        for stage, ms in timings.items():
+            metrics.observe(f'preprocess:{stage}', ms)
+        return img
+    from PIL import ImageEnhance, ImageFilter, ImageOps
+    img = img.convert('L')
+    enhancer = ImageEnhance.Contrast(img)
+    img = enhancer.enhance(contrast)
+    if sharpness > 0:
+        img = img.filter(ImageFilter.UnsharpMask(radius=2, percent=int(sharpness * 100), threshold=2))
+    if invert:
+        img = ImageOps.invert(img)
+    return img
 
 def perform_ocr(ocr_engine, umi_ocr_path, tesseract_path, area, language_code,
-                enhance_image, contrast, sharpness, invert):
+                enhance_image, contrast, sharpness, invert, image=None, area_key=None,
+                raise_errors=False):
+    """
+    Esegue l'OCR dell'area indicata con il motore scelto.
+    Args:
+        image: Cattura già disponibile dell'area (es. modalità "Osserva"); se None viene acquisita.
+               Ignorata da Umi-OCR, che cattura lo schermo da sé.
+        area_key: Identificativo dell'area catturata ripetutamente ("Osserva"); con Tesseract
+                  abilita l'OCR delle sole regioni cambiate rispetto alla cattura precedente.
+                  None per i job singoli.
+        raise_errors: Se True gli errori vengono sollevati invece di restituire "" o il
+                      messaggio di errore (es. servizio e batch senza interfaccia).
+    Returns:
+        str: Testo riconosciuto ("" in caso di errore).
+    Raises:
+        ValueError: Solo con raise_errors, se il motore non è valido o l'OCR fallisce.
+    """
     try:
         logging.debug(f"Parametri OCR: engine={ocr_engine}, area={area}, lang={language_code}, "
                       f"enhance={enhance_image}, contrast={contrast}, sharpness={sharpness}, invert={invert}")
         if ocr_engine == 'Umi-OCR' and sys.platform.startswith('linux'):
             logging.error("Umi-OCR non supportato su Linux")
+            if raise_errors:
+                raise ValueError("Umi-OCR non supportato su Linux. Usa Umi-OCR_server o Tesseract.")
             return "Errore: Umi-OCR non supportato su Linux. Usa Umi-OCR_server o Tesseract."
         
         # Ottieni le lingue supportate e seleziona una lingua affine se necessario
@@ -74,21 +124,61 @@ def perform_ocr(ocr_engine, umi_ocr_path, tesseract_path, area, language_code,
         effective_lang = get_affine_language(language_code, supported_langs)
         logging.debug(f"Lingua effettiva usata per OCR: {effective_lang}")
 
-        screenshot_path = capture_screenshot(area)
-        if enhance_image:
-            preprocess_image(screenshot_path, screenshot_path, contrast, sharpness, invert)
         if ocr_engine == 'Umi-OCR':
-            result = umi_ocr(umi_ocr_path, area)
-        elif ocr_engine == 'Umi-OCR_server':
-            result = umi_ocr_server(screenshot_path, effective_lang)
-        elif ocr_engine == 'Tesseract':
-            result = tesseract_ocr(screenshot_path, effective_lang, tesseract_path)
-        else:
-            result = "Errore: motore OCR non riconosciuto."
-        if os.path.exists(screenshot_path):
-            os.unlink(screenshot_path)
-            logging.debug(f"Screenshot rimosso: {screenshot_path}")
+            # Umi-OCR cattura lo schermo da sé
+            with span('ocr', ocr_engine, effective_lang) as s:
+                result = umi_ocr(umi_ocr_path, area)
+                s.set(chars=len(result))
+            if raise_errors and result.startswith("Errore"):
+                raise ValueError(result)
+            return result
+        screenshot = image if image is not None else capture_screenshot(area)
+        normalize = get_preprocess_settings()['normalize']
+
+        def prepare(img):
+            # Porta il testo all'altezza ottimale del motore, poi applica i filtri
+            scale = 1.0
+            if normalize:
+                with span('normalize', ocr_engine):
+                    img, scale = normalize_image(img, ocr_engine)
+            if enhance_image:
+                with span('preprocess', ocr_engine):
+                    img = preprocess_image(img, contrast, sharpness, invert)
+            return img, scale
+
+        if (area_key and ocr_engine == 'Tesseract' and _watch_settings['dirty_regions']
+                and dirty_regions_available()):
+            def read_text(img):
+                img, _ = prepare(img)
+                return tesseract_ocr(img, effective_lang, tesseract_path)
+
+            def read_lines(img):
+                img, scale = prepare(img)
+                return map_lines_back(tesseract_ocr_lines(img, effective_lang, tesseract_path), scale)
+            params = (tuple(area), effective_lang, enhance_image, contrast, sharpness, invert, normalize)
+            # Lo span comprende anche normalizzazione e filtri delle sole bande rilette
+            with span('ocr', ocr_engine, effective_lang, dirty_regions=True) as s:
+                result = _dirty_ocr.ocr(area_key, screenshot, read_text, read_lines, params)
+                s.set(chars=len(result))
+            return result
+        screenshot, _ = prepare(screenshot)
+        with span('ocr', ocr_engine, effective_lang) as s:
+            if ocr_engine == 'Umi-OCR_server':
+                result = umi_ocr_server(screenshot, effective_lang)
+                if raise_errors and result.startswith("Error:"):
+                    raise ValueError(f"Umi-OCR_server: {result}")
+            elif ocr_engine == 'Tesseract':
+                result = tesseract_ocr(screenshot, effective_lang, tesseract_path)
+            elif raise_errors:
+                raise ValueError(f"Motore OCR non riconosciuto: {ocr_engine}")
+            else:
+                result = "Errore: motore OCR non riconosciuto."
+            s.set(chars=len(result))
         return result
     except Exception as e:
         logging.error(f"Errore in perform_ocr: {e}", exc_info=True)
+        if raise_errors:
+            if isinstance(e, ValueError):
+                raise
+            raise ValueError(f"OCR fallito: {e}") from e
         return ""
\ No newline at end of file
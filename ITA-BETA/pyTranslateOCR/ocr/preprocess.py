@@ -0,0 +1,223 @@
+import os
+import time
+import logging
+import configparser
+from typing import Dict, Optional, Tuple
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Catena di filtri per la pre-elaborazione prima dell'OCR, vettorizzata con NumPy.
+# Ordine: scala di grigi -> LUT contrasto/gamma -> maschera di contrasto (unsharp) ->
+# inversione (manuale o automatica) -> binarizzazione (Otsu/Sauvola) -> riduzione rumore -> raddrizzamento.
+# Contrasto, nitidezza e inversione arrivano dalle impostazioni immagine della GUI,
+# le altre opzioni dalla sezione [Preprocess] di ocrqt.ini.
+
+BINARIZE_METHODS = ('none', 'otsu', 'sauvola')
+DESKEW_MAX_ANGLE = 5.0     # gradi esplorati in ciascun verso
+DESKEW_STEP = 0.25
+
+_settings = None
+
+def is_available() -> bool:
+    """True se NumPy è installato e la catena di filtri è utilizzabile."""
+    return np is not None
+
+def load_preprocess_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge le opzioni della catena di filtri dalla sezione [Preprocess].
+    Returns:
+        dict: gamma, unsharp_radius, binarize, sauvola_window, sauvola_k, denoise,
+              auto_invert, deskew e normalize.
+    """
+    settings = {'gamma': 1.0, 'unsharp_radius': 1.5, 'binarize': 'none', 'sauvola_window': 25,
+                'sauvola_k': 0.2, 'denoise': False, 'auto_invert': False, 'deskew': False,
+                'normalize': True}
+    if not os.path.isfile(ini_file):
+        return settings
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    if 'Preprocess' not in config:
+        return settings
+    try:
+        settings['gamma'] = max(0.1, config.getfloat('Preprocess', 'gamma', fallback=1.0))
+        settings['unsharp_radius'] = max(0.5, config.getfloat('Preprocess', 'unsharp_radius', fallback=1.5))
+        settings['sauvola_window'] = max(3, config.getint('Preprocess', 'sauvola_window', fallback=25))
+        settings['sauvola_k'] = config.getfloat('Preprocess', 'sauvola_k', fallback=0.2)
+        settings['denoise'] = config.getboolean('Preprocess', 'denoise', fallback=False)
+        settings['auto_invert'] = config.getboolean('Preprocess', 'auto_invert', fallback=False)
+        settings['deskew'] = config.getboolean('Preprocess', 'deskew', fallback=False)
+        settings['normalize'] = config.getboolean('Preprocess', 'normalize', fallback=True)
+    except ValueError as e:
+        logging.error(f"Errore nella sezione [Preprocess]: {e}, usando valori predefiniti")
+    binarize = config.get('Preprocess', 'binarize', fallback='none').strip().lower()
+    if binarize in BINARIZE_METHODS:
+        settings['binarize'] = binarize
+    else:
+        logging.error(f"Binarizzazione sconosciuta: {binarize}, uso 'none'")
+    return settings
+
+def get_preprocess_settings() -> dict:
+    """Restituisce le opzioni della catena di filtri, lette al primo utilizzo."""
+    global _settings
+    if _settings is None:
+        _settings = load_preprocess_settings()
+    return _settings
+
+def build_lut(contrast: float, gamma: float, mean: float):
+    """
+    Tabella di conversione a 256 valori che applica contrasto (attorno alla media,
+    come ImageEnhance.Contrast) e correzione gamma.
+    """
+    levels = np.arange(256, dtype=np.float32)
+    levels = mean + (levels - mean) * contrast
+    levels = np.clip(levels, 0, 255)
+    if gamma != 1.0:
+        levels = 255.0 * (levels / 255.0) ** gamma
+    return np.clip(levels + 0.5, 0, 255).astype(np.uint8)
+
+def _box_sum(padded, window: int):
+    # Somma su finestre window x window tramite immagine integrale
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=np.float64)
+    integral[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+    return (integral[window:, window:] - integral[:-window, window:]
+            - integral[window:, :-window] + integral[:-window, :-window])
+
+def box_blur(gray, radius: int):
+    """Media su una finestra quadrata di lato 2*radius+1, con bordi replicati."""
+    window = 2 * radius + 1
+    padded = np.pad(gray.astype(np.float64), radius, mode='edge')
+    return _box_sum(padded, window) / (window * window)
+
+def unsharp_mask(gray, strength: float, radius: float):
+    """
+    Maschera di contrasto: aggiunge `strength` volte la differenza tra l'immagine e una sua
+    sfocatura (tre passate di media, che approssimano una gaussiana di raggio `radius`).
+    """
+    box_radius = max(1, int(round(radius)))
+    blurred = gray.astype(np.float64)
+    for _ in range(3):
+        blurred = box_blur(blurred, box_radius)
+    sharpened = gray + strength * (gray - blurred)
+    return np.clip(sharpened, 0, 255).astype(np.uint8)
+
+def otsu_threshold(gray) -> int:
+    """Soglia di Otsu calcolata sull'istogramma dell'immagine."""
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    weight_bg = np.cumsum(histogram)
+    weight_fg = total - weight_bg
+    cumulative = np.cumsum(histogram * np.arange(256))
+    mean_bg = cumulative / np.maximum(weight_bg, 1)
+    mean_fg = (cumulative[-1] - cumulative) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+def sauvola_binarize(gray, window: int = 25, k: float = 0.2, dynamic_range: float = 128.0):
+    """
+    Binarizzazione adattiva di Sauvola: soglia locale m * (1 + k * (s / R - 1)),
+    con media e deviazione standard calcolate tramite immagini integrali.
+    """
+    window = window | 1
+    radius = window // 2
+    values = gray.astype(np.float64)
+    padded = np.pad(values, radius, mode='edge')
+    area = window * window
+    mean = _box_sum(padded, window) / area
+    mean_sq = _box_sum(padded * padded, window) / area
+    std = np.sqrt(np.maximum(mean_sq - mean * mean, 0))
+    threshold = mean * (1 + k * (std / dynamic_range - 1))
+    return np.where(values > threshold, 255, 0).astype(np.uint8)
+
+def median_denoise(gray):
+    """Filtro mediano 3x3: rimuove punti isolati lasciati dalla binarizzazione."""
+    padded = np.pad(gray, 1, mode='edge')
+    height, width = gray.shape
+    stack = np.stack([padded[dy:dy + height, dx:dx + width] for dy in range(3) for dx in range(3)])
+    return np.median(stack, axis=0).astype(np.uint8)
+
+def has_dark_background(gray) -> bool:
+    """True se lo sfondo (luminanza mediana) è scuro, cioè testo chiaro su fondo scuro."""
+    return float(np.median(gray)) < 128
+
+def estimate_skew(gray, max_angle: float = DESKEW_MAX_ANGLE, step: float = DESKEW_STEP) -> float:
+    """
+    Stima l'inclinazione del testo (gradi) massimizzando la nitidezza del profilo di
+    proiezione orizzontale dei pixel di inchiostro dopo una deformazione di taglio.
+    """
+    ys, xs = np.nonzero(gray < 128)
+    if len(ys) < 50:
+        return 0.0
+    if len(ys) > 20000:
+        keep = np.linspace(0, len(ys) - 1, 20000).astype(np.int64)
+        ys, xs = ys[keep], xs[keep]
+    best_angle, best_score = 0.0, -1.0
+    offset = gray.shape[1] * np.tan(np.radians(max_angle)) + 1
+    bins = int(gray.shape[0] + 2 * offset) + 1
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        shifted = ys - xs * np.tan(np.radians(angle)) + offset
+        profile = np.bincount(shifted.astype(np.int64), minlength=bins)
+        score = float(np.sum(profile.astype(np.float64) ** 2))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+def run_filter_chain(img: Image.Image, contrast: float, sharpness: float, invert: bool,
+                     settings: Optional[dict] = None) -> Tuple[Image.Image, Dict[str, float]]:
+    """
+    Applica la catena di filtri all'immagine.
+    Args:
+        img: Immagine PIL da elaborare.
+        contrast: Fattore di contrasto (1 = invariato).
+        sharpness: Intensità della maschera di contrasto (0 disabilita il filtro).
+        invert: Se True, inverte sempre i colori.
+        settings: Opzioni della catena (vedi load_preprocess_settings).
+    Returns:
+        Tuple[Image, Dict[str, float]]: Immagine elaborata e durata di ogni fase in millisecondi.
+    """
+    settings = settings or get_preprocess_settings()
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    def lap(stage: str):
+        nonlocal start
+        now = time.perf_counter()
+        timings[stage] = (now - start) * 1000
+        start = now
+
+    gray = np.asarray(img.convert('L'))
+    lap('grayscale')
+    if contrast != 1.0 or settings['gamma'] != 1.0:
+        gray = build_lut(contrast, settings['gamma'], float(gray.mean()))[gray]
+        lap('lut')
+    if sharpness > 0:
+        gray = unsharp_mask(gray, sharpness, settings['unsharp_radius'])
+        lap('unsharp')
+    if invert or (settings['auto_invert'] and has_dark_background(gray)):
+        gray = 255 - gray
+        lap('invert')
+    if settings['binarize'] == 'otsu':
+        gray = np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+        lap('otsu')
+    elif settings['binarize'] == 'sauvola':
+        gray = sauvola_binarize(gray, settings['sauvola_window'], settings['sauvola_k'])
+        lap('sauvola')
+    if settings['denoise']:
+        gray = median_denoise(gray)
+        lap('denoise')
+    result = Image.fromarray(gray)
+    if settings['deskew']:
+        angle = estimate_skew(gray)
+        if abs(angle) >= DESKEW_STEP:
+            # Riga che scende verso destra (angolo positivo): ruota in senso antiorario.
+            # Sfondo chiaro dopo un'eventuale inversione: riempi i bordi di bianco.
+            # Senza expand dimensioni e origine restano invariate, così le coordinate delle
+            # righe (OCR delle regioni cambiate) restano riferite alla cattura; con al massimo
+            # DESKEW_MAX_ANGLE gradi gli angoli tagliati sono trascurabili
+            result = result.rotate(angle, resample=Image.BICUBIC, fillcolor=255)
+        lap('deskew')
+    logging.debug("Pre-elaborazione: " + ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in timings.items()))
+    return result, timings
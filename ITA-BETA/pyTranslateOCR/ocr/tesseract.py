@@ -6,6 +6,24 @@ from PyQt5.QtWidgets import QFileDialog
 from PIL import Image
 import subprocess
 import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Handle API di Tesseract residenti per combinazione di lingue (es. 'eng', 'eng+ita').
+# Un handle elabora un'immagine alla volta: per le aree elaborate in parallelo se ne
+# creano fino a TESSEROCR_MAX_APIS per combinazione.
+TESSEROCR_MAX_APIS = 3
+_TESSEROCR_APIS = {}       # lingua -> lista di handle
+_TESSEROCR_IDLE = {}       # lingua -> lista di handle liberi
+_TESSEROCR_CREATING = {}   # lingua -> handle in fase di inizializzazione (posti riservati)
+_TESSEROCR_GLOBAL_LOCK = threading.Condition()
+# Combinazioni di lingue per cui l'inizializzazione in-process è fallita
+_TESSEROCR_FAILED = set()
 
 def find_tesseract_path():
     tesseract_path = shutil.which("tesseract")
@@ -36,26 +54,189 @@ def find_tesseract_path():
         return None
     return tesseract_path
 
-def tesseract_ocr(image_path, language_code, tesseract_path: str = ''):
+def _create_tesserocr_api(lang: str):
+    tessdata_path = os.environ.get('TESSDATA_PREFIX')
+    if tessdata_path:
+        return tesserocr.PyTessBaseAPI(path=tessdata_path, lang=lang)
+    return tesserocr.PyTessBaseAPI(lang=lang)
+
+def _acquire_tesserocr_api(lang: str):
+    """
+    Prende un handle libero per la combinazione di lingue o ne crea uno nuovo.
+    Il posto del nuovo handle viene riservato sotto il lock, mentre il caricamento dei
+    traineddata (centinaia di ms) avviene fuori, senza bloccare le altre lingue.
+    Returns:
+        L'handle API, oppure None se tesserocr non è utilizzabile per la lingua.
+    """
+    while True:
+        with _TESSEROCR_GLOBAL_LOCK:
+            while True:
+                if lang in _TESSEROCR_FAILED:
+                    return None
+                idle = _TESSEROCR_IDLE.setdefault(lang, [])
+                if idle:
+                    return idle.pop()
+                creating = _TESSEROCR_CREATING.get(lang, 0)
+                if len(_TESSEROCR_APIS.setdefault(lang, [])) + creating < TESSEROCR_MAX_APIS:
+                    _TESSEROCR_CREATING[lang] = creating + 1
+                    break
+                _TESSEROCR_GLOBAL_LOCK.wait()
+        api = None
+        try:
+            api = _create_tesserocr_api(lang)
+        except Exception as e:
+            logging.warning(f"Inizializzazione tesserocr fallita per '{lang}', uso pytesseract: {e}")
+        with _TESSEROCR_GLOBAL_LOCK:
+            _TESSEROCR_CREATING[lang] -= 1
+            _TESSEROCR_GLOBAL_LOCK.notify_all()
+            apis = _TESSEROCR_APIS.setdefault(lang, [])
+            if api is not None:
+                apis.append(api)
+                logging.debug(f"API tesserocr inizializzata per la lingua: {lang} ({len(apis)})")
+                return api
+            if not apis and not _TESSEROCR_CREATING[lang]:
+                _TESSEROCR_FAILED.add(lang)
+                return None
+            # Altri handle esistono già (o sono in creazione): attendi che se ne liberi uno
+            if not _TESSEROCR_IDLE.get(lang):
+                _TESSEROCR_GLOBAL_LOCK.wait()
+
+@contextmanager
+def _tesserocr_api(lang: str):
+    """
+    Fornisce in uso esclusivo un handle API tesserocr già inizializzato per la combinazione
+    di lingue, creandolo al primo utilizzo (fino a TESSEROCR_MAX_APIS handle per lingua).
+    Al rilascio l'handle viene ripulito (anche dopo un errore) e torna tra quelli liberi.
+    Args:
+        lang: Codice lingua Tesseract (es. 'eng' o 'eng+ita').
+    Yields:
+        L'handle API, oppure None se tesserocr non è utilizzabile.
+    """
+    if tesserocr is None or lang in _TESSEROCR_FAILED:
+        yield None
+        return
+    api = _acquire_tesserocr_api(lang)
+    if api is None:
+        yield None
+        return
+    try:
+        yield api
+    finally:
+        try:
+            api.Clear()
+            reusable = True
+        except Exception as e:
+            logging.error(f"Errore nella pulizia dell'API tesserocr '{lang}': {e}")
+            reusable = False
+        with _TESSEROCR_GLOBAL_LOCK:
+            apis = _TESSEROCR_APIS.get(lang, [])
+            # Se nel frattempo gli handle sono stati chiusi, questo non va restituito
+            keep = reusable and api in apis
+            if keep:
+                _TESSEROCR_IDLE.setdefault(lang, []).append(api)
+            elif api in apis:
+                apis.remove(api)
+            _TESSEROCR_GLOBAL_LOCK.notify_all()
+        if not keep:
+            try:
+                api.End()
+            except Exception as e:
+                logging.error(f"Errore nella chiusura dell'API tesserocr '{lang}': {e}")
+
+def _to_pil_image(image):
+    """
+    Converte l'input (percorso, immagine PIL o array NumPy) in un'immagine PIL.
+    """
+    if isinstance(image, Image.Image):
+        return image
+    if isinstance(image, (str, bytes, os.PathLike)):
+        with Image.open(image) as img:
+            img.load()
+            return img.copy()
+    # Array NumPy (o oggetto compatibile con l'interfaccia array)
+    return Image.fromarray(image)
+
+def close_tesseract_apis():
+    """
+    Libera gli handle API tesserocr residenti (quelli in uso vengono liberati al rilascio).
+    """
+    with _TESSEROCR_GLOBAL_LOCK:
+        for lang, idle in _TESSEROCR_IDLE.items():
+            for api in idle:
+                try:
+                    api.End()
+                except Exception as e:
+                    logging.error(f"Errore nella chiusura dell'API tesserocr '{lang}': {e}")
+        _TESSEROCR_APIS.clear()
+        _TESSEROCR_IDLE.clear()
+        _TESSEROCR_FAILED.clear()
+        _TESSEROCR_GLOBAL_LOCK.notify_all()
+    logging.debug("API tesserocr rilasciate")
+
+def tesseract_ocr(image, language_code, tesseract_path: str = ''):
     """
     Esegue l'OCR con Tesseract.
+    Usa un'istanza tesserocr residente (se installato) riutilizzata tra le chiamate,
+    altrimenti ripiega su pytesseract.
     Args:
-        image_path: Percorso dell'immagine.
+        image: Immagine PIL, array NumPy o percorso dell'immagine.
         language_code: Codice lingua normalizzato (es. 'en').
-        tesseract_path: Percorso dell'eseguibile Tesseract.
+        tesseract_path: Percorso dell'eseguibile Tesseract (usato solo da pytesseract).
     Returns:
         str: Testo estratto.
     """
-    LANGUAGE_MAP = {
-        'en': 'eng', 'it': 'ita', 'fr': 'fra', 'de': 'deu', 'es': 'spa',
-        'ja': 'jpn', 'ko': 'kor', 'zh': 'chi_sim', 'ru': 'rus', 'pt': 'por',
-        'nl': 'nld', 'tr': 'tur', 'ar': 'ara', 'hi': 'hin', 'he': 'heb',
-        'el': 'ell', 'pl': 'pol', 'sv': 'swe', 'ro': 'ron',
-    }
-    lang = LANGUAGE_MAP.get(language_code, language_code)
+    lang = '+'.join(map_to_tesseract_language(code) for code in language_code.split('+'))
+    pil_image = _to_pil_image(image)
+    with _tesserocr_api(lang) as api:
+        if api is not None:
+            try:
+                api.SetImage(pil_image)
+                return api.GetUTF8Text()
+            except Exception as e:
+                logging.warning(f"Errore OCR con tesserocr, uso pytesseract: {e}")
+    if tesseract_path:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    return pytesseract.image_to_string(pil_image, lang=lang)
+
+def tesseract_ocr_lines(image, language_code, tesseract_path: str = ''):
+    """
+    Esegue l'OCR con Tesseract restituendo le singole righe con la loro posizione verticale.
+    Args:
+        image: Immagine PIL, array NumPy o percorso dell'immagine.
+        language_code: Codice lingua normalizzato (es. 'en').
+        tesseract_path: Percorso dell'eseguibile Tesseract (usato solo da pytesseract).
+    Returns:
+        list: Tuple (top, bottom, testo) ordinate dall'alto verso il basso.
+    """
+    lang = '+'.join(map_to_tesseract_language(code) for code in language_code.split('+'))
+    pil_image = _to_pil_image(image)
+    with _tesserocr_api(lang) as api:
+        if api is not None:
+            try:
+                lines = []
+                api.SetImage(pil_image)
+                for _, box, _, _ in api.GetComponentImages(tesserocr.RIL.TEXTLINE, True):
+                    api.SetRectangle(box['x'], box['y'], box['w'], box['h'])
+                    text = api.GetUTF8Text().strip()
+                    if text:
+                        lines.append((box['y'], box['y'] + box['h'], text))
+                return sorted(lines)
+            except Exception as e:
+                logging.warning(f"Errore OCR per righe con tesserocr, uso pytesseract: {e}")
     if tesseract_path:
         pytesseract.pytesseract.tesseract_cmd = tesseract_path
-    return pytesseract.image_to_string(Image.open(image_path), lang=lang)
+    data = pytesseract.image_to_data(pil_image, lang=lang, output_type=pytesseract.Output.DICT)
+    grouped = {}
+    for i, word in enumerate(data['text']):
+        if not word.strip():
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        top, height = data['top'][i], data['height'][i]
+        line = grouped.setdefault(key, [top, top + height, []])
+        line[0] = min(line[0], top)
+        line[1] = max(line[1], top + height)
+        line[2].append(word)
+    return sorted((top, bottom, ' '.join(words)) for top, bottom, words in grouped.values())
 
 def map_to_tesseract_language(lang_code):
     """
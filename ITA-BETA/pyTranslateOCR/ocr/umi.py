@@ -1,10 +1,13 @@
 import os
 import subprocess
-import requests
+import transport
 import base64
+import io
 import json
 import logging
 
+UMI_SERVER_URL = "http://127.0.0.1:1224"
+
 # Lista statica delle lingue supportate da Umi-OCR
 UMI_LANGUAGES = [
     'af', 'sq', 'az', 'be', 'bs', 'bg', 'ca', 'hr', 'cs', 'da', 'nl', 'en', 'eo',
@@ -41,7 +44,22 @@ def umi_ocr(umi_ocr_path, area):
         return "Errore: il file di output non è stato creato."
     return f"Errore nell'OCR: {stderr}"
 
-def umi_ocr_server(image_path, language_code):
+def encode_image_base64(image) -> str:
+    """
+    Codifica un'immagine in PNG base64 per il payload di Umi-OCR server.
+    Args:
+        image: Immagine PIL o percorso dell'immagine.
+    Returns:
+        str: Immagine codificata in base64.
+    """
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as image_file:
+            return base64.b64encode(image_file.read()).decode('utf-8')
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+def umi_ocr_server(image, language_code):
     LANGUAGE_CONFIG_MAP = {
         "zh": "models/config_chinese.txt",
         "en": "models/config_en.txt",
@@ -50,10 +68,9 @@ def umi_ocr_server(image_path, language_code):
         "ko": "models/config_korean.txt",
         "ru": "models/config_cyrillic.txt"
     }
-    url = "http://127.0.0.1:1224/api/ocr"
+    url = f"{UMI_SERVER_URL}/api/ocr"
     language_config = LANGUAGE_CONFIG_MAP.get(language_code, "models/config_en.txt")
-    with open(image_path, "rb") as image_file:
-        image_base64 = base64.b64encode(image_file.read()).decode('utf-8')
+    image_base64 = encode_image_base64(image)
     payload = {
         "base64": image_base64,
         "options": {
@@ -64,7 +81,7 @@ def umi_ocr_server(image_path, language_code):
             "data.format": "dict"
         }
     }
-    response = requests.post(url, json=payload)
+    response = transport.post(url, json=payload, timeout=transport.get_settings()['ocr_timeout'])
     if response.status_code == 200:
         ocr_result = response.json()
         return "\n".join([item['text'] for item in ocr_result.get('data', [])])
@@ -0,0 +1,367 @@
+import os
+import re
+import json
+import time
+import cProfile
+import logging
+import threading
+import itertools
+from contextlib import contextmanager
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from ocr.ocr import perform_ocr, capture_screenshot
+from ocr.change_detect import ChangeDetector, load_watch_settings
+from translation.translate import translate_text
+from translation.incremental import translate_incremental
+from tts import speak
+from areas import bounding_rect, crop_area
+from metrics import get_metrics, load_metrics_settings
+
+# Pipeline OCR -> traduzione -> TTS eseguita fuori dal thread della GUI (il TTS ha un thread proprio).
+# Ogni richiesta è un PipelineJob; una nuova richiesta per la stessa area annulla quelle
+# precedenti ancora in corso, i cui risultati vengono scartati.
+
+PIPELINE_MAX_THREADS = 4
+
+_job_ids = itertools.count(1)
+
+# Rilevatore condiviso dai job della modalità "Osserva"
+_watch_settings = load_watch_settings()
+change_detector = ChangeDetector(_watch_settings['hash_threshold'], _watch_settings['diff_threshold'])
+
+# Ultima cattura elaborata, salvata alla chiusura per `main.py --bench`. Contiene lo schermo
+# dell'utente: viene conservata solo se richiesto (--keep-capture, --profile o
+# keep_last_capture in [Metrics])
+LAST_CAPTURE_FILE = 'ocrqt_last_capture.png'
+LAST_CAPTURE_PARAMS = ('ocr_engine', 'umi_ocr_path', 'tesseract_path', 'ocr_lang', 'enhance_image',
+                       'contrast', 'sharpness', 'invert', 'translate_engine', 'source_lang',
+                       'target_lang', 'unique_text', 'translate_locally_path')
+_last_capture = None
+_last_capture_lock = threading.Lock()
+_keep_last_capture = load_metrics_settings()['keep_last_capture']
+
+# Cartella dei profili dei job (`main.py --profile DIR`), None se disattivato
+_profile_dir = None
+
+class JobCancelled(Exception):
+    """Il job è stato superato da una richiesta più recente per la stessa area."""
+
+class PipelineJob:
+    """
+    Istantanea dei parametri di una richiesta OCR/traduzione.
+    Args:
+        area_key: Identificativo dell'area (es. 'area_temp', 'fixed_area').
+        area: Rettangolo [left, top, width, height] da catturare.
+        params: Impostazioni lette dalla GUI al momento della richiesta.
+        text: Testo già disponibile (salta la cattura e l'OCR, es. Ri-Traduci).
+        watch: Job della modalità "Osserva": OCR e traduzione solo se la cattura è cambiata.
+        image: Cattura già disponibile dell'area (es. ritaglio di una cattura multi-area).
+    """
+
+    def __init__(self, area_key: str, area, params: dict, text: str = None, watch: bool = False,
+                 image=None):
+        self.job_id = next(_job_ids)
+        self.area_key = area_key
+        self.area = list(area) if area is not None else None
+        self.params = params
+        self.text = text
+        self.watch = watch
+        self.image = image
+        self.ocr_text = ''
+        self.translated_text = ''
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+class PipelineSignals(QObject):
+    progress = pyqtSignal(int, str, str)          # job_id, area_key, fase
+    ocr_done = pyqtSignal(int, str, str)          # job_id, area_key, testo OCR
+    translation_done = pyqtSignal(int, str, str)  # job_id, area_key, traduzione
+    failed = pyqtSignal(int, str, str)            # job_id, area_key, errore
+
+def enable_profiling(directory: str):
+    """
+    Profila ogni job della pipeline con cProfile, scrivendo un file .prof per job
+    (leggibile con pstats, snakeviz o gprof2dot).
+    Args:
+        directory: Cartella di destinazione (creata se non esiste).
+    """
+    global _profile_dir
+    os.makedirs(directory, exist_ok=True)
+    _profile_dir = directory
+    logging.info(f"Profilazione dei job attiva: {os.path.abspath(directory)}")
+
+@contextmanager
+def _profiled(job: 'PipelineJob'):
+    if _profile_dir is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12+: un solo profiler attivo alla volta (job in parallelo)
+        logging.debug(f"Job {job.job_id} non profilato: {e}")
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        area = re.sub(r'[^\w.-]', '_', job.area_key)
+        path = os.path.join(_profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_job{job.job_id:05d}_{area}.prof")
+        try:
+            profiler.dump_stats(path)
+            logging.debug(f"Profilo del job {job.job_id} scritto in {path}")
+        except OSError as e:
+            logging.error(f"Impossibile scrivere il profilo {path}: {e}")
+
+def enable_last_capture():
+    """Conserva l'ultima cattura elaborata, da salvare alla chiusura con save_last_capture."""
+    global _keep_last_capture
+    _keep_last_capture = True
+    logging.info(f"L'ultima cattura verrà salvata alla chiusura in {os.path.abspath(LAST_CAPTURE_FILE)}")
+
+def _remember_capture(image, area, params: dict):
+    global _last_capture
+    with _last_capture_lock:
+        _last_capture = (image, list(area), {key: params.get(key) for key in LAST_CAPTURE_PARAMS})
+
+def save_last_capture(path: str = LAST_CAPTURE_FILE) -> bool:
+    """
+    Salva l'ultima cattura elaborata (PNG) e i relativi parametri (JSON accanto).
+    Returns:
+        bool: True se una cattura è stata salvata.
+    """
+    with _last_capture_lock:
+        last = _last_capture
+    if last is None:
+        return False
+    image, area, params = last
+    try:
+        image.save(path, format='PNG')
+        with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'area': area, 'params': params}, f, ensure_ascii=False, indent=2)
+        logging.debug(f"Ultima cattura salvata in {path}")
+        return True
+    except OSError as e:
+        logging.error(f"Impossibile salvare l'ultima cattura: {e}")
+        return False
+
+def load_last_capture(path: str = LAST_CAPTURE_FILE):
+    """
+    Carica la cattura salvata da save_last_capture.
+    Returns:
+        Optional[Tuple[Image, list, dict]]: Immagine, area e parametri, None se assente.
+    """
+    from PIL import Image
+    meta_path = os.path.splitext(path)[0] + '.json'
+    if not (os.path.isfile(path) and os.path.isfile(meta_path)):
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    with Image.open(path) as img:
+        image = img.convert('RGB')
+    return image, meta['area'], meta['params']
+
+class PipelineRunnable(QRunnable):
+    def __init__(self, job: PipelineJob, signals: PipelineSignals, on_done, is_current=None):
+        super().__init__()
+        self.job = job
+        self.signals = signals
+        self.on_done = on_done
+        self.is_current = is_current
+
+    def run(self):
+        job = self.job
+        try:
+            with _profiled(job):
+                run_job(job, self.signals, self.is_current)
+        except JobCancelled:
+            logging.debug(f"Job {job.job_id} ({job.area_key}) annullato")
+        except Exception as e:
+            logging.error(f"Errore nel job {job.job_id} ({job.area_key}): {e}", exc_info=True)
+            if not job.cancelled:
+                self.signals.failed.emit(job.job_id, job.area_key, str(e))
+        finally:
+            self.on_done(job)
+
+class MultiAreaRunnable(QRunnable):
+    """
+    Cattura una sola volta il rettangolo che contiene tutte le aree, poi accoda un job
+    per ogni area con il relativo ritaglio.
+    """
+
+    def __init__(self, manager, areas: dict, params: dict, signals: PipelineSignals):
+        super().__init__()
+        self.manager = manager
+        self.areas = areas
+        self.params = params
+        self.signals = signals
+
+    def run(self):
+        try:
+            frame_rect = bounding_rect(self.areas.values())
+            frame = capture_screenshot(frame_rect)
+        except Exception as e:
+            logging.error(f"Errore nella cattura multi-area: {e}", exc_info=True)
+            self.signals.failed.emit(0, 'multi', str(e))
+            return
+        logging.debug(f"Cattura multi-area {frame_rect}: {len(self.areas)} aree")
+        for name, area in self.areas.items():
+            self.manager.submit(PipelineJob(area_key_for(name), area, self.params,
+                                            image=crop_area(frame, frame_rect, area)))
+
+def area_key_for(name: str) -> str:
+    """Identificativo della pipeline per un'area con nome."""
+    return f"area:{name}"
+
+def run_job(job: PipelineJob, signals: PipelineSignals, is_current=None):
+    """
+    Esegue le fasi del job, controllando l'annullamento tra una fase e l'altra.
+    Args:
+        is_current: Funzione (job_id, area_key) -> bool che indica se il job è ancora il più
+                    recente per la sua area; il testo da leggere con il TTS viene scartato
+                    se non lo è più quando arriva il suo turno.
+    """
+    p = job.params
+    start = time.perf_counter()
+    if job.text is None:
+        image = job.image
+        if job.watch:
+            if image is None:
+                image = capture_screenshot(job.area)
+            # Il riferimento viene aggiornato solo a job riuscito: se fallisce o viene
+            # annullato, la stessa cattura risulta ancora cambiata al giro successivo
+            if not change_detector.has_changed(job.area_key, image, job.area, commit=False):
+                return
+        if _keep_last_capture:
+            if image is None and p['ocr_engine'] != 'Umi-OCR':
+                # Umi-OCR cattura lo schermo da sé; per gli altri motori la cattura avviene qui
+                # così da poterla conservare per `main.py --bench`
+                image = capture_screenshot(job.area)
+            if image is not None:
+                _remember_capture(image, job.area, p)
+        signals.progress.emit(job.job_id, job.area_key, "OCR")
+        job.ocr_text = perform_ocr(p['ocr_engine'], p['umi_ocr_path'], p['tesseract_path'],
+                                   job.area, p['ocr_lang'], p['enhance_image'],
+                                   p['contrast'], p['sharpness'], p['invert'], image=image,
+                                   # Solo le catture ripetute di "Osserva" riusano il testo
+                                   # precedente; i job singoli (anche multi-area) leggono tutto
+                                   area_key=job.area_key if job.watch else None)
+        if not job.ocr_text:
+            logging.warning("Nessun testo estratto dall'OCR")
+        job.check()
+        signals.ocr_done.emit(job.job_id, job.area_key, job.ocr_text)
+    else:
+        job.ocr_text = job.text
+
+    signals.progress.emit(job.job_id, job.area_key, "Traduzione")
+    if p.get('incremental'):
+        job.translated_text = translate_incremental(job.area_key, p['translate_engine'], job.ocr_text,
+                                                    p['source_lang'], p['target_lang'],
+                                                    p['unique_text'], p['translate_locally_path'])
+    else:
+        job.translated_text = translate_text(p['translate_engine'], job.ocr_text,
+                                             p['source_lang'], p['target_lang'],
+                                             p['unique_text'], p['translate_locally_path'],
+                                             use_memory=p.get('use_memory', True))
+    job.check()
+    if job.watch:
+        change_detector.commit(job.area_key)
+    signals.translation_done.emit(job.job_id, job.area_key, job.translated_text)
+
+    # Durata dall'avvio del job alla traduzione (il TTS ha uno span proprio)
+    get_metrics().observe('pipeline', (time.perf_counter() - start) * 1000, p['ocr_engine'],
+                          f"{p['source_lang']}>{p['target_lang']}", len(job.ocr_text))
+
+    if p.get('tts_enabled') and job.translated_text.strip():
+        # Letto dal thread del TTS: il job termina subito e il testo viene scartato se nel
+        # frattempo una richiesta più recente per la stessa area lo ha superato
+        speak(job.translated_text, p['tts_rate'], p['tts_voice'],
+              is_current=lambda: not job.cancelled and (is_current is None or is_current(job.job_id, job.area_key)))
+
+class PipelineManager(QObject):
+    """
+    Distribuisce i job su un QThreadPool e tiene traccia dell'ultimo job per ogni area.
+    """
+
+    def __init__(self, parent=None, max_threads: int = PIPELINE_MAX_THREADS):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.signals = PipelineSignals(self)
+        self._lock = threading.Lock()
+        self._active = {}  # area_key -> lista di job in corso
+        self._latest = {}  # area_key -> id dell'ultimo job richiesto
+
+    def submit(self, job: PipelineJob) -> PipelineJob:
+        """
+        Accoda il job, annullando i job precedenti ancora in corso per la stessa area.
+        """
+        with self._lock:
+            previous = self._active.setdefault(job.area_key, [])
+            for old_job in previous:
+                old_job.cancel()
+                logging.debug(f"Job {old_job.job_id} ({job.area_key}) superato dal job {job.job_id}")
+            previous.append(job)
+            self._latest[job.area_key] = job.job_id
+        self.pool.start(PipelineRunnable(job, self.signals, self._job_done, self.is_current))
+        return job
+
+    def submit_multi(self, areas: dict, params: dict):
+        """
+        Elabora più aree con nome in parallelo partendo da un'unica cattura dello schermo.
+        Args:
+            areas: Nome -> [left, top, width, height].
+            params: Impostazioni comuni a tutte le aree.
+        """
+        if not areas:
+            return
+        with self._lock:
+            # Annulla subito le elaborazioni precedenti: i nuovi job arriveranno dopo la cattura
+            for name in areas:
+                key = area_key_for(name)
+                self._latest.pop(key, None)
+                for old_job in self._active.get(key, []):
+                    old_job.cancel()
+        self.pool.start(MultiAreaRunnable(self, dict(areas), params, self.signals))
+
+    def _job_done(self, job: PipelineJob):
+        with self._lock:
+            jobs = self._active.get(job.area_key, [])
+            if job in jobs:
+                jobs.remove(job)
+
+    def is_current(self, job_id: int, area_key: str) -> bool:
+        """True se il job è il più recente richiesto per la sua area."""
+        with self._lock:
+            return self._latest.get(area_key) == job_id
+
+    def is_busy(self, area_key: str = None) -> bool:
+        """True se ci sono job in corso (per l'area indicata o per qualsiasi area)."""
+        with self._lock:
+            if area_key is not None:
+                return bool(self._active.get(area_key))
+            return any(self._active.values())
+
+    def cancel_all(self):
+        with self._lock:
+            self._latest.clear()
+            for jobs in self._active.values():
+                for job in jobs:
+                    job.cancel()
+
+    def shutdown(self, timeout_ms: int = 2000):
+        """Annulla i job in corso e attende la fine dei thread."""
+        self.cancel_all()
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
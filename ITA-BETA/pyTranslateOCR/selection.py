@@ -3,7 +3,7 @@ import sys
 import os
 import argparse
 import configparser
-from PyQt5.QtCore import Qt, QRect, QRectF
+from PyQt5.QtCore import Qt, QRect, QRectF, pyqtSignal
 from PyQt5.QtGui import QColor, QPen, QFont
 from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsRectItem, QGraphicsTextItem, QApplication
 
@@ -38,11 +38,33 @@ def load_preferences(ini_file: str, section: str) -> tuple:
         logging.error(f"Errore nel caricamento delle preferenze: {e}")
         return default_preferences()
 
+def save_area_to_ini(ini_file: str, section: str, area: list):
+    """
+    Salva l'area selezionata nella sezione [Settings] del file INI (uso da riga di comando).
+    """
+    config = configparser.ConfigParser()
+    if os.path.exists(ini_file):
+        config.read(ini_file)
+    if 'Settings' not in config:
+        config['Settings'] = {}
+    config['Settings'][section] = str(area)
+    with open(ini_file, 'w') as f:
+        config.write(f)
+    logging.info(f"Area salvata in {ini_file} [{section}]: {area}")
+
 class SelectionView(QGraphicsView):
-    def __init__(self, ini_file="ocrqt.ini", section="area_temp"):
+    """
+    Finestra trasparente a schermo intero per selezionare un'area con il mouse.
+    Può essere creata una volta e riutilizzata con start(): l'area viene restituita
+    con il segnale area_selected ([left, top, width, height]).
+    """
+    area_selected = pyqtSignal(str, list)   # sezione, area
+    selection_cancelled = pyqtSignal(str)   # sezione
+
+    def __init__(self, section="area_temp"):
         super().__init__()
-        self.ini_file = ini_file
         self.section = section
+        self._selected = False
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setWindowOpacity(0.5)
@@ -77,6 +99,23 @@ class SelectionView(QGraphicsView):
         self.setFocusPolicy(Qt.StrongFocus)
         logging.debug("SelectionView inizializzato")
 
+    def start(self, section=None):
+        """
+        Mostra la finestra di selezione, azzerando la selezione precedente.
+        Args:
+            section: Area da selezionare ('area_temp' o 'fixed_area').
+        """
+        if section is not None:
+            self.section = section
+        self._selected = False
+        self.start_point = None
+        self.end_point = None
+        self.rect_item.setRect(QRectF())
+        self.rect_item.setVisible(False)
+        self.showFullScreen()
+        self.activateWindow()
+        self.raise_()
+
     def mousePressEvent(self, event):
         try:
             if event.button() == Qt.LeftButton:
@@ -116,15 +155,9 @@ class SelectionView(QGraphicsView):
                     )
                     area = [int(global_rect.left()), int(global_rect.top()),
                             int(global_rect.width()), int(global_rect.height())]
-                    config = configparser.ConfigParser()
-                    if os.path.exists(self.ini_file):
-                        config.read(self.ini_file)
-                    if 'Settings' not in config:
-                        config['Settings'] = {}
-                    config['Settings'][self.section] = str(area)
-                    with open(self.ini_file, 'w') as f:
-                        config.write(f)
-                    logging.info(f"Area salvata in {self.ini_file} [{self.section}]: {area}")
+                    self._selected = True
+                    logging.info(f"Area selezionata [{self.section}]: {area}")
+                    self.area_selected.emit(self.section, area)
                 else:
                     logging.warning("Area troppo piccola, non salvata")
                 self.close()
@@ -141,6 +174,9 @@ class SelectionView(QGraphicsView):
 
     def closeEvent(self, event):
         logging.debug("SelectionView chiuso")
+        if not self._selected:
+            self._selected = True
+            self.selection_cancelled.emit(self.section)
         event.accept()
 
 def main():
@@ -151,10 +187,9 @@ def main():
     args = parser.parse_args()
 
     app = QApplication(sys.argv)
-    view = SelectionView(ini_file=args.ini, section=args.section)
-    view.showFullScreen()
-    view.activateWindow()
-    view.raise_()
+    view = SelectionView(section=args.section)
+    view.area_selected.connect(lambda section, area: save_area_to_ini(args.ini, section, area))
+    view.start()
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
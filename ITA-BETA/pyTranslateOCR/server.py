@@ -0,0 +1,389 @@
+import io
+import os
+import sys
+import json
+import time
+import base64
+import signal
+import socket
+import logging
+import argparse
+import threading
+import configparser
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+from startup import setup_logging
+
+# Servizio locale di OCR e traduzione per script e altri strumenti, senza interfaccia.
+# Motori OCR, pool HTTP, memoria di traduzione e worker translateLocally vengono caricati
+# una volta all'avvio e condivisi tra tutte le richieste.
+#
+# Endpoint (POST, corpo JSON):
+#   /ocr            {"image": "<base64>"} oppure {"rect": [left, top, width, height]}
+#   /translate      {"text": "..."}
+#   /ocr_translate  come /ocr
+# Opzioni facoltative: "lang"/"source", "target", "ocr_engine", "translate_engine",
+# "enhance", "unique_text". In alternativa il corpo può essere l'immagine stessa
+# (Content-Type image/* o application/octet-stream) con le opzioni nella query string.
+# GET /health restituisce lo stato del servizio, GET /metrics i tempi delle fasi (Prometheus).
+#
+# Uso: python server.py [--port 8765] [--socket /tmp/pytranslateocr.sock]
+
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+SERVER_MAX_REQUESTS = 4                 # richieste elaborate contemporaneamente
+SERVER_MAX_BODY = 32 * 1024 * 1024      # byte
+SERVER_ENDPOINTS = ('/ocr', '/translate', '/ocr_translate')
+
+class RequestError(ValueError):
+    """Richiesta non valida (risposta 400)."""
+
+def load_server_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge le impostazioni del servizio dalla sezione [Server].
+    Returns:
+        dict: host, port (0 disabilita TCP), socket (percorso del socket Unix, vuoto per
+              disabilitarlo) e max_requests.
+    """
+    settings = {'host': SERVER_HOST, 'port': SERVER_PORT, 'socket': '', 'max_requests': SERVER_MAX_REQUESTS}
+    if not os.path.isfile(ini_file):
+        return settings
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    if 'Server' not in config:
+        return settings
+    settings['host'] = config.get('Server', 'host', fallback=SERVER_HOST)
+    settings['socket'] = config.get('Server', 'socket', fallback='')
+    try:
+        settings['port'] = max(0, config.getint('Server', 'port', fallback=SERVER_PORT))
+        settings['max_requests'] = max(1, config.getint('Server', 'max_requests', fallback=SERVER_MAX_REQUESTS))
+    except ValueError as e:
+        logging.error(f"Errore nella sezione [Server]: {e}, usando valori predefiniti")
+    return settings
+
+class OCRService:
+    """
+    Esegue OCR e traduzione per le richieste del servizio con le impostazioni di ocrqt.ini,
+    che ogni richiesta può sovrascrivere.
+    """
+
+    def __init__(self, settings: dict, max_requests: int = SERVER_MAX_REQUESTS):
+        self.settings = settings
+        self.started = time.time()
+        self.requests = 0
+        self._slots = threading.BoundedSemaphore(max_requests)
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        """
+        Carica in anticipo motori e cache, così la prima richiesta non paga l'avvio:
+        handle tesserocr per la lingua predefinita, memoria di traduzione, stato del
+        motore di traduzione e worker translateLocally.
+        """
+        from PIL import Image
+        from translation.memory import get_translation_memory
+        from translation.translate import health_registry
+
+        s = self.settings
+        start = time.perf_counter()
+        if s['ocr_engine'] == 'Tesseract':
+            try:
+                self.ocr(image=Image.new('RGB', (64, 32), 'white'))
+            except Exception as e:
+                logging.warning(f"Preriscaldamento OCR fallito: {e}")
+        get_translation_memory()
+        if s['translate_engine'] == 'Locally':
+            from translation.locally import check_translate_locally_availability
+            check_translate_locally_availability(s['translate_locally_path'])
+        else:
+            health_registry.probe(s['translate_engine'])
+        logging.info(f"Motori pronti in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _option(self, options: dict, key: str):
+        value = options.get(key)
+        return self.settings[key] if value in (None, '') else value
+
+    def ocr(self, image=None, rect=None, options: Optional[dict] = None) -> dict:
+        """
+        Riconosce il testo di un'immagine o di un rettangolo dello schermo.
+        Args:
+            image: Immagine PIL (prevale su rect).
+            rect: Rettangolo [left, top, width, height] da catturare.
+            options: Opzioni della richiesta (lang, ocr_engine, enhance).
+        Returns:
+            dict: text, ocr_engine, lang e timings (ms).
+        Raises:
+            RequestError: Se il motore è sconosciuto, mancano immagine e rettangolo o il motore
+                          non li supporta.
+            ValueError: Se l'OCR fallisce (risposta 502).
+        """
+        from ocr.ocr import perform_ocr, OCR_ENGINES
+        from ocr.tesseract import map_to_tesseract_language
+
+        options = options or {}
+        s = self.settings
+        engine = self._option(options, 'ocr_engine')
+        lang = options.get('lang') or options.get('source') or s['source_lang']
+        if engine not in OCR_ENGINES:
+            raise RequestError(f"Motore OCR sconosciuto: {engine} (disponibili: {', '.join(OCR_ENGINES)})")
+        if image is None and rect is None:
+            raise RequestError("Specificare 'image' o 'rect'")
+        if image is not None and engine == 'Umi-OCR':
+            raise RequestError("Umi-OCR cattura lo schermo da sé: usare 'rect' o un altro motore")
+        if image is not None:
+            rect = [0, 0, image.width, image.height]
+        ocr_lang = map_to_tesseract_language(lang) if engine == 'Tesseract' else lang
+        start = time.perf_counter()
+        text = perform_ocr(engine, s['umi_ocr_path'], s['tesseract_path'], rect, ocr_lang,
+                           _as_bool(options.get('enhance', False)), s['contrast'], s['sharpness'],
+                           s['invert'], image=image, raise_errors=True)
+        return {'text': text, 'ocr_engine': engine, 'lang': lang,
+                'timings': {'ocr': round((time.perf_counter() - start) * 1000, 1)}}
+
+    def translate(self, text: str, options: Optional[dict] = None) -> dict:
+        """
+        Traduce il testo.
+        Args:
+            text: Testo da tradurre.
+            options: Opzioni della richiesta (source, target, translate_engine, unique_text).
+        Returns:
+            dict: translation, translate_engine, source, target e timings (ms).
+        Raises:
+            ValueError: Se la traduzione fallisce.
+        """
+        from translation.translate import translate_text
+
+        options = options or {}
+        engine = self._option(options, 'translate_engine')
+        source = options.get('source') or options.get('lang') or self.settings['source_lang']
+        target = options.get('target') or self.settings['target_lang']
+        start = time.perf_counter()
+        translation = translate_text(engine, text, source, target, _as_bool(options.get('unique_text', False)),
+                                     self.settings['translate_locally_path'])
+        return {'translation': translation, 'translate_engine': engine, 'source': source, 'target': target,
+                'timings': {'translate': round((time.perf_counter() - start) * 1000, 1)}}
+
+    def handle(self, endpoint: str, image, payload: dict) -> dict:
+        """
+        Esegue l'endpoint richiesto, limitando le richieste elaborate contemporaneamente.
+        Raises:
+            RequestError: Endpoint o parametri non validi.
+        """
+        with self._slots:
+            with self._lock:
+                self.requests += 1
+            start = time.perf_counter()
+            if endpoint == '/translate':
+                text = payload.get('text')
+                if not isinstance(text, str):
+                    raise RequestError("Specificare 'text'")
+                result = self.translate(text, payload)
+            elif endpoint in ('/ocr', '/ocr_translate'):
+                result = self.ocr(image, _parse_rect(payload.get('rect')), payload)
+                if endpoint == '/ocr_translate':
+                    translated = self.translate(result['text'], payload)
+                    result['timings'].update(translated.pop('timings'))
+                    result.update(translated)
+            else:
+                raise RequestError(f"Endpoint sconosciuto: {endpoint}")
+            result['timings']['total'] = round((time.perf_counter() - start) * 1000, 1)
+            return result
+
+    def status(self) -> dict:
+        """Stato del servizio per GET /health."""
+        return {'status': 'ok', 'uptime': round(time.time() - self.started, 1), 'requests': self.requests,
+                'ocr_engine': self.settings['ocr_engine'], 'translate_engine': self.settings['translate_engine']}
+
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+def _parse_rect(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    try:
+        rect = [int(x) for x in value]
+    except (TypeError, ValueError):
+        raise RequestError("'rect' deve essere [left, top, width, height]")
+    if len(rect) != 4 or rect[2] <= 0 or rect[3] <= 0:
+        raise RequestError("'rect' deve essere [left, top, width, height] con dimensioni positive")
+    return rect
+
+def _decode_image(data: bytes):
+    from PIL import Image
+    try:
+        image = Image.open(io.BytesIO(data))
+        return image.convert('RGB')
+    except Exception as e:
+        raise RequestError(f"Immagine non valida: {e}")
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Gestore HTTP condiviso dal server TCP e da quello su socket Unix."""
+
+    server_version = 'pyTranslateOCR'
+    protocol_version = 'HTTP/1.1'
+    service: OCRService = None
+
+    def address_string(self):
+        # Sul socket Unix client_address è vuoto
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, self.service.status())
+        elif path == '/metrics':
+            from metrics import get_metrics
+            data = get_metrics().to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {'error': 'Endpoint sconosciuto'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > SERVER_MAX_BODY:
+                self.close_connection = True
+                self._send_json(413, {'error': 'Richiesta troppo grande'})
+                return
+            # Il corpo va letto comunque, altrimenti la connessione persistente resta sporca
+            body = self.rfile.read(length)
+            if url.path not in SERVER_ENDPOINTS:
+                self._send_json(404, {'error': 'Endpoint sconosciuto'})
+                return
+            content_type = self.headers.get('Content-Type', 'application/json').split(';')[0].strip().lower()
+            image = None
+            if content_type.startswith('image/') or content_type == 'application/octet-stream':
+                payload = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                image = _decode_image(body)
+            else:
+                try:
+                    payload = json.loads(body or b'{}')
+                except ValueError:
+                    raise RequestError("Corpo JSON non valido")
+                if not isinstance(payload, dict):
+                    raise RequestError("Il corpo JSON deve essere un oggetto")
+                if payload.get('image'):
+                    try:
+                        image = _decode_image(base64.b64decode(payload['image']))
+                    except (TypeError, ValueError) as e:
+                        raise RequestError(f"Immagine base64 non valida: {e}")
+            self._send_json(200, self.service.handle(url.path, image, payload))
+        except RequestError as e:
+            self._send_json(400, {'error': str(e)})
+        except ValueError as e:
+            # Errori dei motori (es. traduzione fallita)
+            logging.warning(f"Richiesta {url.path} fallita: {e}")
+            self._send_json(502, {'error': str(e)})
+        except Exception as e:
+            logging.error(f"Errore nella richiesta {url.path}: {e}", exc_info=True)
+            self._send_json(500, {'error': str(e)})
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Server HTTP su socket Unix, un thread per connessione."""
+    daemon_threads = True
+
+def shutdown_engines():
+    """Chiude worker translateLocally, handle tesserocr, pool HTTP e backend di cattura."""
+    from translation.locally import shutdown_locally_workers
+    from ocr.tesseract import close_tesseract_apis
+    from ocr.capture import close_capture
+    from transport import close_transport
+    for close in (shutdown_locally_workers, close_tesseract_apis, close_transport, close_capture):
+        try:
+            close()
+        except Exception as e:
+            logging.error(f"Errore durante la chiusura ({close.__name__}): {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Servizio locale di OCR e traduzione")
+    parser.add_argument('--ini', default='ocrqt.ini', help='File delle impostazioni (default: ocrqt.ini)')
+    parser.add_argument('--host', help=f'Indirizzo di ascolto (default: {SERVER_HOST})')
+    parser.add_argument('--port', type=int, help=f'Porta TCP, 0 per disabilitarla (default: {SERVER_PORT})')
+    parser.add_argument('--socket', help='Percorso del socket Unix (opzionale)')
+    parser.add_argument('--max-requests', type=int, help=f'Richieste elaborate contemporaneamente (default: {SERVER_MAX_REQUESTS})')
+    parser.add_argument('--no-warmup', action='store_true', help='Non carica i motori all\'avvio')
+    parser.add_argument('--debug', action='store_true', help='Abilita i messaggi di debug')
+    args = parser.parse_args()
+
+    setup_logging(debug=args.debug)
+    from ini_controll import load_engine_settings
+
+    config = load_server_settings(args.ini)
+    for key in ('host', 'port', 'socket', 'max_requests'):
+        value = getattr(args, key)
+        if value is not None:
+            config[key] = value
+    if not config['port'] and not config['socket']:
+        logging.error("Nessun indirizzo di ascolto: specificare una porta o un socket Unix")
+        return 2
+    if config['socket'] and not hasattr(socket, 'AF_UNIX'):
+        logging.error("Socket Unix non supportati su questo sistema")
+        return 2
+
+    RequestHandler.service = OCRService(load_engine_settings(args.ini), config['max_requests'])
+    if not args.no_warmup:
+        RequestHandler.service.warm_up()
+
+    servers = []
+    try:
+        if config['port']:
+            tcp_server = ThreadingHTTPServer((config['host'], config['port']), RequestHandler)
+            tcp_server.daemon_threads = True
+            servers.append(tcp_server)
+            logging.info(f"In ascolto su http://{config['host']}:{config['port']}")
+        if config['socket']:
+            if os.path.exists(config['socket']):
+                os.unlink(config['socket'])
+            servers.append(ThreadingUnixHTTPServer(config['socket'], RequestHandler))
+            os.chmod(config['socket'], 0o600)
+            logging.info(f"In ascolto sul socket {config['socket']}")
+    except OSError as e:
+        logging.error(f"Impossibile avviare il servizio: {e}")
+        for server in servers:
+            server.server_close()
+        shutdown_engines()
+        return 1
+
+    threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers]
+    for thread in threads:
+        thread.start()
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    try:
+        while not stop_event.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    logging.info("Arresto del servizio")
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    if config['socket'] and os.path.exists(config['socket']):
+        os.unlink(config['socket'])
+    shutdown_engines()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,12 @@
 import logging
 from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QPushButton, QDialogButtonBox, QLineEdit, QSlider, QFileDialog)
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QPushButton, QDialogButtonBox, QLineEdit, QSlider, QFileDialog,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
 from ini_controll import save_preferences, load_preferences
 from tts import get_available_voices
-from translation.locally import check_translate_locally_availability
+from translation.memory import get_translation_memory
+from ocr.capture import get_capture_stats
+from metrics import get_metrics
 import platform
 
 # logging.basicConfig(level=logging.DEBUG)
@@ -136,7 +139,8 @@ class AdvancedSettingsDialog(QDialog):
                 self.parent.shortcuts = {
                     'ocr_temp': dialog.get_selected_key_ocr_temp(),
                     'ocr_fixed': dialog.get_selected_key_ocr_fixed(),
-                    'ocr_set_fixed': dialog.get_selected_key_ocr_set_fixed()
+                    'ocr_set_fixed': dialog.get_selected_key_ocr_set_fixed(),
+                    'ocr_multi': self.parent.shortcuts.get('ocr_multi', '<alt>+m')
                 }
                 self.parent.setup_shortcuts()
                 # Salva le preferenze immediatamente
@@ -155,7 +159,8 @@ class AdvancedSettingsDialog(QDialog):
                     self.parent.tts_rate,
                     self.parent.contrast,
                     self.parent.sharpness,
-                    self.parent.invert
+                    self.parent.invert,
+                    incremental=self.parent.incremental_checkbox.isChecked()
                 )
                 logging.info(f"Shortcuts updated: {self.parent.shortcuts}")
         except Exception as e:
@@ -186,7 +191,8 @@ class AdvancedSettingsDialog(QDialog):
                 self.parent.tts_rate,
                 self.parent.contrast,
                 self.parent.sharpness,
-                self.parent.invert
+                self.parent.invert,
+                incremental=self.parent.incremental_checkbox.isChecked()
             )
             logging.info("Impostazioni avanzate salvate correttamente")
             self.accept()
@@ -259,5 +265,83 @@ class ImageSettingsDialog(QDialog):
                          parent.target_lang, parent.ocr_engine, parent.translate_engine,
                          parent.translate_locally_path, parent.shortcuts, parent.fixed_area,
                          parent.area_temp, parent.tts_voice, parent.tts_rate,
-                         parent.contrast, parent.sharpness, parent.invert)
-        self.accept()
\ No newline at end of file
+                         parent.contrast, parent.sharpness, parent.invert,
+                         incremental=parent.incremental_checkbox.isChecked())
+        self.accept()
+
+class DiagnosticsDialog(QDialog):
+    """
+    Mostra i tempi delle fasi misurati in questa sessione ed esporta le misure in formato
+    Prometheus o come trace di Chrome, da allegare alle segnalazioni di lentezza.
+    """
+    COLUMNS = ("Fase", "Motore", "Lingue", "N", "Media ms", "p50 ms", "p95 ms", "Max ms", "Caratteri")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostica")
+        self.resize(760, 420)
+        layout = QVBoxLayout()
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+        self.info_label = QLabel()
+        self.info_label.setWordWrap(True)
+        layout.addWidget(self.info_label)
+        buttons_layout = QHBoxLayout()
+        for text, slot in (("Aggiorna", self.refresh), ("Esporta Prometheus...", self.export_prometheus),
+                           ("Esporta trace Chrome...", self.export_trace), ("Azzera", self.reset),
+                           ("Chiudi", self.accept)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons_layout.addWidget(button)
+        layout.addLayout(buttons_layout)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        rows = get_metrics().summary()
+        self.table.setRowCount(len(rows))
+        for row, item in enumerate(rows):
+            values = (item['stage'], item['engine'], item['langs'], str(item['count']),
+                      f"{item['mean']:.1f}", f"{item['p50']:.1f}", f"{item['p95']:.1f}",
+                      f"{item['max']:.1f}", str(item['chars']))
+            for column, value in enumerate(values):
+                cell = QTableWidgetItem(value)
+                if column >= 3:
+                    cell.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, cell)
+        lines = []
+        for name, stats in get_capture_stats().items():
+            lines.append(f"Cattura {name}: {stats['count']} catture, media {stats['mean_ms']:.1f} ms, "
+                         f"max {stats['max_ms']:.1f} ms")
+        memory = get_translation_memory().stats()
+        lines.append(f"Memoria di traduzione: {memory['entries']} voci, {memory['hits']} hit, "
+                     f"{memory['misses']} miss ({memory['hit_rate']:.0%})")
+        if not get_metrics().enabled:
+            lines.append("Misure disattivate ([Metrics] enabled = false)")
+        self.info_label.setText("\n".join(lines))
+
+    def export_prometheus(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Esporta metriche", "pytranslateocr_metrics.prom",
+                                              "Prometheus (*.prom *.txt)")
+        if path:
+            self._export(get_metrics().export_prometheus, path)
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Esporta trace", "pytranslateocr_trace.json",
+                                              "Trace di Chrome (*.json)")
+        if path:
+            self._export(get_metrics().export_chrome_trace, path)
+
+    def _export(self, export, path):
+        try:
+            export(path)
+        except OSError as e:
+            logging.error(f"Esportazione fallita: {e}")
+            self.info_label.setText(f"Esportazione fallita: {e}")
+
+    def reset(self):
+        get_metrics().reset()
+        self.refresh()
@@ -0,0 +1,222 @@
+import sys
+import time
+import logging
+import builtins
+import threading
+import importlib.util
+from typing import Callable, List, Optional, Tuple
+
+# Avvio del programma: misura dei tempi di importazione dei moduli (simile a
+# `python -X importtime`, ma con le fasi dell'avvio e i motori caricati) e scoperta in
+# background dell'inventario dei motori (lingue di Tesseract e translateLocally, modulo del
+# motore di traduzione), così che la finestra non attenda i processi esterni.
+
+STARTUP_REPORT_TOP = 25         # importazioni mostrate nel report
+STARTUP_REPORT_MIN_MS = 1.0     # importazioni più brevi non vengono mostrate
+
+ImportRecord = Tuple[str, float, float, int]    # (modulo, proprio ms, cumulativo ms, profondità)
+
+def setup_logging(debug: bool):
+    """Configura il logging dei programmi (main.py, batch.py, server.py)."""
+    log_level = logging.DEBUG if debug else logging.INFO
+    logging.basicConfig(
+        level=log_level,
+        format='%(levelname)s:%(name)s:%(message)s'
+    )
+    if not debug:
+        for logger_name in ['hpack', 'httpx', 'httpcore', 'PIL']:
+            logging.getLogger(logger_name).setLevel(logging.WARNING)
+
+class ImportTimer:
+    """
+    Misura le importazioni del thread principale sostituendo builtins.__import__.
+    Per ogni modulo importato per la prima volta registra il tempo proprio (senza i moduli
+    importati a sua volta) e cumulativo, come `-X importtime`.
+    """
+
+    def __init__(self):
+        self.records: List[ImportRecord] = []
+        self._stack: List[float] = []
+        self._original = builtins.__import__
+        self._hook = self._import
+        self._thread_id = None
+
+    def install(self):
+        if builtins.__import__ is self._hook:
+            return
+        self._original = builtins.__import__
+        self._thread_id = threading.get_ident()
+        builtins.__import__ = self._hook
+
+    def uninstall(self):
+        if builtins.__import__ is self._hook:
+            builtins.__import__ = self._original
+        self._thread_id = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original
+        if threading.get_ident() != self._thread_id:
+            return original(name, globals, locals, fromlist, level)
+        module_name = _absolute_name(name, globals, level)
+        if module_name is None or not _is_new_import(module_name, fromlist):
+            return original(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = (time.perf_counter() - start) * 1000
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            self.records.append((module_name, cumulative - children, cumulative, len(self._stack)))
+
+def _absolute_name(name: str, globals, level: int) -> Optional[str]:
+    if level == 0:
+        return name
+    try:
+        return importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__'))
+    except (ImportError, ValueError):
+        return None
+
+def _is_new_import(module_name: str, fromlist) -> bool:
+    module = sys.modules.get(module_name)
+    if module is None:
+        return True
+    # `from pacchetto import sottomodulo`: il pacchetto è già caricato, il sottomodulo no
+    return any(item != '*' and not hasattr(module, item) and f"{module_name}.{item}" not in sys.modules
+               for item in fromlist or ())
+
+class InventoryDiscovery:
+    """
+    Interroga in un thread in background i motori configurati (tesseract --list-langs,
+    translateLocally -l) e pre-carica il modulo del motore di traduzione. I risultati finiscono
+    nelle cache esistenti (cache delle lingue, stato di translateLocally, registro dei motori):
+    chi li chiede prima della fine attende il calcolo già in corso invece di ripeterlo.
+    """
+
+    def __init__(self, settings: dict):
+        """
+        Args:
+            settings: Impostazioni dei motori (vedi ini_controll.load_engine_settings).
+        """
+        self.settings = settings
+        self.timings: List[Tuple[str, float, bool]] = []    # (attività, ms, riuscita)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _tasks(self) -> List[Tuple[str, Callable[[], object]]]:
+        settings = self.settings
+        tasks = []
+        # Prima i processi esterni, che girano in parallelo all'avvio dell'interfaccia
+        if settings['ocr_engine'] == 'Tesseract':
+            def tesseract_languages():
+                from language_utils import get_tesseract_languages
+                return get_tesseract_languages(settings['tesseract_path'])
+            tasks.append(('lingue Tesseract', tesseract_languages))
+        if settings['translate_engine'] == 'Locally':
+            def locally_inventory():
+                from translation.locally import check_translate_locally_availability
+                return check_translate_locally_availability(settings['translate_locally_path'])
+            tasks.append(('modelli translateLocally', locally_inventory))
+        def translate_engine():
+            from translation.translate import engine_registry
+            return engine_registry.preload(settings['translate_engine'])
+        tasks.append((f"motore {settings['translate_engine']}", translate_engine))
+        return tasks
+
+    def _run(self):
+        for name, task in self._tasks():
+            start = time.perf_counter()
+            try:
+                ok = bool(task())
+            except Exception as e:
+                logging.warning(f"Scoperta in background fallita ({name}): {e}")
+                ok = False
+            ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.timings.append((name, ms, ok))
+            logging.debug(f"Scoperta in background: {name} in {ms:.1f} ms")
+
+    def start(self):
+        """Avvia la scoperta in un thread daemon."""
+        self._thread = threading.Thread(target=self._run, name='inventory-discovery', daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attende la fine della scoperta.
+        Returns:
+            bool: True se la scoperta è terminata (o non è mai stata avviata).
+        """
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def is_done(self) -> bool:
+        return self._thread is None or not self._thread.is_alive()
+
+    def get_timings(self) -> List[Tuple[str, float, bool]]:
+        with self._lock:
+            return list(self.timings)
+
+class StartupReport:
+    """Fasi dell'avvio e importazioni più lente, da stampare quando la finestra è pronta."""
+
+    def __init__(self, measure_imports: bool = True):
+        self._origin = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.timer = ImportTimer() if measure_imports else None
+        self.discovery: Optional[InventoryDiscovery] = None
+        if self.timer is not None:
+            self.timer.install()
+
+    def mark(self, phase: str):
+        """Registra il raggiungimento di una fase (ms dall'inizio della misura)."""
+        ms = (time.perf_counter() - self._origin) * 1000
+        self.phases.append((phase, ms))
+        logging.debug(f"Avvio: {phase} a {ms:.1f} ms")
+
+    def stop(self):
+        """Smette di misurare le importazioni."""
+        if self.timer is not None:
+            self.timer.uninstall()
+
+    def format(self, top: int = STARTUP_REPORT_TOP) -> str:
+        """
+        Compone il report testuale.
+        Args:
+            top: Numero massimo di importazioni da mostrare.
+        Returns:
+            str: Fasi, importazioni più lente, scoperta in background e motori caricati.
+        """
+        lines = ["Fasi dell'avvio (ms dall'avvio di main):"]
+        previous = 0.0
+        for phase, ms in self.phases:
+            lines.append(f"  {ms:>9.1f}  (+{ms - previous:>7.1f})  {phase}")
+            previous = ms
+        if self.timer is not None and self.timer.records:
+            records = self.timer.records
+            total = sum(record[2] for record in records if record[3] == 0)
+            lines.append(f"Importazioni: {len(records)} moduli, {total:.1f} ms; le più lente "
+                         f"(proprio | cumulativo ms):")
+            slowest = sorted(records, key=lambda record: record[2], reverse=True)
+            for module_name, own, cumulative, _depth in slowest[:top]:
+                if cumulative < STARTUP_REPORT_MIN_MS:
+                    break
+                lines.append(f"  {own:>9.1f} | {cumulative:>9.1f}  {module_name}")
+        if self.discovery is not None:
+            state = "terminata" if self.discovery.is_done() else "in corso"
+            lines.append(f"Scoperta in background ({state}):")
+            for name, ms, ok in self.discovery.get_timings():
+                lines.append(f"  {ms:>9.1f}  {name}{'' if ok else ' (non disponibile)'}")
+        from translation.translate import engine_registry
+        loaded = engine_registry.load_times()
+        if loaded:
+            lines.append("Motori di traduzione caricati: " +
+                         ", ".join(f"{engine} {ms:.1f} ms" for engine, ms in loaded.items()))
+        not_loaded = [engine for engine in engine_registry.engines() if engine not in loaded]
+        if not_loaded:
+            lines.append("Motori non caricati: " + ", ".join(not_loaded))
+        return '\n'.join(lines)
@@ -1,6 +1,12 @@
 import logging
+import threading
+import transport
+import httpx
+import httpcore
 from googletrans import Translator
 from urllib.parse import unquote
+from .health import EngineUnavailableError
+from .segmenter import translate_segmented
 
 # logging.basicConfig(level=logging.INFO)
 
@@ -18,6 +24,41 @@ GOOGLE_LANGUAGES = [
     'xh', 'yi', 'yo', 'zu'
 ]
 
+GOOGLE_MAX_CHUNK_SIZE = 5000  # Limite massimo per Google Translate
+GOOGLE_PARALLEL_CHUNKS = 3
+
+# Errori di rete e timeout (httpx/httpcore, in base alla versione richiesta da googletrans):
+# solo questi rendono il motore non disponibile, gli altri sono errori della singola richiesta
+_CONNECTION_ERRORS = tuple(
+    error for module in (httpx, httpcore)
+    for error in (getattr(module, name, None) for name in ('TransportError', 'NetworkError', 'TimeoutException'))
+    if isinstance(error, type) and issubclass(error, Exception)
+) + (ConnectionError, TimeoutError)
+
+# Client Google Translate condiviso (mantiene il pool httpx tra le chiamate)
+_translator = None
+_translator_lock = threading.Lock()
+
+def get_translator() -> Translator:
+    """
+    Restituisce il client Translator condiviso, creandolo al primo utilizzo.
+    Returns:
+        Translator: Client googletrans riutilizzabile.
+    """
+    global _translator
+    if _translator is None:
+        with _translator_lock:
+            if _translator is None:
+                _translator = Translator(timeout=transport.get_settings()['timeout'])
+                logging.debug("Client Google Translate creato")
+    return _translator
+
+def reset_translator():
+    """Scarta il client condiviso (es. dopo un errore di connessione)."""
+    global _translator
+    with _translator_lock:
+        _translator = None
+
 def get_supported_languages() -> list:
     """
     Restituisce la lista dei codici di lingua supportati da Google Translate.
@@ -33,12 +74,13 @@ def is_google_translate_available() -> bool:
         bool: True se il servizio è accessibile, False altrimenti.
     """
     try:
-        translator = Translator()
+        translator = get_translator()
         # Test con una traduzione semplice
         result = translator.translate("test", src="en", dest="it")
         return result.text.strip() != ""
     except Exception as e:
         logging.warning(f"Google Translate non disponibile: {e}")
+        reset_translator()
         return False
 
 def translate_google(text: str, source: str, target: str) -> str:
@@ -51,7 +93,8 @@ def translate_google(text: str, source: str, target: str) -> str:
     Returns:
         str: Testo tradotto.
     Raises:
-        ValueError: Se la traduzione fallisce.
+        EngineUnavailableError: Se Google Translate non è raggiungibile (rete o timeout).
+        ValueError: Se la traduzione fallisce per altri motivi (es. lingua non supportata).
     """
     if not text.strip():
         return ""
@@ -63,22 +106,18 @@ def translate_google(text: str, source: str, target: str) -> str:
         logging.warning(f"Errore nella decodifica del testo: {e}")
     
     try:
-        translator = Translator()
-        # Suddividi il testo in chunk per evitare problemi con testi lunghi
-        max_chunk_size = 5000  # Limite massimo per Google Translate
-        chunks = [text[i:i + max_chunk_size] for i in range(0, len(text), max_chunk_size)]
-        translated_chunks = []
-
-        for chunk in chunks:
-            if not chunk.strip():
-                translated_chunks.append("")
-                continue
-            result = translator.translate(chunk, src=source, dest=target)
-            translated_chunks.append(result.text)
-        
-        translated_text = " ".join(translated_chunks)
+        translator = get_translator()
+        # Suddividi il testo in blocchi di frasi per evitare problemi con testi lunghi
+        translated_text = translate_segmented(
+            text,
+            lambda chunk: translator.translate(chunk, src=source, dest=target).text,
+            GOOGLE_MAX_CHUNK_SIZE, GOOGLE_PARALLEL_CHUNKS)
         logging.debug(f"Tradotto con Google: {translated_text}")
         return translated_text
+    except _CONNECTION_ERRORS as e:
+        logging.error(f"Errore nella connessione a Google Translate: {e}")
+        reset_translator()
+        raise EngineUnavailableError(f"Errore nella connessione a Google Translate: {e}")
     except Exception as e:
         logging.error(f"Errore nella traduzione con Google Translate: {e}")
         raise ValueError(f"Errore nella traduzione con Google Translate: {e}")
\ No newline at end of file
@@ -0,0 +1,132 @@
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional, Set
+from metrics import span
+
+# Durata di validità (secondi) dello stato di disponibilità di un motore
+HEALTH_TTL = 30.0
+# Un motore non richiesto da più di questo tempo (secondi) non viene più verificato in background
+HEALTH_IDLE_TIMEOUT = 300.0
+
+class EngineUnavailableError(ValueError):
+    """
+    Errore sollevato da un motore di traduzione irraggiungibile (connessione rifiutata,
+    timeout, servizio non disponibile). Aggiorna passivamente il registro di stato.
+    """
+
+class EngineHealthRegistry:
+    """
+    Registro dello stato dei motori di traduzione.
+    Lo stato è memorizzato con un TTL e rinnovato da un thread in background, così che
+    translate_text non debba interrogare il server prima di ogni traduzione.
+    """
+
+    def __init__(self, ttl: float = HEALTH_TTL):
+        self.ttl = ttl
+        self._probes: Dict[str, Callable[[], bool]] = {}
+        self._on_demand: Set[str] = set()   # motori esclusi dal rinnovo in background
+        self._states: Dict[str, tuple] = {}  # engine -> (disponibile, timestamp)
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register_probe(self, engine: str, probe: Callable[[], bool], background: bool = True):
+        """
+        Registra la funzione di verifica per un motore.
+        Args:
+            engine: Nome del motore (es. 'LibreTranslate').
+            probe: Funzione che restituisce True se il motore è disponibile.
+            background: Se False il motore non viene verificato dal thread in background, ma
+                        solo quando serve e lo stato è scaduto (es. verifiche che eseguono
+                        una vera traduzione).
+        """
+        self._probes[engine] = probe
+        if background:
+            self._on_demand.discard(engine)
+        else:
+            self._on_demand.add(engine)
+
+    def get(self, engine: str) -> Optional[bool]:
+        """
+        Restituisce lo stato noto del motore.
+        Args:
+            engine: Nome del motore.
+        Returns:
+            Optional[bool]: True/False se lo stato è noto e non scaduto, None altrimenti.
+        """
+        self._ensure_refresher()
+        with self._lock:
+            state = self._states.get(engine)
+            self._last_used[engine] = time.monotonic()
+        if state is None or time.monotonic() - state[1] > self.ttl:
+            return None
+        return state[0]
+
+    def probe(self, engine: str) -> bool:
+        """
+        Verifica subito la disponibilità del motore e aggiorna il registro.
+        Args:
+            engine: Nome del motore.
+        Returns:
+            bool: True se il motore è disponibile.
+        """
+        probe = self._probes.get(engine)
+        if probe is None:
+            return True
+        try:
+            with span('health_probe', engine):
+                available = bool(probe())
+        except Exception as e:
+            logging.warning(f"Errore nella verifica di {engine}: {e}")
+            available = False
+        self._set(engine, available)
+        return available
+
+    def is_available(self, engine: str) -> bool:
+        """
+        Restituisce lo stato del motore, verificandolo solo se sconosciuto o scaduto.
+        """
+        available = self.get(engine)
+        if available is None:
+            available = self.probe(engine)
+        return available
+
+    def mark_success(self, engine: str):
+        """Registra una richiesta andata a buon fine."""
+        self._set(engine, True)
+
+    def mark_failure(self, engine: str, reason: str = ''):
+        """Registra un motore irraggiungibile a seguito di una richiesta fallita."""
+        logging.debug(f"Motore {engine} segnato come non disponibile: {reason}")
+        self._set(engine, False)
+
+    def _set(self, engine: str, available: bool):
+        with self._lock:
+            self._states[engine] = (available, time.monotonic())
+
+    def _ensure_refresher(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refresh_loop, name="EngineHealth", daemon=True)
+                self._thread.start()
+
+    def _refresh_loop(self):
+        # Rinnova solo i motori già usati, prima che il loro stato scada
+        interval = max(self.ttl / 2, 1.0)
+        while not self._stop_event.wait(interval):
+            now = time.monotonic()
+            with self._lock:
+                engines = [engine for engine, (_, stamp) in self._states.items()
+                           if engine not in self._on_demand and now - stamp > interval
+                           and now - self._last_used.get(engine, 0) < HEALTH_IDLE_TIMEOUT]
+            for engine in engines:
+                available = self.probe(engine)
+                logging.debug(f"Stato di {engine} aggiornato in background: {available}")
+
+    def stop(self):
+        """Ferma il thread di aggiornamento in background."""
+        self._stop_event.set()
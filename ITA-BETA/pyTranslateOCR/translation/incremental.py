@@ -0,0 +1,85 @@
+import logging
+import threading
+from typing import Dict
+
+from .segmenter import split_segments, is_blank
+from .translate import translate_batch
+
+class IncrementalTranslator:
+    """
+    Ritraduzione incrementale per catture ripetute della stessa area.
+    Il testo OCR viene diviso in frasi/righe e confrontato con la cattura precedente
+    dell'area: solo i segmenti nuovi o cambiati vengono inviati al motore.
+    """
+
+    def __init__(self):
+        self._areas: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def reset(self, area_key: str = None):
+        """Dimentica le catture precedenti (di un'area o di tutte)."""
+        with self._lock:
+            if area_key is None:
+                self._areas.clear()
+            else:
+                self._areas.pop(area_key, None)
+
+    def translate(self, area_key: str, translate_engine: str, text: str, source_lang: str,
+                  target_lang: str, unique_text: bool, translate_locally_path: str = '') -> str:
+        """
+        Traduce il testo riutilizzando le traduzioni dei segmenti invariati dell'area.
+        Args:
+            area_key: Identificativo dell'area catturata (es. 'fixed_area').
+            Gli altri argomenti sono quelli di translate_text.
+        Returns:
+            str: Testo tradotto.
+        Raises:
+            ValueError: Se la traduzione di un segmento fallisce.
+        """
+        if not text.strip():
+            return ""
+        if unique_text:
+            text = text.replace('\n', ' ')
+        params = (translate_engine, source_lang, target_lang, translate_locally_path)
+        with self._lock:
+            state = self._areas.get(area_key)
+            previous = state['translations'] if state and state['params'] == params else {}
+
+        segments = split_segments(text)
+        new_texts = []
+        for segment in segments:
+            if not is_blank(segment.text) and segment.text not in previous and segment.text not in new_texts:
+                new_texts.append(segment.text)
+        logging.debug(f"Ritraduzione incrementale [{area_key}]: {len(new_texts)} segmenti nuovi "
+                      f"su {len(segments)}")
+
+        translations = dict(previous)
+        if new_texts:
+            # Tutti i segmenti nuovi in una sola richiesta, se il motore lo consente
+            translated = translate_batch(translate_engine, new_texts, source_lang, target_lang,
+                                         translate_locally_path)
+            translations.update(zip(new_texts, translated))
+
+        result = ''.join((translations.get(segment.text, segment.text) if not is_blank(segment.text)
+                          else segment.text) + segment.separator for segment in segments)
+        with self._lock:
+            # Conserva solo i segmenti dell'ultima cattura
+            current = {segment.text: translations[segment.text] for segment in segments
+                       if segment.text in translations}
+            self._areas[area_key] = {'params': params, 'translations': current}
+        return result
+
+_incremental_translator = IncrementalTranslator()
+
+def translate_incremental(area_key: str, translate_engine: str, text: str, source_lang: str,
+                          target_lang: str, unique_text: bool, translate_locally_path: str = '') -> str:
+    """
+    Traduce il testo dell'area indicata inviando al motore solo i segmenti cambiati.
+    Vedi IncrementalTranslator.translate.
+    """
+    return _incremental_translator.translate(area_key, translate_engine, text, source_lang,
+                                             target_lang, unique_text, translate_locally_path)
+
+def reset_incremental(area_key: str = None):
+    """Dimentica le catture precedenti usate dalla ritraduzione incrementale."""
+    _incremental_translator.reset(area_key)
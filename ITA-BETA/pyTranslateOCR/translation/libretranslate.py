@@ -1,5 +1,8 @@
 import requests
 import logging
+import transport
+from typing import List
+from .health import EngineUnavailableError
 
 # logging.basicConfig(level=logging.INFO)
 
@@ -28,7 +31,7 @@ def is_libretranslate_available() -> bool:
         bool: True se il server risponde, False altrimenti.
     """
     try:
-        response = requests.get(f"{LIBRETRANSLATE_URL}/languages", timeout=2)
+        response = transport.get(f"{LIBRETRANSLATE_URL}/languages", timeout=2)
         return response.status_code == 200
     except requests.RequestException as e:
         logging.warning(f"Server LibreTranslate non disponibile: {e}")
@@ -49,14 +52,47 @@ def translate_libre(text: str, source: str, target: str) -> str:
     if not text.strip():
         return ""
     try:
-        response = requests.post(
+        response = transport.post(
             f"{LIBRETRANSLATE_URL}/translate",
-            json={"q": text, "source": source, "target": target},
-            timeout=5
+            json={"q": text, "source": source, "target": target}
         )
         if response.status_code == 200:
             return response.json().get("translatedText", "")
         else:
             raise ValueError(f"Errore nella traduzione con LibreTranslate: {response.text}")
     except requests.RequestException as e:
-        raise ValueError(f"Errore nella connessione a LibreTranslate: {e}")
\ No newline at end of file
+        raise EngineUnavailableError(f"Errore nella connessione a LibreTranslate: {e}")
+
+def translate_libre_batch(texts: List[str], source: str, target: str) -> List[str]:
+    """
+    Traduce più testi con una sola richiesta a LibreTranslate (campo "q" come lista).
+    Args:
+        texts: Testi da tradurre.
+        source: Codice della lingua di origine (es. 'en').
+        target: Codice della lingua di destinazione (es. 'it').
+    Returns:
+        List[str]: Traduzioni nello stesso ordine dei testi ("" per i testi vuoti).
+    Raises:
+        ValueError: Se la traduzione fallisce o la risposta non corrisponde ai testi inviati.
+    """
+    indexes = [i for i, text in enumerate(texts) if text.strip()]
+    results = [""] * len(texts)
+    if not indexes:
+        return results
+    try:
+        response = transport.post(
+            f"{LIBRETRANSLATE_URL}/translate",
+            json={"q": [texts[i] for i in indexes], "source": source, "target": target}
+        )
+    except requests.RequestException as e:
+        raise EngineUnavailableError(f"Errore nella connessione a LibreTranslate: {e}")
+    if response.status_code != 200:
+        raise ValueError(f"Errore nella traduzione con LibreTranslate: {response.text}")
+    translated = response.json().get("translatedText", [])
+    if isinstance(translated, str):
+        translated = [translated]
+    if len(translated) != len(indexes):
+        raise ValueError(f"LibreTranslate ha restituito {len(translated)} traduzioni per {len(indexes)} testi")
+    for i, translation in zip(indexes, translated):
+        results[i] = translation
+    return results
@@ -2,69 +2,116 @@ import subprocess
 import os
 import platform
 import logging
-from typing import Dict, List, Optional, Tuple
+import threading
+from typing import Dict, List, Optional
+from language_cache import get_cached_value, get_locally_model_dirs, resolve_binary
+from .locally_workers import LocallyWorkerPool, LocallyWorkerError
+from .segmenter import translate_segmented
 
 # Configura il logging
 # logging.basicConfig(level=logging.INFO)
 
-def get_locally_languages(translate_locally_path: str = '') -> List[str]:
+# Nomi completi delle lingue (usati da alcune versioni di translateLocally) -> codici a due lettere
+LOCALLY_LANGUAGE_CODES = {
+    "afrikaans": "af", "albanian": "sq", "arabic": "ar", "basque": "eu",
+    "bulgarian": "bg", "catalan": "ca", "czech": "cs", "english": "en",
+    "estonian": "et", "french": "fr", "galician": "gl", "german": "de",
+    "greek": "el", "hebrew": "he", "hindi": "hi", "icelandic": "is",
+    "italian": "it", "japanese": "ja", "korean": "ko", "macedonian": "mk",
+    "malay": "ml", "maltese": "mt", "norwegian": "no", "polish": "pl",
+    "serbo-croatian": "hbs", "sinhala": "si", "slovak": "sk", "slovene": "sl",
+    "spanish": "es", "swahili": "sw", "thai": "th", "turkish": "tr",
+    "ukrainian": "uk", "vietnamese": "vi"
+}
+# Tipi di modello riconosciuti nell'output di `translateLocally -l`
+LOCALLY_MODEL_TYPES = ("tiny", "base", "transformer-tiny11", "full")
+
+# Inventario dei modelli: lingua di origine -> lingua di destinazione -> modelli, nell'ordine
+# in cui translateLocally li elenca (il primo è quello usato)
+LocallyInventory = Dict[str, Dict[str, List[str]]]
+
+def parse_locally_models(output: str) -> LocallyInventory:
     """
-    Restituisce la lista univoca dei codici di lingua a due lettere supportati da translateLocally.
+    Estrae l'inventario dei modelli dall'output di `translateLocally -l`
+    (righe come "... To invoke do -m en-it-tiny").
     Args:
-        translate_locally_path: Percorso dell'eseguibile translateLocally (opzionale su Ubuntu).
+        output: Output del comando.
     Returns:
-        List[str]: Lista di codici di lingua a due lettere (es. ['af', 'sq', 'ar', ...]).
+        LocallyInventory: Modelli indicizzati per lingua di origine e di destinazione.
+    """
+    inventory: LocallyInventory = {}
+    for line in output.splitlines():
+        start_idx = line.find("To invoke do -m")
+        if start_idx == -1 or not any(model in line.lower() for model in LOCALLY_MODEL_TYPES):
+            continue
+        translation_spec = line[start_idx + len("To invoke do -m"):].strip().lower().split("-")
+        if len(translation_spec) < 3:
+            continue
+        source = LOCALLY_LANGUAGE_CODES.get(translation_spec[0], translation_spec[0])
+        target = LOCALLY_LANGUAGE_CODES.get(translation_spec[1], translation_spec[1])
+        models = inventory.setdefault(source, {}).setdefault(target, [])
+        model = "-".join(translation_spec[2:])
+        if model not in models:
+            models.append(model)
+    return inventory
+
+def _query_locally_inventory(binary: str) -> Optional[LocallyInventory]:
+    """
+    Esegue `translateLocally -l` e ne analizza l'output.
+    Returns:
+        Optional[LocallyInventory]: Inventario dei modelli o None in caso di errore.
     """
     try:
-        # Determina il comando
-        if platform.system() == 'Windows' and translate_locally_path:
-            cmd = [translate_locally_path, '-l']
-        else:
-            cmd = ['translateLocally', '-l']
-        
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
-        
-        # Mappa estesa per convertire nomi completi in codici a due lettere
-        language_map = {
-            "afrikaans": "af", "albanian": "sq", "arabic": "ar", "basque": "eu",
-            "bulgarian": "bg", "catalan": "ca", "czech": "cs", "english": "en",
-            "estonian": "et", "french": "fr", "galician": "gl", "german": "de",
-            "greek": "el", "hebrew": "he", "hindi": "hi", "icelandic": "is",
-            "italian": "it", "japanese": "ja", "korean": "ko", "macedonian": "mk",
-            "malay": "ml", "maltese": "mt", "norwegian": "no", "polish": "pl",
-            "serbo-croatian": "hbs", "sinhala": "si", "slovak": "sk", "slovene": "sl",
-            "spanish": "es", "swahili": "sw", "thai": "th", "turkish": "tr",
-            "ukrainian": "uk", "vietnamese": "vi"
-        }
-        
-        languages = set()
-        for line in result.stdout.splitlines():
-            if "To invoke do -m" in line and any(model in line.lower() for model in ["tiny", "base", "transformer-tiny11", "full"]):
-                start_idx = line.find("do -m") + 6
-                if start_idx != -1 and start_idx < len(line):
-                    translation_spec = line[start_idx:].strip().split("-")
-                    if len(translation_spec) >= 3:
-                        source_lang = translation_spec[0].lower()
-                        target_lang = translation_spec[1].lower()
-                        source_code = next((code for full, code in language_map.items() if full in source_lang), source_lang)
-                        target_code = next((code for full, code in language_map.items() if full in target_lang), target_lang)
-                        languages.add(source_code)
-                        languages.add(target_code)
-        
-        if not languages:
-            logging.warning("Nessuna lingua valida trovata nell'output di translateLocally")
-            return ['en', 'it']
-        
-        return sorted(languages)
+        result = subprocess.run([binary, "-l"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
     except subprocess.CalledProcessError as e:
-        logging.error(f"Errore nell'esecuzione di translateLocally -l: {e.stderr}")
-        return ['en', 'it']
+        logging.warning(f"translateLocally non funzionante: {e.stderr}")
+        return None
     except FileNotFoundError:
-        logging.error(f"translateLocally non trovato al percorso: {translate_locally_path or 'PATH'}")
-        return ['en', 'it']
+        logging.warning(f"translateLocally non trovato al percorso: {binary}")
+        return None
     except Exception as e:
-        logging.error(f"Errore nel recupero delle lingue di translateLocally: {e}")
-        return ['en', 'it']  # Fallback
+        logging.warning(f"Errore nel verificare translateLocally: {e}")
+        return None
+    inventory = parse_locally_models(result.stdout)
+    if not inventory:
+        logging.warning("Nessun modello valido trovato nell'output di translateLocally")
+    return inventory
+
+def _resolve_locally_binary(translate_locally_path: str = '') -> str:
+    # Su Windows serve il percorso configurato, altrove translateLocally è cercato nel PATH
+    if platform.system() == 'Windows' and translate_locally_path:
+        return resolve_binary(translate_locally_path, 'translateLocally')
+    return resolve_binary('', 'translateLocally')
+
+def get_locally_inventory(translate_locally_path: str = '') -> Optional[LocallyInventory]:
+    """
+    Restituisce l'inventario dei modelli di translateLocally. È letto dalla cache su disco
+    e `translateLocally -l` viene eseguito solo se cambiano l'eseguibile o la cartella dei modelli.
+    Args:
+        translate_locally_path: Percorso dell'eseguibile translateLocally (necessario su Windows).
+    Returns:
+        Optional[LocallyInventory]: Inventario (da non modificare) o None se translateLocally
+                                    non è utilizzabile.
+    """
+    binary = _resolve_locally_binary(translate_locally_path)
+    return get_cached_value('locally', binary, get_locally_model_dirs(),
+                            lambda: _query_locally_inventory(binary), field='models')
+
+def get_locally_languages(translate_locally_path: str = '') -> List[str]:
+    """
+    Restituisce la lista univoca dei codici di lingua a due lettere supportati da translateLocally.
+    Il risultato è ricavato dall'inventario dei modelli (vedi get_locally_inventory).
+    Args:
+        translate_locally_path: Percorso dell'eseguibile translateLocally (opzionale su Ubuntu).
+    Returns:
+        List[str]: Lista di codici di lingua a due lettere (es. ['af', 'sq', 'ar', ...]).
+    """
+    inventory = get_locally_inventory(translate_locally_path)
+    languages = set()
+    for source, targets in (inventory or {}).items():
+        languages.add(source)
+        languages.update(targets)
+    return sorted(languages) if languages else ['en', 'it']  # Fallback
 
 def get_supported_languages(translate_locally_path: str = '') -> list:
     """
@@ -79,12 +126,22 @@ def get_supported_languages(translate_locally_path: str = '') -> list:
 
 # Variabili globali
 TRANSLATE_LOCALLY_AVAILABLE: Optional[bool] = None
-TRANSLATE_LOCALLY_MODELS: Optional[Dict[str, List[Tuple[str, str]]]] = None
+TRANSLATE_LOCALLY_MODELS: Optional[LocallyInventory] = None
 TRANSLATE_LOCALLY_PATH: Optional[str] = None
+_check_lock = threading.Lock()
+
+# Dimensione massima (caratteri) di un blocco e blocchi tradotti in parallelo
+LOCALLY_MAX_CHUNK_SIZE = 500
+LOCALLY_PARALLEL_CHUNKS = 2
+
+# Worker persistenti per modello; None finché non si sa se la modalità native messaging funziona
+_worker_pool = LocallyWorkerPool(workers_per_model=LOCALLY_PARALLEL_CHUNKS)
+_native_messaging_supported: Optional[bool] = None
 
 def check_translate_locally_availability(custom_path: Optional[str] = None) -> bool:
     """
-    Verifica se translateLocally è disponibile e inizializza i modelli supportati.
+    Verifica se translateLocally è disponibile e inizializza i modelli supportati
+    dall'inventario (vedi get_locally_inventory).
     Args:
         custom_path: Percorso opzionale per l'eseguibile translateLocally (necessario su Windows).
     Returns:
@@ -92,92 +149,67 @@ def check_translate_locally_availability(custom_path: Optional[str] = None) -> b
     """
     global TRANSLATE_LOCALLY_AVAILABLE, TRANSLATE_LOCALLY_MODELS, TRANSLATE_LOCALLY_PATH
 
-    if TRANSLATE_LOCALLY_AVAILABLE is not None and TRANSLATE_LOCALLY_MODELS is not None:
-        return TRANSLATE_LOCALLY_AVAILABLE
+    with _check_lock:
+        if TRANSLATE_LOCALLY_AVAILABLE is not None and TRANSLATE_LOCALLY_MODELS is not None:
+            return TRANSLATE_LOCALLY_AVAILABLE
 
-    # Su Linux, cerca translateLocally nel PATH
-    if platform.system() != "Windows":
-        try:
-            result_list = subprocess.run(
-                ["translateLocally", "-l"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False
-            )
-            if result_list.returncode == 0:
-                TRANSLATE_LOCALLY_PATH = "translateLocally"
-            else:
-                logging.warning(f"translateLocally non trovato nel PATH: {result_list.stderr}")
-                TRANSLATE_LOCALLY_AVAILABLE = False
-                return False
-        except FileNotFoundError:
-            logging.warning("translateLocally non trovato nel PATH su Linux. Disabilitato.")
-            TRANSLATE_LOCALLY_AVAILABLE = False
-            return False
-    else:  # Su Windows
-        if not custom_path or not os.path.isfile(custom_path):
+        if platform.system() == "Windows" and (not custom_path or not os.path.isfile(custom_path)):
             logging.warning(f"Percorso translateLocally non valido o non specificato: {custom_path}")
             TRANSLATE_LOCALLY_AVAILABLE = False
             return False
-        TRANSLATE_LOCALLY_PATH = custom_path
-        try:
-            result_list = subprocess.run(
-                [TRANSLATE_LOCALLY_PATH, "-l"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False
-            )
-            if result_list.returncode != 0:
-                logging.warning(f"translateLocally non funzionante: {result_list.stderr}")
-                TRANSLATE_LOCALLY_AVAILABLE = False
-                return False
-        except Exception as e:
-            logging.warning(f"Errore nel verificare translateLocally: {e}")
+
+        inventory = get_locally_inventory(custom_path or '')
+        if inventory is None:
+            logging.warning("translateLocally non disponibile. Disabilitato.")
             TRANSLATE_LOCALLY_AVAILABLE = False
             return False
-
-    # Parsa i modelli disponibili
-    try:
-        language_models: Dict[str, List[Tuple[str, str]]] = {}
-        output_lines = result_list.stdout.strip().splitlines()
-        language_map = {
-            "afrikaans": "af", "arabic": "ar", "bulgarian": "bg", "catalan": "ca", "czech": "cs",
-            "german": "de", "greek": "el", "english": "en", "spanish": "es", "estonian": "et",
-            "basque": "eu", "french": "fr", "galician": "gl", "serbo-croatian": "hbs", "hebrew": "he",
-            "hindi": "hi", "icelandic": "is", "italian": "it", "japanese": "ja", "korean": "ko",
-            "macedonian": "mk", "malay": "ml", "maltese": "mt", "norwegian": "no", "polish": "pl",
-            "sinhala": "si", "slovak": "sk", "slovene": "sl", "albanian": "sq", "swahili": "sw",
-            "thai": "th", "turkish": "tr", "ukrainian": "uk", "vietnamese": "vi"
-        }
-        for line in output_lines:
-            if "To invoke do -m" in line and any(model in line.lower() for model in ["tiny", "base", "transformer-tiny11", "full"]):
-                start_idx = line.find("do -m") + 6
-                if start_idx != -1 and start_idx < len(line):
-                    translation_spec = line[start_idx:].strip().split("-")
-                    if len(translation_spec) >= 3:
-                        source_lang = translation_spec[0].lower()
-                        target_lang = translation_spec[1].lower()
-                        model = translation_spec[2].lower()
-                        normalized_source = next((code for full, code in language_map.items() if full in source_lang), source_lang)
-                        normalized_target = next((code for full, code in language_map.items() if full in target_lang), target_lang)
-                        if normalized_source not in language_models:
-                            language_models[normalized_source] = []
-                        language_models[normalized_source].append((normalized_target, model))
-        TRANSLATE_LOCALLY_MODELS = language_models
+        TRANSLATE_LOCALLY_PATH = _resolve_locally_binary(custom_path or '')
+        TRANSLATE_LOCALLY_MODELS = inventory
         TRANSLATE_LOCALLY_AVAILABLE = True
         logging.debug(f"Modelli disponibili: {TRANSLATE_LOCALLY_MODELS}")
         return True
-    except Exception as e:
-        logging.warning(f"Errore nel parsare i modelli di translateLocally: {e}")
-        TRANSLATE_LOCALLY_AVAILABLE = False
-        return False
 
 def is_translate_locally_available() -> bool:
     """Restituisce True se translateLocally è disponibile."""
     return TRANSLATE_LOCALLY_AVAILABLE if TRANSLATE_LOCALLY_AVAILABLE is not None else False
 
+def shutdown_locally_workers():
+    """
+    Chiude tutti i processi translateLocally persistenti.
+    """
+    _worker_pool.shutdown()
+
+def _run_model(text: str, source: str, target: str, model: str) -> str:
+    """
+    Traduce il testo con un singolo modello (es. 'it-en-tiny').
+    Usa il worker persistente del modello; se la modalità native messaging non è
+    supportata ripiega su un processo translateLocally per chiamata.
+    Raises:
+        ValueError: Se la traduzione fallisce.
+    """
+    global _native_messaging_supported
+    model_name = f"{source}-{target}-{model}"
+    if _native_messaging_supported is not False:
+        try:
+            result = _worker_pool.translate(TRANSLATE_LOCALLY_PATH, model_name, text, source, target)
+            _native_messaging_supported = True
+            return result
+        except (LocallyWorkerError, OSError) as e:
+            if _native_messaging_supported is None:
+                logging.warning(f"Worker translateLocally non disponibili, uso un processo per chiamata: {e}")
+                _native_messaging_supported = False
+            else:
+                logging.error(f"Errore del worker translateLocally {model_name}: {e}")
+
+    command = [TRANSLATE_LOCALLY_PATH, "-m", model_name]
+    logging.debug(f"Esecuzione: {' '.join(command)}")
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    stdout, stderr = process.communicate(input=text)
+    if process.returncode != 0:
+        logging.error(f"Errore nella traduzione: {stderr}")
+        raise ValueError(f"Errore nella traduzione: {stderr}")
+    return "\n".join(line for line in stdout.strip().splitlines() if not line.startswith("QVariant"))
+
 def translate_locally(text: str, source: str, target: str) -> str:
     """
     Traduce il testo usando translateLocally.
@@ -198,32 +230,13 @@ def translate_locally(text: str, source: str, target: str) -> str:
         raise ValueError(f"Nessun modello disponibile per la lingua di origine: {source}")
 
     # Traduzione diretta
-    direct_translation = next((model for target_lang, model in language_models[source.lower()] if target_lang == target.lower()), None)
-    if direct_translation:
-        max_chunk_size = 500
-        chunks = [text[i:i + max_chunk_size] for i in range(0, len(text), max_chunk_size)]
-        translated_chunks = []
-
-        for chunk in chunks:
-            if not chunk.strip() or all(ord(c) in {0x200B, 0xFEFF, 0x00A0, 32} for c in chunk):
-                translated_chunks.append("")
-                logging.debug(f"Chunk vuoto ignorato: {repr(chunk)}")
-                continue
-
-            command = [TRANSLATE_LOCALLY_PATH, "-m", f"{source.lower()}-{target.lower()}-{direct_translation}"]
-            logging.debug(f"Esecuzione: {' '.join(command)}") 
-            process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            stdout, stderr = process.communicate(input=chunk)
-
-            if process.returncode == 0:
-                translated_chunk = stdout.strip()
-                translated_chunk = "\n".join(line for line in translated_chunk.splitlines() if not line.startswith("QVariant"))
-                translated_chunks.append(translated_chunk or "")
-            else:
-                logging.error(f"Errore nella traduzione: {stderr}")
-                raise ValueError(f"Errore nella traduzione: {stderr}")
-
-        return " ".join(translated_chunks)
+    direct_models = language_models[source.lower()].get(target.lower())
+    if direct_models:
+        direct_translation = direct_models[0]
+        return translate_segmented(
+            text,
+            lambda chunk: _run_model(chunk, source.lower(), target.lower(), direct_translation),
+            LOCALLY_MAX_CHUNK_SIZE, LOCALLY_PARALLEL_CHUNKS)
 
     # Traduzione con lingua intermedia (inglese)
     intermediate_lang = "en"
@@ -231,35 +244,26 @@ def translate_locally(text: str, source: str, target: str) -> str:
         raise ValueError(f"Lingua intermedia {intermediate_lang} non supportata")
 
     # Prima traduzione: source -> en
-    en_model = next((model for t, model in language_models[source.lower()] if t == intermediate_lang), None)
-    if not en_model:
+    en_models = language_models[source.lower()].get(intermediate_lang)
+    if not en_models:
         raise ValueError(f"Nessun modello per {source.lower()} -> {intermediate_lang}")
-
-    command = [TRANSLATE_LOCALLY_PATH, "-m", f"{source.lower()}-{intermediate_lang}-{en_model}"]
-    logging.info(f"Esecuzione (source -> en): {' '.join(command)}")
-    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    stdout, stderr = process.communicate(input=text)
-
-    if process.returncode != 0:
-        raise ValueError(f"Errore nella prima traduzione: {stderr}")
-    intermediate_text = "\n".join(line for line in stdout.strip().splitlines() if not line.startswith("QVariant"))
-    if not intermediate_text:
-        raise ValueError("Output non valido per la prima traduzione.")
+    en_model = en_models[0]
 
     # Seconda traduzione: en -> target
-    target_model = next((model for t, model in language_models[intermediate_lang] if t == target.lower()), None)
-    if not target_model:
+    target_models = language_models[intermediate_lang].get(target.lower())
+    if not target_models:
         raise ValueError(f"Nessun modello per {intermediate_lang} -> {target.lower()}")
+    target_model = target_models[0]
 
-    command = [TRANSLATE_LOCALLY_PATH, "-m", f"{intermediate_lang}-{target.lower()}-{target_model}"]
-    logging.info(f"Esecuzione (en -> target): {' '.join(command)}")
-    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    stdout, stderr = process.communicate(input=intermediate_text)
+    logging.info(f"Traduzione {source.lower()} -> {intermediate_lang} -> {target.lower()} con {en_model}/{target_model}")
 
-    if process.returncode != 0:
-        raise ValueError(f"Errore nella seconda traduzione: {stderr}")
-    translated_text = "\n".join(line for line in stdout.strip().splitlines() if not line.startswith("QVariant"))
-    if not translated_text:
-        raise ValueError("Output non valido per la seconda traduzione.")
+    def translate_pivot(chunk: str) -> str:
+        intermediate_text = _run_model(chunk, source.lower(), intermediate_lang, en_model)
+        if not intermediate_text:
+            raise ValueError("Output non valido per la prima traduzione.")
+        translated_text = _run_model(intermediate_text, intermediate_lang, target.lower(), target_model)
+        if not translated_text:
+            raise ValueError("Output non valido per la seconda traduzione.")
+        return translated_text
 
-    return translated_text
\ No newline at end of file
+    return translate_segmented(text, translate_pivot, LOCALLY_MAX_CHUNK_SIZE, LOCALLY_PARALLEL_CHUNKS)
@@ -0,0 +1,245 @@
+import json
+import time
+import queue
+import struct
+import logging
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+# Processi translateLocally persistenti, uno per modello (es. 'it-en-tiny').
+# In modalità CLI (-m) translateLocally legge stdin fino a EOF e termina, quindi ogni
+# traduzione ricaricherebbe il modello. I worker usano invece la modalità native messaging:
+# ogni messaggio è un JSON UTF-8 preceduto dalla sua lunghezza (4 byte, ordine nativo).
+
+NATIVE_MESSAGING_ARGS = ['-p']
+LOCALLY_IDLE_TIMEOUT = 300.0      # secondi di inattività prima di chiudere un worker
+LOCALLY_REQUEST_TIMEOUT = 120.0   # il primo messaggio include il caricamento del modello
+LOCALLY_WORKERS_PER_MODEL = 1
+
+class LocallyWorkerError(RuntimeError):
+    """Il worker translateLocally è terminato o non ha risposto correttamente."""
+
+class LocallyWorker:
+    """
+    Un processo translateLocally in modalità native messaging dedicato a un modello.
+    """
+
+    def __init__(self, binary: str, model: str):
+        self.binary = binary
+        self.model = model
+        self.process: Optional[subprocess.Popen] = None
+        self.last_used = time.monotonic()
+        self.busy = False
+        self._next_id = 0
+        self._responses: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+
+    def start(self):
+        command = [self.binary] + NATIVE_MESSAGING_ARGS
+        logging.debug(f"Avvio worker translateLocally per {self.model}: {' '.join(command)}")
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, bufsize=0)
+        self._reader = threading.Thread(target=self._read_loop, name=f"translateLocally-{self.model}",
+                                        daemon=True)
+        self._reader.start()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _read_loop(self):
+        stdout = self.process.stdout
+        try:
+            while True:
+                header = stdout.read(4)
+                if len(header) < 4:
+                    break
+                (length,) = struct.unpack('=I', header)
+                payload = stdout.read(length)
+                if len(payload) < length:
+                    break
+                try:
+                    self._responses.put(json.loads(payload.decode('utf-8')))
+                except ValueError as e:
+                    logging.warning(f"Messaggio non valido da translateLocally: {e}")
+        except Exception as e:
+            logging.debug(f"Lettura worker {self.model} interrotta: {e}")
+        finally:
+            # Segnala la terminazione a chi è in attesa di una risposta
+            self._responses.put(None)
+
+    def translate(self, text: str, source: str, target: str,
+                  timeout: float = LOCALLY_REQUEST_TIMEOUT) -> str:
+        """
+        Traduce il testo con il modello del worker.
+        Raises:
+            LocallyWorkerError: Se il processo termina, non risponde o segnala un errore.
+        """
+        if not self.is_alive():
+            raise LocallyWorkerError(f"Worker {self.model} non attivo")
+        self._next_id += 1
+        request_id = self._next_id
+        message = json.dumps({
+            "id": request_id,
+            "command": "Translate",
+            "data": {"src": source, "trg": target, "model": self.model, "text": text, "html": False},
+        }).encode('utf-8')
+        try:
+            self.process.stdin.write(struct.pack('=I', len(message)) + message)
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise LocallyWorkerError(f"Scrittura verso il worker {self.model} fallita: {e}")
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LocallyWorkerError(f"Timeout del worker {self.model}")
+            try:
+                response = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                raise LocallyWorkerError(f"Timeout del worker {self.model}")
+            if response is None:
+                raise LocallyWorkerError(f"Worker {self.model} terminato inaspettatamente")
+            # Ignora aggiornamenti di avanzamento e risposte ad altre richieste
+            if response.get('id') != request_id or 'success' not in response:
+                continue
+            self.last_used = time.monotonic()
+            if not response['success']:
+                raise ValueError(f"Errore nella traduzione: {response.get('error', response)}")
+            return response.get('data', {}).get('target', {}).get('text', '')
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                logging.warning(f"Worker translateLocally {self.model} terminato forzatamente")
+        logging.debug(f"Worker translateLocally {self.model} chiuso")
+
+class LocallyWorkerPool:
+    """
+    Pool di worker translateLocally indicizzato per modello.
+    I worker inattivi vengono chiusi dopo `idle_timeout`; quelli terminati vengono riavviati.
+    """
+
+    def __init__(self, idle_timeout: float = LOCALLY_IDLE_TIMEOUT,
+                 workers_per_model: int = LOCALLY_WORKERS_PER_MODEL):
+        self.idle_timeout = idle_timeout
+        self.workers_per_model = workers_per_model
+        self._workers: Dict[str, List[LocallyWorker]] = {}
+        self._condition = threading.Condition()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def _acquire(self, binary: str, model: str) -> LocallyWorker:
+        stale = []
+        with self._condition:
+            while True:
+                workers = self._workers.setdefault(model, [])
+                # Rimuovi i worker terminati (verranno riavviati su richiesta) o con un altro eseguibile
+                for worker in [w for w in workers if not w.busy and (not w.is_alive() or w.binary != binary)]:
+                    if not worker.is_alive():
+                        logging.warning(f"Worker translateLocally {model} terminato, verrà riavviato")
+                    workers.remove(worker)
+                    stale.append(worker)
+                idle = next((w for w in workers if not w.busy and w.binary == binary), None)
+                if idle is not None:
+                    idle.busy = True
+                    break
+                if len(workers) < self.workers_per_model:
+                    worker = LocallyWorker(binary, model)
+                    worker.busy = True
+                    workers.append(worker)
+                    break
+                self._condition.wait()
+        for old_worker in stale:
+            old_worker.close()
+        if idle is not None:
+            return idle
+        try:
+            worker.start()
+        except Exception:
+            self._discard(worker)
+            raise
+        self._ensure_reaper()
+        return worker
+
+    def _release(self, worker: LocallyWorker):
+        with self._condition:
+            worker.busy = False
+            self._condition.notify_all()
+
+    def _discard(self, worker: LocallyWorker):
+        with self._condition:
+            workers = self._workers.get(worker.model, [])
+            if worker in workers:
+                workers.remove(worker)
+            self._condition.notify_all()
+        worker.close()
+
+    def translate(self, binary: str, model: str, text: str, source: str, target: str) -> str:
+        """
+        Traduce il testo con un worker del modello indicato, riavviandolo una volta se si blocca.
+        Raises:
+            LocallyWorkerError: Se anche il worker riavviato fallisce.
+        """
+        for attempt in range(2):
+            worker = self._acquire(binary, model)
+            try:
+                result = worker.translate(text, source, target)
+            except LocallyWorkerError as e:
+                self._discard(worker)
+                if attempt == 1:
+                    raise
+                logging.warning(f"{e}, riavvio del worker")
+                continue
+            except Exception:
+                self._release(worker)
+                raise
+            self._release(worker)
+            return result
+
+    def _ensure_reaper(self):
+        if self._reaper is not None:
+            return
+        with self._condition:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_loop, name="LocallyReaper", daemon=True)
+                self._reaper.start()
+
+    def _reap_loop(self):
+        interval = max(self.idle_timeout / 4, 1.0)
+        while not self._stop_event.wait(interval):
+            expired = []
+            now = time.monotonic()
+            with self._condition:
+                for model, workers in self._workers.items():
+                    for worker in list(workers):
+                        if not worker.busy and (now - worker.last_used > self.idle_timeout
+                                                or not worker.is_alive()):
+                            workers.remove(worker)
+                            expired.append(worker)
+            for worker in expired:
+                logging.debug(f"Chiusura worker translateLocally inattivo: {worker.model}")
+                worker.close()
+
+    def shutdown(self):
+        """Chiude tutti i worker del pool."""
+        self._stop_event.set()
+        with self._condition:
+            workers = [w for group in self._workers.values() for w in group]
+            self._workers.clear()
+            self._condition.notify_all()
+        for worker in workers:
+            worker.close()
+        # Il pool resta utilizzabile: il thread di pulizia ripartirà al prossimo worker
+        self._stop_event = threading.Event()
+        self._reaper = None
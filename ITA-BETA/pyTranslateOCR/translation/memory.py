@@ -0,0 +1,181 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+import unicodedata
+import configparser
+from typing import Optional
+
+# Memoria di traduzione persistente: evita di ritradurre testi già visti
+# (dialoghi, menu, etichette) interrogando un database SQLite locale.
+
+TM_FILE = 'ocrqt_tm.sqlite'
+TM_MAX_ENTRIES = 20000
+# Frazione di voci mantenute quando si supera il limite (evita di potare a ogni inserimento)
+TM_PRUNE_RATIO = 0.9
+
+_SPACES_RE = re.compile(r'[ \t\u00a0]+')
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizza il testo per la chiave della memoria: Unicode NFC, spazi ripetuti
+    compressi e righe ripulite, mantenendo gli a capo.
+    """
+    text = unicodedata.normalize('NFC', text)
+    lines = [_SPACES_RE.sub(' ', line).strip() for line in text.splitlines()]
+    return '\n'.join(lines).strip()
+
+class TranslationMemory:
+    """
+    Memoria di traduzione su SQLite con rimozione LRU e contatori di hit/miss.
+    """
+
+    def __init__(self, path: str = TM_FILE, max_entries: int = TM_MAX_ENTRIES, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS memory (
+                                engine TEXT NOT NULL,
+                                source_lang TEXT NOT NULL,
+                                target_lang TEXT NOT NULL,
+                                source_text TEXT NOT NULL,
+                                translation TEXT NOT NULL,
+                                last_used REAL NOT NULL,
+                                PRIMARY KEY (engine, source_lang, target_lang, source_text))""")
+            conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)")
+            conn.commit()
+            self._entries = conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+            self._conn = conn
+            logging.debug(f"Memoria di traduzione aperta: {self.path} ({self._entries} voci)")
+        return self._conn
+
+    def lookup(self, engine: str, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        """
+        Cerca una traduzione già memorizzata.
+        Args:
+            engine: Motore di traduzione.
+            source_lang: Lingua di origine.
+            target_lang: Lingua di destinazione.
+            text: Testo da tradurre.
+        Returns:
+            Optional[str]: Traduzione memorizzata o None.
+        """
+        if not self.enabled:
+            return None
+        key = (engine, source_lang, target_lang, normalize_text(text))
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("""SELECT translation FROM memory WHERE engine=? AND source_lang=?
+                                      AND target_lang=? AND source_text=?""", key).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("""UPDATE memory SET last_used=? WHERE engine=? AND source_lang=?
+                                AND target_lang=? AND source_text=?""", (time.time(),) + key)
+                conn.commit()
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            logging.error(f"Errore nella lettura della memoria di traduzione: {e}")
+            return None
+
+    def store(self, engine: str, source_lang: str, target_lang: str, text: str, translation: str):
+        """
+        Memorizza una traduzione, rimuovendo le voci usate meno di recente oltre il limite.
+        """
+        if not self.enabled or not translation:
+            return
+        key = (engine, source_lang, target_lang, normalize_text(text))
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("""INSERT OR REPLACE INTO memory
+                                (engine, source_lang, target_lang, source_text, translation, last_used)
+                                VALUES (?, ?, ?, ?, ?, ?)""", key + (translation, time.time()))
+                # Stima per eccesso (le sostituzioni non aggiungono voci): ricontrolla solo oltre il limite
+                self._entries += 1
+                if self._entries > self.max_entries:
+                    self._entries = conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+                if self._entries > self.max_entries:
+                    keep = int(self.max_entries * TM_PRUNE_RATIO)
+                    conn.execute("""DELETE FROM memory WHERE rowid IN
+                                    (SELECT rowid FROM memory ORDER BY last_used ASC LIMIT ?)""",
+                                 (self._entries - keep,))
+                    logging.debug(f"Memoria di traduzione potata: {self._entries} -> {keep} voci")
+                    self._entries = keep
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Errore nella scrittura della memoria di traduzione: {e}")
+
+    def stats(self) -> dict:
+        """Restituisce hit, miss e numero di voci memorizzate."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': self._entries or 0,
+        }
+
+    def clear(self):
+        """Svuota la memoria di traduzione."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM memory")
+            conn.commit()
+            self._entries = 0
+            self.hits = self.misses = 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def load_memory_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge le impostazioni della memoria di traduzione dalla sezione [TranslationMemory].
+    Returns:
+        dict: enabled, max_entries e path.
+    """
+    settings = {'enabled': True, 'max_entries': TM_MAX_ENTRIES, 'path': TM_FILE}
+    if not os.path.isfile(ini_file):
+        return settings
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    if 'TranslationMemory' not in config:
+        return settings
+    try:
+        settings['enabled'] = config.getboolean('TranslationMemory', 'enabled', fallback=True)
+        settings['max_entries'] = config.getint('TranslationMemory', 'max_entries', fallback=TM_MAX_ENTRIES)
+        settings['path'] = config.get('TranslationMemory', 'path', fallback=TM_FILE)
+    except ValueError as e:
+        logging.error(f"Errore nella sezione [TranslationMemory]: {e}, usando valori predefiniti")
+    return settings
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+def get_translation_memory() -> TranslationMemory:
+    """Restituisce la memoria di traduzione condivisa, aprendola al primo utilizzo."""
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                settings = load_memory_settings()
+                _memory = TranslationMemory(settings['path'], settings['max_entries'], settings['enabled'])
+    return _memory
@@ -1,6 +1,8 @@
 import requests
 import json
 import logging
+import transport
+from .health import EngineUnavailableError
 from typing import Union, List
 
 # logging.basicConfig(level=logging.INFO)
@@ -71,7 +73,7 @@ def is_nllb_available() -> bool:
         bool: True se il server risponde, False altrimenti.
     """
     try:
-        response = requests.get(f"{NLLB_URL}", timeout=2)
+        response = transport.get(f"{NLLB_URL}", timeout=2)
         return response.status_code == 200
     except requests.RequestException as e:
         logging.warning(f"Server NLLB non disponibile: {e}")
@@ -108,11 +110,10 @@ def translate_nllb(text: Union[str, List[str]], source: str, target: str) -> Uni
         }
         
         try:
-            response = requests.post(
+            response = transport.post(
                 f"{NLLB_URL}/translate",
                 headers={'Content-Type': 'application/json'},
-                data=json.dumps(params),
-                timeout=5
+                data=json.dumps(params)
             )
             if response.status_code == 200:
                 data = response.json()
@@ -121,6 +122,46 @@ def translate_nllb(text: Union[str, List[str]], source: str, target: str) -> Uni
             else:
                 raise ValueError(f"Errore nella traduzione con NLLB: {response.text}")
         except requests.RequestException as e:
-            raise ValueError(f"Errore nella connessione a NLLB: {e}")
+            raise EngineUnavailableError(f"Errore nella connessione a NLLB: {e}")
     
-    return translations[0] if isinstance(text, str) else translations
\ No newline at end of file
+    return translations[0] if isinstance(text, str) else translations
+
+def translate_nllb_batch(texts: List[str], source: str, target: str) -> List[str]:
+    """
+    Traduce più testi con una sola richiesta a NLLB (campo "source" come lista).
+    Args:
+        texts: Testi da tradurre.
+        source: Codice della lingua di origine (es. 'en').
+        target: Codice della lingua di destinazione (es. 'it').
+    Returns:
+        List[str]: Traduzioni nello stesso ordine dei testi ("" per i testi vuoti).
+    Raises:
+        ValueError: Se la traduzione fallisce o la risposta non corrisponde ai testi inviati.
+    """
+    indexes = [i for i, text in enumerate(texts) if text.strip()]
+    results = [""] * len(texts)
+    if not indexes:
+        return results
+    params = {
+        'source': [texts[i] for i in indexes],
+        'src_lang': format_language(source),
+        'tgt_lang': format_language(target),
+    }
+    try:
+        response = transport.post(
+            f"{NLLB_URL}/translate",
+            headers={'Content-Type': 'application/json'},
+            data=json.dumps(params)
+        )
+    except requests.RequestException as e:
+        raise EngineUnavailableError(f"Errore nella connessione a NLLB: {e}")
+    if response.status_code != 200:
+        raise ValueError(f"Errore nella traduzione con NLLB: {response.text}")
+    translated = response.json().get('translation', [])
+    if isinstance(translated, str):
+        translated = [translated]
+    if len(translated) != len(indexes):
+        raise ValueError(f"NLLB ha restituito {len(translated)} traduzioni per {len(indexes)} testi")
+    for i, translation in zip(indexes, translated):
+        results[i] = translation
+    return results
@@ -0,0 +1,134 @@
+import time
+import logging
+import importlib
+import threading
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+from metrics import get_metrics
+
+# Registro dei motori di traduzione risolti in modo pigro: il modulo di un motore (e le sue
+# dipendenze, es. googletrans/httpx o requests) viene importato solo al primo utilizzo,
+# così che l'avvio non paghi l'importazione dei motori non configurati.
+
+class EngineSpec:
+    """Modulo e nomi delle funzioni di un motore di traduzione."""
+    __slots__ = ('module', 'functions')
+
+    def __init__(self, module: str, functions: Dict[str, str]):
+        self.module = module
+        self.functions = functions
+
+class EngineRegistry:
+    """
+    Associa ogni motore al proprio modulo e alle funzioni 'translate', 'batch' e 'probe'.
+    Il modulo viene importato al primo get()/load() ed è poi riutilizzato.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, EngineSpec] = {}
+        self._modules: Dict[str, ModuleType] = {}
+        self._load_times: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, engine: str, module: str, translate: str, batch: Optional[str] = None,
+                 probe: Optional[str] = None):
+        """
+        Registra un motore senza importarne il modulo.
+        Args:
+            engine: Nome del motore (es. 'LibreTranslate').
+            module: Modulo da importare (es. 'translation.libretranslate').
+            translate: Funzione di traduzione (text, source, target).
+            batch: Funzione di traduzione a lotti (texts, source, target), se supportata.
+            probe: Funzione di verifica della disponibilità, se il motore è remoto.
+        """
+        functions = {'translate': translate}
+        if batch:
+            functions['batch'] = batch
+        if probe:
+            functions['probe'] = probe
+        self._specs[engine] = EngineSpec(module, functions)
+
+    def engines(self) -> List[str]:
+        """Restituisce i nomi dei motori registrati."""
+        return list(self._specs)
+
+    def has(self, engine: str, function: str) -> bool:
+        """True se il motore è registrato e fornisce la funzione indicata (senza importarlo)."""
+        spec = self._specs.get(engine)
+        return spec is not None and function in spec.functions
+
+    def is_loaded(self, engine: str) -> bool:
+        """True se il modulo del motore è già stato importato."""
+        return engine in self._modules
+
+    def load(self, engine: str) -> ModuleType:
+        """
+        Importa (una sola volta) il modulo del motore.
+        Args:
+            engine: Nome del motore.
+        Returns:
+            ModuleType: Modulo del motore.
+        Raises:
+            ValueError: Se il motore non è registrato o il modulo non è importabile
+                        (es. dipendenza opzionale non installata).
+        """
+        module = self._modules.get(engine)
+        if module is not None:
+            return module
+        spec = self._specs.get(engine)
+        if spec is None:
+            raise ValueError(f"Motore di traduzione {engine} non registrato.")
+        with self._lock:
+            module = self._modules.get(engine)
+            if module is not None:
+                return module
+            start = time.perf_counter()
+            try:
+                module = importlib.import_module(spec.module)
+            except ImportError as e:
+                logging.error(f"Impossibile caricare il motore {engine} ({spec.module}): {e}")
+                raise ValueError(f"Motore di traduzione {engine} non installato: {e}") from e
+            ms = (time.perf_counter() - start) * 1000
+            self._modules[engine] = module
+            self._load_times[engine] = ms
+        get_metrics().observe('engine_load', ms, engine)
+        logging.debug(f"Motore {engine} caricato da {spec.module} in {ms:.1f} ms")
+        return module
+
+    def get(self, engine: str, function: str = 'translate') -> Optional[Callable]:
+        """
+        Restituisce una funzione del motore, importandone il modulo se necessario.
+        Args:
+            engine: Nome del motore.
+            function: 'translate', 'batch' o 'probe'.
+        Returns:
+            Optional[Callable]: La funzione o None se il motore non la fornisce.
+        Raises:
+            ValueError: Se il modulo del motore non è importabile.
+        """
+        if not self.has(engine, function):
+            return None
+        return getattr(self.load(engine), self._specs[engine].functions[function])
+
+    def probe(self, engine: str) -> Callable[[], bool]:
+        """Funzione di verifica da registrare nel registro di stato, risolta al primo uso."""
+        return lambda: self.get(engine, 'probe')()
+
+    def preload(self, engine: str) -> bool:
+        """
+        Importa in anticipo il modulo del motore (es. da un thread in background).
+        Returns:
+            bool: True se il modulo è stato caricato.
+        """
+        if engine not in self._specs:
+            return False
+        try:
+            self.load(engine)
+            return True
+        except ValueError:
+            return False
+
+    def load_times(self) -> Dict[str, float]:
+        """Tempi di importazione (ms) dei motori caricati finora."""
+        with self._lock:
+            return dict(self._load_times)
@@ -0,0 +1,119 @@
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple
+
+# Fine frase: punteggiatura latina seguita da spazio, punteggiatura CJK (anche senza spazio)
+# oppure un a capo. Le virgolette/parentesi di chiusura restano attaccate alla frase.
+_SENTENCE_END_RE = re.compile(
+    r'[.!?…]+["\'»”’)\]]*\s+'
+    r'|[。！？]+[」』”’）]*\s*'
+    r'|\s*\n\s*'
+)
+_BLANK_CHARS = ' \t\r\n\u00a0\u200b\ufeff'
+
+class Segment(NamedTuple):
+    text: str        # contenuto da tradurre
+    separator: str   # spazi/a capo originali che seguono il contenuto
+
+def is_blank(text: str) -> bool:
+    """Restituisce True se il testo contiene solo spazi o caratteri invisibili."""
+    return not text.strip(_BLANK_CHARS)
+
+def split_segments(text: str) -> List[Segment]:
+    """
+    Suddivide il testo in frasi e paragrafi, conservando i separatori originali.
+    Args:
+        text: Testo da suddividere.
+    Returns:
+        List[Segment]: Segmenti la cui concatenazione (testo + separatore) ricostruisce l'originale.
+    """
+    segments = []
+    pos = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        chunk = text[pos:match.end()]
+        content = chunk.rstrip(_BLANK_CHARS)
+        separator = chunk[len(content):]
+        if not content and segments:
+            # Separatori consecutivi (es. righe vuote): uniscili al segmento precedente
+            previous = segments[-1]
+            segments[-1] = Segment(previous.text, previous.separator + separator)
+        else:
+            segments.append(Segment(content, separator))
+        pos = match.end()
+    if pos < len(text):
+        segments.append(Segment(text[pos:], ''))
+    return segments
+
+def _split_long(segment: Segment, max_chars: int) -> List[Segment]:
+    # Frase più lunga del budget: taglia sugli spazi, o a lunghezza fissa per le lingue senza spazi
+    words = re.findall(r'\S+\s*', segment.text)
+    if len(words) <= 1:
+        words = [segment.text[i:i + max_chars] for i in range(0, len(segment.text), max_chars)]
+    pieces = []
+    current = ''
+    for word in words:
+        if current and len(current) + len(word) > max_chars:
+            content = current.rstrip(_BLANK_CHARS)
+            pieces.append(Segment(content, current[len(content):]))
+            current = ''
+        current += word
+    content = current.rstrip(_BLANK_CHARS)
+    pieces.append(Segment(content, current[len(content):] + segment.separator))
+    return pieces
+
+def pack_segments(segments: List[Segment], max_chars: int) -> List[Segment]:
+    """
+    Raggruppa segmenti consecutivi in blocchi che non superano `max_chars` caratteri.
+    I separatori interni restano nel testo del blocco, quello finale diventa il suo separatore.
+    Args:
+        segments: Segmenti prodotti da split_segments.
+        max_chars: Dimensione massima di un blocco per il motore di traduzione.
+    Returns:
+        List[Segment]: Blocchi da tradurre.
+    """
+    batches = []
+    current: List[Segment] = []
+    size = 0
+    for segment in segments:
+        parts = _split_long(segment, max_chars) if len(segment.text) > max_chars else [segment]
+        for part in parts:
+            part_size = len(part.text) + len(part.separator)
+            if current and size + part_size > max_chars:
+                batches.append(_join(current))
+                current, size = [], 0
+            current.append(part)
+            size += part_size
+    if current:
+        batches.append(_join(current))
+    return batches
+
+def _join(segments: List[Segment]) -> Segment:
+    text = ''.join(s.text + s.separator for s in segments[:-1]) + segments[-1].text
+    return Segment(text, segments[-1].separator)
+
+def translate_segmented(text: str, translate_fn: Callable[[str], str], max_chars: int,
+                        max_workers: int = 1) -> str:
+    """
+    Traduce un testo lungo a blocchi di frasi, in parallelo, ripristinando ordine e a capo.
+    Args:
+        text: Testo da tradurre.
+        translate_fn: Funzione che traduce un singolo blocco.
+        max_chars: Dimensione massima di un blocco.
+        max_workers: Numero massimo di blocchi tradotti contemporaneamente.
+    Returns:
+        str: Testo tradotto.
+    """
+    batches = pack_segments(split_segments(text), max_chars)
+    pending = [i for i, batch in enumerate(batches) if not is_blank(batch.text)]
+    logging.debug(f"Testo suddiviso in {len(batches)} blocchi ({len(pending)} da tradurre)")
+    results = {}
+    if len(pending) <= 1 or max_workers <= 1:
+        for i in pending:
+            results[i] = translate_fn(batches[i].text)
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            for i, translated in zip(pending, executor.map(translate_fn, [batches[i].text for i in pending])):
+                results[i] = translated
+    return ''.join((results[i] or '') + batch.separator if i in results else batch.text + batch.separator
+                   for i, batch in enumerate(batches))
@@ -1,13 +1,90 @@
+import os
 import logging
-from .libretranslate import is_libretranslate_available, translate_libre
-from .nllb import is_nllb_available, translate_nllb
-from .locally import is_translate_locally_available, translate_locally, check_translate_locally_availability
-from .google import is_google_translate_available, translate_google
-from PyQt5.QtWidgets import QMessageBox
+import configparser
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from .health import EngineHealthRegistry, EngineUnavailableError
+from .memory import get_translation_memory
+from .registry import EngineRegistry
+from metrics import span
 
 # logging.basicConfig(level=logging.INFO)
 
-def translate_text(translate_engine: str, text: str, source_lang: str, target_lang: str, unique_text: bool, translate_locally_path: str = '') -> str:
+# Motori di traduzione: i moduli vengono importati solo al primo utilizzo
+engine_registry = EngineRegistry()
+engine_registry.register("LibreTranslate", "translation.libretranslate", "translate_libre",
+                         batch="translate_libre_batch", probe="is_libretranslate_available")
+engine_registry.register("NLLB", "translation.nllb", "translate_nllb",
+                         batch="translate_nllb_batch", probe="is_nllb_available")
+engine_registry.register("Google", "translation.google", "translate_google",
+                         probe="is_google_translate_available")
+engine_registry.register("Locally", "translation.locally", "translate_locally")
+
+# Stato dei motori remoti: evita una verifica HTTP prima di ogni traduzione
+health_registry = EngineHealthRegistry()
+health_registry.register_probe("LibreTranslate", engine_registry.probe("LibreTranslate"))
+health_registry.register_probe("NLLB", engine_registry.probe("NLLB"))
+# La verifica di Google è una vera traduzione con l'API non ufficiale: solo su richiesta
+health_registry.register_probe("Google", engine_registry.probe("Google"), background=False)
+
+# Traduzione a lotti: più segmenti in una sola richiesta per i motori che la supportano
+BATCH_MAX_CHARS = 2000      # caratteri massimi per richiesta
+BATCH_MAX_ITEMS = 32        # segmenti massimi per richiesta
+BATCH_PARALLEL_SEGMENTS = 4 # segmenti tradotti contemporaneamente dai motori senza lotti
+
+_batch_settings = None
+
+def load_batch_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge i limiti dei lotti di traduzione dalla sezione [Batch].
+    Returns:
+        dict: max_chars e max_items.
+    """
+    settings = {'max_chars': BATCH_MAX_CHARS, 'max_items': BATCH_MAX_ITEMS}
+    if not os.path.isfile(ini_file):
+        return settings
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    if 'Batch' not in config:
+        return settings
+    try:
+        settings['max_chars'] = max(1, config.getint('Batch', 'max_chars', fallback=BATCH_MAX_CHARS))
+        settings['max_items'] = max(1, config.getint('Batch', 'max_items', fallback=BATCH_MAX_ITEMS))
+    except ValueError as e:
+        logging.error(f"Errore nella sezione [Batch]: {e}, usando valori predefiniti")
+    return settings
+
+def get_batch_settings() -> dict:
+    """Restituisce i limiti dei lotti, letti al primo utilizzo."""
+    global _batch_settings
+    if _batch_settings is None:
+        _batch_settings = load_batch_settings()
+    return _batch_settings
+
+def split_batches(texts: List[str], max_chars: int, max_items: int) -> List[List[int]]:
+    """
+    Suddivide i testi in lotti che rispettano il budget di caratteri e di elementi.
+    Un testo più lungo del budget forma un lotto da solo.
+    Args:
+        texts: Testi da raggruppare.
+        max_chars: Caratteri massimi per lotto.
+        max_items: Elementi massimi per lotto.
+    Returns:
+        List[List[int]]: Indici dei testi per ogni lotto, nell'ordine originale.
+    """
+    batches = []
+    current, size = [], 0
+    for i, text in enumerate(texts):
+        if current and (size + len(text) > max_chars or len(current) >= max_items):
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+def translate_text(translate_engine: str, text: str, source_lang: str, target_lang: str, unique_text: bool, translate_locally_path: str = '', use_memory: bool = True) -> str:
     """
     Traduce il testo usando il motore specificato, con fallback su LibreTranslate se necessario.
     Args:
@@ -17,6 +94,7 @@ def translate_text(translate_engine: str, text: str, source_lang: str, target_la
         target_lang: Codice della lingua di destinazione.
         unique_text: Se True, unisce il testo in una singola linea.
         translate_locally_path: Percorso opzionale per translateLocally (necessario per Locally su Windows).
+        use_memory: Se False, ignora la memoria di traduzione in lettura (il risultato viene comunque memorizzato).
     Returns:
         str: Testo tradotto.
     Raises:
@@ -26,33 +104,132 @@ def translate_text(translate_engine: str, text: str, source_lang: str, target_la
         return ""
     if unique_text:
         text = text.replace('\n', ' ')
+
+    memory = get_translation_memory()
+    langs = f"{source_lang}>{target_lang}"
+    if use_memory:
+        with span('translate_memory', translate_engine, langs, chars=len(text)) as s:
+            cached = memory.lookup(translate_engine, source_lang, target_lang, text)
+            s.set(hit=cached is not None)
+        if cached is not None:
+            logging.debug(f"Traduzione trovata nella memoria ({translate_engine})")
+            return cached
     
     # Funzione helper per provare un motore con fallback
     def try_translate(engine, fallback_engine=None):
         try:
-            if engine == "LibreTranslate" and is_libretranslate_available():
-                return translate_libre(text, source_lang, target_lang)
-            elif engine == "NLLB" and is_nllb_available():
-                return translate_nllb(text, source_lang, target_lang)
-            elif engine == "Locally":
-                if not is_translate_locally_available():
-                    check_translate_locally_availability(translate_locally_path)
-                if is_translate_locally_available():
-                    return translate_locally(text, source_lang, target_lang)
+            if engine == "Locally":
+                locally = engine_registry.load(engine)
+                if not locally.is_translate_locally_available():
+                    locally.check_translate_locally_availability(translate_locally_path)
+                if locally.is_translate_locally_available():
+                    with span('translate', engine, langs, chars=len(text)):
+                        return locally.translate_locally(text, source_lang, target_lang), engine
                 else:
                     raise ValueError("translateLocally non disponibile. Verifica il percorso o l'installazione.")
-            elif engine == "Google" and is_google_translate_available():
-                return translate_google(text, source_lang, target_lang)
-            else:
+            if not engine_registry.has(engine, 'probe') or not health_registry.is_available(engine):
                 raise ValueError(f"Motore di traduzione {engine} non disponibile.")
+            translate_fn = engine_registry.get(engine)
+            try:
+                with span('translate', engine, langs, chars=len(text)):
+                    result = translate_fn(text, source_lang, target_lang)
+            except EngineUnavailableError as e:
+                health_registry.mark_failure(engine, str(e))
+                raise
+            health_registry.mark_success(engine)
+            return result, engine
         except ValueError as e:
             logging.warning(f"Errore con {engine}: {e}")
-            if fallback_engine:
+            if fallback_engine and fallback_engine != engine:
                 logging.info(f"Fallback su {fallback_engine}")
                 return try_translate(fallback_engine)
             raise
 
     try:
-        return try_translate(translate_engine, fallback_engine="LibreTranslate")
+        translated, used_engine = try_translate(translate_engine, fallback_engine="LibreTranslate")
+        memory.store(used_engine, source_lang, target_lang, text, translated)
+        return translated
     except ValueError as e:
-        raise ValueError(f"Traduzione fallita: {e}")
\ No newline at end of file
+        raise ValueError(f"Traduzione fallita: {e}")
+
+def translate_batch(translate_engine: str, texts: List[str], source_lang: str, target_lang: str,
+                    translate_locally_path: str = '', use_memory: bool = True) -> List[str]:
+    """
+    Traduce una lista di segmenti inviandone molti per richiesta (LibreTranslate, NLLB).
+    I segmenti già presenti nella memoria di traduzione non vengono inviati; gli altri
+    motori, o un lotto fallito, ripiegano su translate_text segmento per segmento.
+    Args:
+        translate_engine: Motore di traduzione.
+        texts: Segmenti da tradurre.
+        source_lang: Codice della lingua di origine.
+        target_lang: Codice della lingua di destinazione.
+        translate_locally_path: Percorso opzionale per translateLocally.
+        use_memory: Se False, ignora la memoria di traduzione in lettura.
+    Returns:
+        List[str]: Traduzioni nello stesso ordine dei segmenti.
+    Raises:
+        ValueError: Se la traduzione di un segmento fallisce.
+    """
+    results = [""] * len(texts)
+    memory = get_translation_memory()
+    # Segmenti unici da tradurre -> posizioni nella lista originale
+    pending = {}
+    for i, text in enumerate(texts):
+        if not text.strip():
+            continue
+        if use_memory and text not in pending:
+            cached = memory.lookup(translate_engine, source_lang, target_lang, text)
+            if cached is not None:
+                results[i] = cached
+                continue
+        pending.setdefault(text, []).append(i)
+    if not pending:
+        return results
+    unique = list(pending)
+    translations = {}
+
+    batch_fn = None
+    if engine_registry.has(translate_engine, 'batch') and health_registry.is_available(translate_engine):
+        batch_fn = engine_registry.get(translate_engine, 'batch')
+    if batch_fn is not None:
+        settings = get_batch_settings()
+        for batch in split_batches(unique, settings['max_chars'], settings['max_items']):
+            batch_texts = [unique[i] for i in batch]
+            try:
+                with span('translate_batch', translate_engine, f"{source_lang}>{target_lang}",
+                          chars=sum(len(text) for text in batch_texts), segments=len(batch_texts)):
+                    translated = batch_fn(batch_texts, source_lang, target_lang)
+            except EngineUnavailableError as e:
+                # Server irraggiungibile: gli altri lotti pagherebbero lo stesso timeout
+                health_registry.mark_failure(translate_engine, str(e))
+                logging.warning(f"{translate_engine} non raggiungibile, lotti rimanenti tradotti "
+                                f"singolarmente (con fallback): {e}")
+                break
+            except ValueError as e:
+                logging.warning(f"Lotto di {len(batch_texts)} segmenti fallito con {translate_engine}, "
+                                f"traduzione singola: {e}")
+                continue
+            health_registry.mark_success(translate_engine)
+            for text, translation in zip(batch_texts, translated):
+                translations[text] = translation
+                memory.store(translate_engine, source_lang, target_lang, text, translation)
+        logging.debug(f"Traduzione a lotti ({translate_engine}): {len(translations)}/{len(unique)} segmenti")
+
+    # Motori senza lotti o lotti falliti: un segmento per richiesta (con fallback)
+    remaining = [text for text in unique if text not in translations]
+
+    def translate_single(text: str) -> str:
+        return translate_text(translate_engine, text, source_lang, target_lang, False,
+                              translate_locally_path, use_memory=False)
+
+    if len(remaining) == 1:
+        translations[remaining[0]] = translate_single(remaining[0])
+    elif remaining:
+        with ThreadPoolExecutor(max_workers=min(BATCH_PARALLEL_SEGMENTS, len(remaining))) as executor:
+            for text, translation in zip(remaining, executor.map(translate_single, remaining)):
+                translations[text] = translation
+
+    for text, positions in pending.items():
+        for i in positions:
+            results[i] = translations[text]
+    return results
@@ -0,0 +1,115 @@
+import os
+import logging
+import threading
+import configparser
+
+# Livello di trasporto HTTP condiviso da LibreTranslate, NLLB e Umi-OCR server.
+# Una sola requests.Session con pool di connessioni keep-alive per host, così che le
+# richieste successive riusino la stessa connessione TCP. requests viene importato alla
+# creazione della sessione, non all'avvio del programma.
+
+DEFAULT_POOL_CONNECTIONS = 4   # numero di host con un pool dedicato
+DEFAULT_POOL_MAXSIZE = 8       # connessioni mantenute aperte per host
+DEFAULT_TIMEOUT = 5.0          # secondi, per le traduzioni
+DEFAULT_OCR_TIMEOUT = 30.0     # secondi, per l'OCR tramite Umi-OCR server
+
+_settings = None
+_session = None
+_session_lock = threading.Lock()
+
+def load_transport_settings(ini_file: str = 'ocrqt.ini') -> dict:
+    """
+    Legge le impostazioni di rete dalla sezione [Network] di ocrqt.ini.
+    Args:
+        ini_file: Percorso del file INI.
+    Returns:
+        dict: pool_connections, pool_maxsize, timeout e ocr_timeout.
+    """
+    settings = {
+        'pool_connections': DEFAULT_POOL_CONNECTIONS,
+        'pool_maxsize': DEFAULT_POOL_MAXSIZE,
+        'timeout': DEFAULT_TIMEOUT,
+        'ocr_timeout': DEFAULT_OCR_TIMEOUT,
+    }
+    if not os.path.isfile(ini_file):
+        return settings
+    config = configparser.ConfigParser()
+    config.read(ini_file)
+    if 'Network' not in config:
+        return settings
+    try:
+        settings['pool_connections'] = config.getint('Network', 'pool_connections', fallback=DEFAULT_POOL_CONNECTIONS)
+        settings['pool_maxsize'] = config.getint('Network', 'pool_maxsize', fallback=DEFAULT_POOL_MAXSIZE)
+        settings['timeout'] = config.getfloat('Network', 'timeout', fallback=DEFAULT_TIMEOUT)
+        settings['ocr_timeout'] = config.getfloat('Network', 'ocr_timeout', fallback=DEFAULT_OCR_TIMEOUT)
+    except ValueError as e:
+        logging.error(f"Errore nella sezione [Network]: {e}, usando valori predefiniti")
+    return settings
+
+def configure_transport(pool_connections: int = None, pool_maxsize: int = None,
+                        timeout: float = None, ocr_timeout: float = None):
+    """
+    Modifica le impostazioni del trasporto; la sessione viene ricreata al prossimo uso.
+    """
+    global _settings
+    with _session_lock:
+        settings = dict(_settings or load_transport_settings())
+        for key, value in (('pool_connections', pool_connections), ('pool_maxsize', pool_maxsize),
+                           ('timeout', timeout), ('ocr_timeout', ocr_timeout)):
+            if value is not None:
+                settings[key] = value
+        _settings = settings
+        _close_session_locked()
+
+def get_settings() -> dict:
+    """Restituisce le impostazioni di trasporto correnti."""
+    global _settings
+    if _settings is None:
+        _settings = load_transport_settings()
+    return _settings
+
+def get_session() -> 'requests.Session':
+    """
+    Restituisce la sessione HTTP condivisa, creandola al primo utilizzo.
+    Returns:
+        requests.Session: Sessione con pool di connessioni keep-alive.
+    """
+    global _session
+    if _session is not None:
+        return _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            settings = get_settings()
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=settings['pool_connections'],
+                                  pool_maxsize=settings['pool_maxsize'],
+                                  max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+            logging.debug(f"Sessione HTTP creata: {settings}")
+    return _session
+
+def get(url: str, **kwargs) -> 'requests.Response':
+    """GET tramite la sessione condivisa (timeout predefinito dalle impostazioni)."""
+    kwargs.setdefault('timeout', get_settings()['timeout'])
+    return get_session().get(url, **kwargs)
+
+def post(url: str, **kwargs) -> 'requests.Response':
+    """POST tramite la sessione condivisa (timeout predefinito dalle impostazioni)."""
+    kwargs.setdefault('timeout', get_settings()['timeout'])
+    return get_session().post(url, **kwargs)
+
+def _close_session_locked():
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+def close_transport():
+    """Chiude tutte le connessioni del pool."""
+    with _session_lock:
+        _close_session_locked()
+    logging.debug("Sessione HTTP chiusa")
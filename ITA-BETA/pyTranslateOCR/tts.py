@@ -1,16 +1,27 @@
-import pyttsx3
+import queue
 import logging
+import threading
+from metrics import span
 
 # Configura il logging
 # logging.basicConfig(level=logging.DEBUG)
 
 # Mantieni un riferimento globale al motore TTS
 _engine = None
+# pyttsx3 non è thread-safe: serializza il thread del parlato e le finestre delle impostazioni
+_tts_lock = threading.Lock()
+# Testi da leggere, pronunciati uno alla volta da un unico thread dedicato, così la lettura
+# non occupa i thread della pipeline
+_speech_queue = queue.Queue()
+_speech_thread = None
+_speech_thread_lock = threading.Lock()
 
 def get_engine():
     global _engine
     if _engine is None:
         try:
+            # Importato al primo utilizzo: pyttsx3 carica il driver vocale del sistema
+            import pyttsx3
             _engine = pyttsx3.init()
             logging.debug("Motore TTS inizializzato")
         except Exception as e:
@@ -30,19 +41,62 @@ def get_available_voices():
 
 def tts_output(text, rate=150, voice_id=None):
     try:
-        engine = get_engine()
-        engine.setProperty('rate', rate)
-        if voice_id:
-            engine.setProperty('voice', voice_id)
-            logging.debug(f"Voce TTS impostata: {voice_id}")
-        engine.say(text)
-        engine.runAndWait()
+        with _tts_lock, span('tts', 'pyttsx3', chars=len(text)):
+            engine = get_engine()
+            engine.setProperty('rate', rate)
+            if voice_id:
+                engine.setProperty('voice', voice_id)
+                logging.debug(f"Voce TTS impostata: {voice_id}")
+            engine.say(text)
+            engine.runAndWait()
         logging.debug("Riproduzione TTS completata")
     except Exception as e:
         logging.error(f"Errore durante la riproduzione TTS: {e}")
 
+def _speech_loop():
+    while True:
+        item = _speech_queue.get()
+        if item is None:
+            return
+        text, rate, voice_id, is_current = item
+        if is_current is not None and not is_current():
+            logging.debug("Testo TTS scartato: superato da una richiesta più recente")
+            continue
+        tts_output(text, rate, voice_id)
+
+def speak(text, rate=150, voice_id=None, is_current=None):
+    """
+    Accoda il testo al thread del TTS e ritorna subito.
+    Args:
+        text: Testo da leggere.
+        rate: Velocità della voce.
+        voice_id: Voce da usare (None per quella predefinita).
+        is_current: Funzione chiamata prima della lettura; se restituisce False il testo
+                    viene scartato (es. job superato da una richiesta più recente).
+    """
+    global _speech_thread
+    with _speech_thread_lock:
+        if _speech_thread is None or not _speech_thread.is_alive():
+            _speech_thread = threading.Thread(target=_speech_loop, name='tts', daemon=True)
+            _speech_thread.start()
+        _speech_queue.put((text, rate, voice_id, is_current))
+
+def _stop_speech_thread():
+    global _speech_thread
+    with _speech_thread_lock:
+        # Scarta i testi ancora in attesa e ferma il thread dopo la lettura in corso
+        while True:
+            try:
+                _speech_queue.get_nowait()
+            except queue.Empty:
+                break
+        if _speech_thread is not None and _speech_thread.is_alive():
+            _speech_queue.put(None)
+        _speech_thread = None
+
 def stop_tts():
     global _engine
+    _stop_speech_thread()
     try:
         if _engine is not None:
             _engine.stop()